@@ -277,7 +277,7 @@ export default function ProfileScreen({ navigation, route }) {
 
   useEffect(() => {
     const unsubscribe = subscribe((message) => {
-      if (['resync', 'avistamiento_created', 'avistamiento_deleted'].includes(message.type)) {
+      if (['resync', 'avistamiento_created', 'avistamientos_created', 'avistamiento_deleted'].includes(message.type)) {
         fetchAvistamientosMineCount();
       }
       if (['resync', 'evento_created', 'evento_deleted'].includes(message.type)) {
@@ -133,6 +133,14 @@ export default function SightingsScreen({ navigation, route }) {
         }
         setSightings((prev) => mergeAvistamientoCreated(prev, mapAvistamientoFromApi(message.payload)));
       }
+      if (message.type === 'avistamientos_created') {
+        const nuevos = message.payload.avistamientos.filter(
+          (a) => !showMineOnly || a.email_usuario === colaboradorProfile?.email,
+        );
+        setSightings((prev) =>
+          nuevos.reduce((acc, a) => mergeAvistamientoCreated(acc, mapAvistamientoFromApi(a)), prev),
+        );
+      }
       if (message.type === 'avistamiento_deleted') {
         setSightings((prev) => removeById(prev, String(message.payload.id)));
       }
@@ -512,6 +512,149 @@ CREATE TABLE InstitucionesColaboradores (
     activo BOOLEAN DEFAULT true
 );
 
+-- =============================================
+-- ÍNDICES PARA PAGINACIÓN POR CURSOR (keyset)
+-- Cada índice sigue el orden (columna de orden, id) que usa la API; las
+-- columnas que admiten NULL se ordenan por el mismo COALESCE que la consulta
+-- =============================================
+
+CREATE INDEX idx_especies_nombre_comun_id ON Especies ((COALESCE(nombre_comun, '')), id);
+CREATE INDEX idx_avistamientos_fecha_id ON Avistamientos ((COALESCE(fecha, '1970-01-01 00:00:00.000000')) DESC, id DESC);
+CREATE INDEX idx_productos_precio_id ON Productos ((COALESCE(precio, 0)), id);
+
+-- =============================================
+-- BÚSQUEDA DE ESPECIES (texto completo + trigramas)
+-- busqueda: tsvector generado (nombres con peso A, descripción con peso C),
+-- se mantiene solo en cada INSERT/UPDATE. unaccent no es IMMUTABLE, por eso
+-- se envuelve en sway_unaccent para poder indexar expresiones con él.
+-- =============================================
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION sway_unaccent(texto TEXT) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, texto) $$;
+
+CREATE TEXT SEARCH CONFIGURATION sway_es (COPY = pg_catalog.spanish);
+ALTER TEXT SEARCH CONFIGURATION sway_es
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+
+ALTER TABLE Especies ADD COLUMN busqueda TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('sway_es'::regconfig, COALESCE(nombre_comun, '')), 'A') ||
+    setweight(to_tsvector('sway_es'::regconfig, COALESCE(nombre_cientifico, '')), 'A') ||
+    setweight(to_tsvector('sway_es'::regconfig, COALESCE(descripcion, '')), 'C')
+) STORED;
+
+CREATE INDEX idx_especies_busqueda ON Especies USING GIN (busqueda);
+CREATE INDEX idx_especies_nombre_comun_trgm ON Especies USING GIN (sway_unaccent(lower(nombre_comun)) gin_trgm_ops);
+CREATE INDEX idx_especies_nombre_cientifico_trgm ON Especies USING GIN (sway_unaccent(lower(nombre_cientifico)) gin_trgm_ops);
+
+-- =============================================
+-- TARJETAS DE ESPECIES (modelo de lectura del listado)
+-- Una fila por especie con hábitats, amenazas y slug de conservación ya
+-- resueltos; la API la recalcula al crear, editar o borrar una especie.
+-- Para llenarla en una base existente: python -m app.services.tarjetas_especies
+-- =============================================
+
+CREATE TABLE TarjetasEspecies (
+    id_especie INT PRIMARY KEY REFERENCES Especies(id) ON DELETE CASCADE,
+    estado_conservacion VARCHAR(30) NOT NULL,
+    habitat_ids JSONB NOT NULL DEFAULT '[]',
+    habitats JSONB NOT NULL DEFAULT '[]',
+    amenaza_ids JSONB NOT NULL DEFAULT '[]',
+    amenazas JSONB NOT NULL DEFAULT '[]',
+    actualizado TIMESTAMP
+);
+
+-- =============================================
+-- ELIMINACIÓN DE ESPECIES EN SEGUNDO PLANO
+-- DELETE /api/especies/{id} solo marca eliminada_en; los avistamientos se
+-- borran por lotes (por id_especie) y al final la especie.
+-- =============================================
+
+ALTER TABLE Especies ADD COLUMN eliminada_en TIMESTAMP;
+CREATE INDEX idx_especies_eliminadas ON Especies (id) WHERE eliminada_en IS NOT NULL;
+CREATE INDEX idx_avistamientos_especie ON Avistamientos (id_especie);
+
+-- =============================================
+-- FILTROS DE ESPECIES POR ID
+-- Los slugs de hábitat y estado se resuelven a ids en la API; la PK de
+-- EspeciesHabitats empieza por id_especie, así que el filtro por hábitat
+-- necesita el índice inverso.
+-- =============================================
+
+CREATE INDEX idx_especies_habitats_habitat ON EspeciesHabitats (id_habitat, id_especie);
+CREATE INDEX idx_especies_estado ON Especies (id_estado_conservacion);
+
+-- Filtro, tarjetas y estadísticas comparten un mapeo: un estado "crítico"
+-- (p. ej. En Peligro Crítico) es extincion-critica y ya no también peligro.
+-- Corrige las tarjetas calculadas antes; equivale a recalcularlas con
+-- python -m app.services.tarjetas_especies
+UPDATE TarjetasEspecies t SET estado_conservacion = 'extincion-critica'
+FROM Especies e
+JOIN EstadosConservacion ec ON ec.id = e.id_estado_conservacion
+WHERE e.id = t.id_especie AND sway_unaccent(lower(ec.nombre)) LIKE '%critic%';
+
+-- =============================================
+-- ESTADÍSTICAS DE ESPECIES
+-- fecha_agregado alimenta especies_agregadas_hoy/mes; las especies previas
+-- quedan en NULL y no cuentan como recientes. El DEFAULT va aparte: en el
+-- ADD COLUMN llenaría todas las filas existentes con la fecha del despliegue.
+-- =============================================
+
+ALTER TABLE Especies ADD COLUMN fecha_agregado TIMESTAMP;
+ALTER TABLE Especies ALTER COLUMN fecha_agregado SET DEFAULT (now() AT TIME ZONE 'utc');
+
+-- =============================================
+-- BÚSQUEDA ESPACIAL DE AVISTAMIENTOS
+-- geohash (9 caracteres) lo calcula la API al insertar; los filtros bbox y
+-- radio lo consultan por rangos de prefijo. Collation "C" para que el orden
+-- del índice sea el de bytes. Para llenar los existentes:
+-- python -m app.services.geo
+-- =============================================
+
+ALTER TABLE Avistamientos ADD COLUMN geohash VARCHAR(12) COLLATE "C";
+CREATE INDEX idx_avistamientos_geohash ON Avistamientos (geohash);
+
+-- =============================================
+-- SERIES DE AVISTAMIENTOS (rollup diario)
+-- Una fila por especie y día; la API la actualiza en la misma transacción
+-- que crea o borra cada avistamiento. El INSERT llena una base existente.
+-- =============================================
+
+CREATE TABLE AvistamientosDiarios (
+    id_especie INT NOT NULL REFERENCES Especies(id) ON DELETE CASCADE,
+    dia DATE NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_especie, dia)
+);
+CREATE INDEX idx_avistamientos_diarios_dia ON AvistamientosDiarios (dia);
+
+INSERT INTO AvistamientosDiarios (id_especie, dia, total)
+SELECT id_especie, fecha::date, COUNT(*)
+FROM Avistamientos
+WHERE id_especie IS NOT NULL
+GROUP BY id_especie, fecha::date;
+
+-- =============================================
+-- VARIANTES DE FOTOS DE AVISTAMIENTOS
+-- {"thumb": url, "medium": url}; las genera la API en segundo plano tras
+-- cada subida. Para las fotos existentes:
+-- python -m app.services.derivados_imagenes
+-- =============================================
+
+ALTER TABLE Avistamientos ADD COLUMN foto_variantes JSONB;
+
+-- =============================================
+-- ENVÍO DE AVISTAMIENTOS POR LOTES (app móvil)
+-- La app genera una clave por avistamiento capturado sin conexión; reenviar
+-- un lote no duplica los que ya se registraron.
+-- =============================================
+
+ALTER TABLE Avistamientos ADD COLUMN clave_idempotencia VARCHAR(64);
+CREATE UNIQUE INDEX idx_avistamientos_clave_idempotencia ON Avistamientos (clave_idempotencia);
+
 -- =============================================
 -- VISTA CONSOLIDADA PARA GESTIÓN DE COLABORADORES
 -- Adaptada para PostgreSQL: || en lugar de +, COALESCE en lugar de ISNULL
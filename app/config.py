@@ -2,5 +2,8 @@ import os
 
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
 AVISTAMIENTOS_UPLOAD_DIR = os.path.join(UPLOAD_DIR, "avistamientos")
+# Si se define (p. ej. "/_uploads/"), /api/uploads responde con X-Accel-Redirect
+# hacia esa location interna de nginx en vez de mandar los bytes desde la API.
+UPLOADS_X_ACCEL_PREFIX = os.getenv("UPLOADS_X_ACCEL_PREFIX", "")
 
 os.makedirs(AVISTAMIENTOS_UPLOAD_DIR, exist_ok=True)
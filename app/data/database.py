@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
@@ -21,6 +23,29 @@ def get_db():
         db.close()
 
 
+# Mismo DATABASE_URL, pero con el driver async del dialecto (psycopg async en
+# Postgres, aiosqlite en SQLite) para que las lecturas de los routers no
+# bloqueen el event loop de uvicorn mientras esperan a la base de datos.
+ASYNC_DRIVERS = {"postgresql": "psycopg", "sqlite": "aiosqlite"}
+
+
+def build_async_url(url):
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver:
+        url = url.set(drivername=f"{url.get_backend_name()}+{driver}")
+    return url
+
+
+async_engine = create_async_engine(build_async_url(DATABASE_URL))
+asyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with asyncSessionLocal() as db:
+        yield db
+
+
 def construir_nombre_completo(nombre, apellido_paterno, apellido_materno, prefijo=""):
     if not nombre:
         return "Usuario"
@@ -1,9 +1,13 @@
+from datetime import datetime
+
 from sqlalchemy import (
     Column, Integer, String, Text, Boolean, Numeric,
-    Date, Time, ForeignKey, TIMESTAMP
+    Date, Time, ForeignKey, TIMESTAMP, JSON
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.data.database import Base
+from app.services.geo import codificar_geohash
 
 
 # ---------------------------------------------------------------------------
@@ -298,6 +302,9 @@ class Especie(Base):
     poblacion_estimada = Column(Integer)
     id_estado_conservacion = Column(Integer, ForeignKey("estadosconservacion.id"))
     imagen_url = Column(String(255))
+    fecha_agregado = Column(TIMESTAMP, default=datetime.utcnow)
+    # Marcada para borrarse en segundo plano; ya no se muestra en la API.
+    eliminada_en = Column(TIMESTAMP, nullable=True)
 
     estado_conservacion = relationship("EstadoConservacion", back_populates="especies")
     avistamientos = relationship("Avistamiento", back_populates="especie")
@@ -324,6 +331,25 @@ class EspecieCaracteristica(Base):
     id_caracteristica = Column(Integer, ForeignKey("caracteristicas.id"), primary_key=True)
 
 
+class TarjetaEspecie(Base):
+    """Modelo de lectura del listado de especies: hábitats, amenazas y slug de
+    conservación ya resueltos. Se recalcula al crear, editar o borrar."""
+    __tablename__ = "tarjetasespecies"
+
+    id_especie = Column(Integer, ForeignKey("especies.id", ondelete="CASCADE"), primary_key=True)
+    estado_conservacion = Column(String(30), nullable=False)
+    habitat_ids = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
+    habitats = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
+    amenaza_ids = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
+    amenazas = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
+    actualizado = Column(TIMESTAMP)
+
+
+def _geohash_avistamiento(contexto):
+    parametros = contexto.get_current_parameters()
+    return codificar_geohash(parametros.get("latitud"), parametros.get("longitud"))
+
+
 class Avistamiento(Base):
     __tablename__ = "avistamientos"
 
@@ -332,14 +358,31 @@ class Avistamiento(Base):
     fecha = Column(TIMESTAMP)
     latitud = Column(Numeric(10, 8))
     longitud = Column(Numeric(11, 8))
+    # Se calcula al insertar; los filtros bbox/radio buscan por rangos de prefijo.
+    geohash = Column(String(12), index=True, default=_geohash_avistamiento)
     notas = Column(Text)
     id_usuario = Column(Integer, ForeignKey("usuarios.id"))
     foto_url = Column(Text, nullable=True)
+    # {"thumb": url, "medium": url}; lo llena en segundo plano derivados_imagenes.
+    foto_variantes = Column(JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"),
+                            nullable=True)
+    # Clave que genera la app móvil por avistamiento; hace idempotente el envío por lotes.
+    clave_idempotencia = Column(String(64), unique=True, nullable=True)
 
     especie = relationship("Especie", back_populates="avistamientos")
     usuario = relationship("Usuario", back_populates="avistamientos")
 
 
+class AvistamientoDiario(Base):
+    """Conteo de avistamientos por especie y día; lo mantiene la API en la
+    misma transacción que crea o borra cada avistamiento."""
+    __tablename__ = "avistamientosdiarios"
+
+    id_especie = Column(Integer, ForeignKey("especies.id", ondelete="CASCADE"), primary_key=True)
+    dia = Column(Date, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+
 class Organizador(Base):
     __tablename__ = "organizadores"
 
@@ -13,10 +13,11 @@ from slowapi.middleware import SlowAPIMiddleware
 
 from fastapi import Depends, Security
 from fastapi.openapi.utils import get_openapi
-from fastapi.staticfiles import StaticFiles
-from app.config import UPLOAD_DIR
-from app.routers import auth, colaboradores, especies, productos, pedidos, eventos, estadisticas, direcciones, catalogos, realtime
+from app.routers import auth, colaboradores, especies, productos, pedidos, eventos, estadisticas, direcciones, catalogos, realtime, uploads
 from app.realtime.redis_bridge import start_subscriber
+from app.data.database import engine
+from app.services.eliminacion_especies import reanudar_eliminaciones
+from app.services.derivados_imagenes import cerrar_pool
 from app.security.rate_limit import limiter
 from app.security.api_key import require_api_key
 
@@ -59,6 +60,8 @@ app.include_router(estadisticas.router, dependencies=_api_key_dep)
 app.include_router(direcciones.router, dependencies=_api_key_dep)
 app.include_router(catalogos.router, dependencies=_api_key_dep)
 app.include_router(realtime.router)
+# Sin API key, igual que antes el StaticFiles: las fotos se cargan desde <img>.
+app.include_router(uploads.router)
 
 
 @app.on_event("startup")
@@ -69,7 +72,17 @@ async def _start_realtime_subscriber():
     # the subscriber never reaches pubsub.listen() on either replica).
     app.state.realtime_subscriber_task = asyncio.create_task(start_subscriber())
 
-app.mount("/api/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+
+@app.on_event("startup")
+async def _reanudar_eliminaciones_pendientes():
+    # Especies que quedaron marcadas si la réplica se reinició a media eliminación.
+    asyncio.get_running_loop().run_in_executor(None, reanudar_eliminaciones, engine)
+
+
+@app.on_event("shutdown")
+async def _cerrar_pool_derivados():
+    # Sin esto los procesos del pool de variantes sobreviven al worker de uvicorn.
+    cerrar_pool()
 
 
 def custom_openapi():
@@ -1,6 +1,6 @@
 # Para los modelos de validaciones el nombre debe reflejar la entidad que protege.
 # Se usa Field para agregar validaciones adicionales: longitud, rangos, descripción y ejemplos.
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 
 
@@ -95,3 +95,48 @@ class EspecieUpdate(BaseModel):
         "",
         description="Imagen de firma biométrica en base64"
     )
+
+
+class EspecieImportada(BaseModel):
+    # Una fila de la importación masiva (CSV o NDJSON). Estado, hábitats y
+    # amenazas vienen por nombre porque los catálogos de las instituciones
+    # socias no conocen nuestros IDs.
+    nombre_comun: str = Field(..., min_length=2, max_length=100)
+    nombre_cientifico: str = Field(..., min_length=2, max_length=100)
+    descripcion: str = Field("", max_length=2000)
+    esperanza_vida: Optional[int] = Field(None, ge=0, le=500)
+    poblacion_estimada: Optional[int] = Field(None, ge=0, le=2147483647)
+    estado_conservacion: str = Field(
+        ..., min_length=1, max_length=50,
+        description="Nombre del estado de conservación, p. ej. 'En Peligro'"
+    )
+    imagen_url: str = Field("", max_length=255)
+    habitats: List[str] = Field(
+        default_factory=list,
+        description="Nombres de hábitats; en CSV separados por '|'"
+    )
+    amenazas: List[str] = Field(
+        default_factory=list,
+        description="Nombres de amenazas; en CSV separados por '|'"
+    )
+
+    @field_validator("esperanza_vida", "poblacion_estimada", mode="before")
+    @classmethod
+    def vacio_como_nulo(cls, v):
+        if isinstance(v, str) and not v.strip():
+            return None
+        return v
+
+    @field_validator("descripcion", "imagen_url", mode="before")
+    @classmethod
+    def nulo_como_vacio(cls, v):
+        return "" if v is None else v
+
+    @field_validator("habitats", "amenazas", mode="before")
+    @classmethod
+    def separar_nombres(cls, v):
+        if v is None:
+            return []
+        if isinstance(v, str):
+            v = v.split("|")
+        return [n.strip() for n in v if isinstance(n, str) and n.strip()] if isinstance(v, list) else v
@@ -4,23 +4,55 @@ import os
 
 import redis.asyncio as aioredis
 
+from app.data.database import engine
 from app.realtime.manager import manager
+from app.services.cache_catalogos import catalog_cache
+from app.services.estadisticas_especies import estadisticas_especies
+from app.services.slugs_filtros import registro_slugs
+from app.services.sugerencias_especies import indice_sugerencias
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
 CHANNEL = "sway:events"
 
 
+_CACHES = (catalog_cache, registro_slugs, estadisticas_especies)
+
+
+async def _aplicar_evento(data: dict) -> None:
+    """Cada caché e índice se actualiza por separado y un fallo solo se
+    registra: el broadcast a los WebSockets tiene que salir siempre, porque
+    si se cae la suscripción el pub/sub no reenvía lo que se perdió."""
+    for cache in _CACHES:
+        try:
+            cache.handle_event(data)
+        except Exception as e:
+            print(f"[realtime] {type(cache).__name__} no aplicó {data.get('type')}: {e}")
+            cache.invalidate()
+    if data.get("type", "").startswith("especie"):
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, indice_sugerencias.handle_event, data, engine)
+        except Exception as e:
+            # Sin la base no se puede parchear; la próxima sugerencia lo recarga.
+            print(f"[realtime] índice de sugerencias no aplicó {data.get('type')}: {e}")
+            indice_sugerencias.invalidar()
+    await manager.broadcast(data)
+
+
 async def start_subscriber():
     while True:
         try:
             client = aioredis.from_url(REDIS_URL)
             pubsub = client.pubsub()
             await pubsub.subscribe(CHANNEL)
+            # mientras no había suscripción pudieron perderse invalidaciones;
+            # el índice de sugerencias se recarga con la siguiente búsqueda.
+            for cache in _CACHES:
+                cache.invalidate()
+            indice_sugerencias.invalidar()
             async for message in pubsub.listen():
                 if message["type"] != "message":
                     continue
-                data = json.loads(message["data"])
-                await manager.broadcast(data)
+                await _aplicar_evento(json.loads(message["data"]))
         except Exception as e:
             print(f"[realtime] subscriber error, retrying in 5s: {e}")
             await asyncio.sleep(5)
@@ -8,6 +8,7 @@ from app.data.models import (
 from app.models.catalogos import NewsletterSuscripcion, ContactoMensaje, DonacionCreate
 from app.services.email_service import send_newsletter_confirmation, send_newsletter, send_donation_thanks
 from app.services.errors import safe_500
+from app.services.cache_catalogos import notificar_cambio_catalogo
 
 
 async def _send_newsletter_after_delay(email: str, nombre: str, delay_seconds: int = 120):
@@ -241,6 +242,7 @@ async def setup_tienda(db: Session = Depends(get_db)):
                 db.add(Material(nombre=nombre))
 
         db.commit()
+        notificar_cambio_catalogo("categorias", "materiales")
         return {"success": True, "message": "Tienda configurada con datos de ejemplo"}
 
     except Exception as e:
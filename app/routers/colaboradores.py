@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request, Query
+from typing import Optional
 from sqlalchemy.orm import Session
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.data.database import get_db, construir_nombre_completo
@@ -9,8 +10,10 @@ from app.models.colaboradores import (
     ColaboradorLogin, ColaboradorRegister, CheckEmail,
     CheckOrcid, CheckCedula, ColaboradorPerfilUpdate, ColaboradorPasswordChange
 )
+from app.services.eliminacion_especies import especie_visible
 from app.services.email_service import send_welcome_email
 from app.services.errors import safe_500
+from app.services.streaming import filas_sync, respuesta_stream, validar_modo_stream
 
 router = APIRouter(prefix="/api/colaboradores", tags=["colaboradores"])
 
@@ -442,40 +445,48 @@ async def delete_colaborador_perfil(
         raise safe_500(e, "delete_colaborador_perfil")
 
 
+def _avistamiento_colaborador(fila) -> dict:
+    avistamiento, especie, usuario = fila
+    partes = [usuario.nombre, usuario.apellido_paterno, usuario.apellido_materno]
+    nombre_completo = " ".join(p for p in partes if p)
+    return {
+        "id": avistamiento.id,
+        "fecha": avistamiento.fecha.isoformat() if avistamiento.fecha else None,
+        "latitud": float(avistamiento.latitud) if avistamiento.latitud else None,
+        "longitud": float(avistamiento.longitud) if avistamiento.longitud else None,
+        "notas": avistamiento.notas,
+        "especie_nombre": especie.nombre_comun,
+        "especie_cientifica": especie.nombre_cientifico,
+        "reportado_por": nombre_completo or None,
+        "email_usuario": usuario.email,
+        "foto_url": avistamiento.foto_url,
+        "foto_variantes": avistamiento.foto_variantes
+    }
+
+
 @router.get("/avistamientos")
 async def get_colaborador_avistamientos(
+    stream: Optional[str] = Query(None, description="json o ndjson: envía las filas a medida que se leen"),
     current_user: dict = Depends(get_current_colaborador),
     db: Session = Depends(get_db)
 ):
     try:
+        validar_modo_stream(stream)
         colaborador_email = current_user.get("email")
 
         registros = (
             db.query(Avistamiento, Especie, Usuario)
             .join(Especie, Avistamiento.id_especie == Especie.id)
             .join(Usuario, Avistamiento.id_usuario == Usuario.id)
-            .filter(Usuario.email == colaborador_email)
+            .filter(Usuario.email == colaborador_email, especie_visible)
             .order_by(Avistamiento.fecha.desc())
-            .all()
         )
+        if stream:
+            return respuesta_stream(
+                filas_sync(db.get_bind(), registros.statement), _avistamiento_colaborador, "avistamientos", stream
+            )
 
-        avistamientos = []
-        for avistamiento, especie, usuario in registros:
-            partes = [usuario.nombre, usuario.apellido_paterno, usuario.apellido_materno]
-            nombre_completo = " ".join(p for p in partes if p)
-            avistamientos.append({
-                "id": avistamiento.id,
-                "fecha": avistamiento.fecha.isoformat() if avistamiento.fecha else None,
-                "latitud": float(avistamiento.latitud) if avistamiento.latitud else None,
-                "longitud": float(avistamiento.longitud) if avistamiento.longitud else None,
-                "notas": avistamiento.notas,
-                "especie_nombre": especie.nombre_comun,
-                "especie_cientifica": especie.nombre_cientifico,
-                "reportado_por": nombre_completo or None,
-                "email_usuario": usuario.email,
-                "foto_url": avistamiento.foto_url
-            })
-
+        avistamientos = [_avistamiento_colaborador(fila) for fila in registros.all()]
         return {"success": True, "avistamientos": avistamientos}
 
     except HTTPException:
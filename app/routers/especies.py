@@ -1,151 +1,248 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+import csv
+import io
+import tempfile
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from datetime import datetime
+from types import SimpleNamespace
 from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.data.database import get_db, build_especie_filters
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, select
+from app.data.database import get_db, get_async_db
 from app.data.models import (
     Especie, EstadoConservacion, Habitat, Amenaza, Caracteristica,
-    EspecieHabitat, EspecieAmenaza, EspecieCaracteristica, Avistamiento
+    EspecieHabitat, EspecieAmenaza, EspecieCaracteristica, TarjetaEspecie
 )
 from app.security.auth import get_current_colaborador
 from app.models.especies import EspecieCreate, EspecieUpdate
 from app.services.realtime_publish import publish_event
 from app.services.errors import safe_500
+from app.services.busqueda_especies import aplicar_busqueda
+from app.services.campos import necesita, resolver_campos, serializar
+from app.services.eliminacion_especies import eliminar_especie_por_lotes, especie_visible
+from app.services.estadisticas_especies import estadisticas_especies
+from app.services.importacion_especies import detectar_formato, importar_especies
+from app.services.slugs_filtros import registro_slugs
+from app.services.sugerencias_especies import LIMITE_SUGERENCIAS, indice_sugerencias
+from app.services.tarjetas_especies import (
+    cargar_habitats_amenazas, mapear_estado_conservacion, refrescar_tarjetas
+)
+from app.services.cache_catalogos import cached_catalog
+from app.services.versiones import conditional_get
+from app.services.cache_respuestas import cached_response
+from app.services.single_flight import single_flight
+from app.services.paginacion import (
+    aplicar_keyset, contar_total, decode_cursor, ordenar_keyset, siguiente_cursor, sin_nulos, validar_modo_total
+)
 
-router = APIRouter(prefix="/api", tags=["especies"])
+# Catálogos que aparecen dentro de la respuesta de especies: si cambian, el ETag también.
+CATALOGOS_ESPECIE = ["catalogo:estados_conservacion", "catalogo:habitats", "catalogo:amenazas"]
 
 
-def _mapear_estado_conservacion(nombre_estado: Optional[str]) -> str:
-    if not nombre_estado:
-        return "preocupacion-menor"
-    nombre = nombre_estado.lower()
-    if "crítica" in nombre or "critica" in nombre:
-        return "extincion-critica"
-    elif "peligro" in nombre:
-        return "peligro"
-    elif "vulnerable" in nombre:
-        return "vulnerable"
-    elif "amenazada" in nombre:
-        return "casi-amenazada"
-    return "preocupacion-menor"
+def _claves_especie(especie_id, **_):
+    return [f"especie:{especie_id}", *CATALOGOS_ESPECIE]
 
+router = APIRouter(prefix="/api", tags=["especies"])
 
-def _get_especies_filtered(db: Session, search="", conservation_filter="", habitat_filter="", sort_by="nombre", page=1, limit=12):
-    offset = (page - 1) * limit
 
-    q = (
-        db.query(Especie, EstadoConservacion)
-        .outerjoin(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
-    )
+def _claves_orden_especies(sort_by, rank=None):
+    if sort_by == "relevancia" and rank is not None:
+        return [rank, Especie.id], True
+    if sort_by == "conservation":
+        return [func.coalesce(EstadoConservacion.nombre, ""), Especie.id], False
+    if sort_by == "size":
+        return [func.coalesce(Especie.poblacion_estimada, -1), Especie.id], True
+    if sort_by == "added":
+        return [Especie.id], True
+    return [sin_nulos(Especie.nombre_comun, "''"), Especie.id], False
+
+
+CAMPOS_ESPECIE = {
+    "id": lambda f: f.especie.id,
+    "nombre": lambda f: f.especie.nombre_comun,
+    "nombre_comun": lambda f: f.especie.nombre_comun,
+    "nombre_cientifico": lambda f: f.especie.nombre_cientifico,
+    "descripcion": lambda f: f.especie.descripcion or "Sin descripción disponible",
+    "esperanza_vida": lambda f: f"{f.especie.esperanza_vida} años" if f.especie.esperanza_vida else "No disponible",
+    "poblacion_estimada": lambda f: f.especie.poblacion_estimada,
+    "id_estado_conservacion": lambda f: f.especie.id_estado_conservacion,
+    "imagen": lambda f: f.especie.imagen_url or "",
+    "imagen_url": lambda f: f.especie.imagen_url,
+    "estado_conservacion": lambda f: f.estado_slug,
+    "longitud": lambda f: "Variable",
+    "ubicacion": lambda f: ", ".join(f.habitats),
+    "habitat": lambda f: f.habitats[0].lower().replace(" ", "-") if f.habitats else "marino",
+    "tipo": lambda f: "marina",
+    "region": lambda f: "global",
+    "amenazas": lambda f: f.amenazas,
+    "amenaza_ids": lambda f: f.amenaza_ids,
+    "habitats": lambda f: f.habitats,
+    "habitat_ids": lambda f: f.habitat_ids,
+}
+GRUPOS_ESPECIE = {
+    "habitats": {"habitats", "habitat_ids", "habitat", "ubicacion"},
+    "amenazas": {"amenazas", "amenaza_ids"},
+}
+COLUMNAS_ESPECIE = {
+    "nombre": "nombre_comun", "nombre_comun": "nombre_comun", "nombre_cientifico": "nombre_cientifico",
+    "descripcion": "descripcion", "esperanza_vida": "esperanza_vida", "poblacion_estimada": "poblacion_estimada",
+    "id_estado_conservacion": "id_estado_conservacion", "imagen": "imagen_url", "imagen_url": "imagen_url",
+}
+_CLAVES_TARJETA = ("estado_conservacion", "ubicacion", "habitat", "amenazas", "amenaza_ids", "habitats", "habitat_ids")
+
+
+def _get_especies_filtered(db: Session, search="", conservation_filter="", habitat_filter="", sort_by="nombre",
+                           page=1, limit=12, cursor=None, total="exacto", campos=None):
+    offset = (page - 1) * limit
+    # La tarjeta (y el estado, para las especies que aún no la tienen) solo se
+    # une si se pidió alguna clave que sale de ella.
+    con_tarjeta = necesita(campos, *_CLAVES_TARJETA)
+
+    q = db.query(Especie)
+    if campos is not None:
+        columnas_especie = {c for k, c in COLUMNAS_ESPECIE.items() if k in campos}
+        q = q.options(load_only(Especie.id, *[getattr(Especie, c) for c in sorted(columnas_especie)]))
+    if con_tarjeta or sort_by == "conservation":
+        q = q.outerjoin(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
+    if con_tarjeta:
+        q = q.add_entity(EstadoConservacion)
+    q = q.filter(especie_visible)
 
     if habitat_filter:
-        habitat_map = {
-            "arrecife": ["arrecife", "coral"],
-            "aguas-profundas": ["profundas", "abisales"],
-            "aguas-abiertas": ["abiertas", "pelágicas", "oceánicas"],
-            "costero": ["costero", "costa", "litoral"],
-            "polar": ["polar", "ártico", "antártico"],
-            "manglar": ["manglar", "manglares"],
-            "estuario": ["estuario", "estuarios"]
-        }
-        terminos = habitat_map.get(habitat_filter, [])
-        if terminos:
-            q = q.join(EspecieHabitat, Especie.id == EspecieHabitat.id_especie)
-            q = q.join(Habitat, EspecieHabitat.id_habitat == Habitat.id)
-            condiciones_habitat = [Habitat.nombre.ilike(f"%{t}%") for t in terminos]
-            from sqlalchemy import or_
-            q = q.filter(or_(*condiciones_habitat))
-
-    if search:
-        from sqlalchemy import or_
-        q = q.filter(
-            or_(
-                Especie.nombre_comun.ilike(f"%{search}%"),
-                Especie.nombre_cientifico.ilike(f"%{search}%")
-            )
-        )
+        habitat_ids = registro_slugs.ids(db, "habitats", habitat_filter)
+        if habitat_ids is not None:
+            # Semijoin sobre la tabla puente: usa su índice y no duplica filas.
+            q = q.filter(Especie.id.in_(
+                select(EspecieHabitat.id_especie).where(EspecieHabitat.id_habitat.in_(sorted(habitat_ids)))
+            ))
+
+    q, rank = aplicar_busqueda(db, q, search)
 
     if conservation_filter:
-        conservation_map = {
-            "extincion-critica": ["crítica", "critica"],
-            "peligro": ["peligro"],
-            "vulnerable": ["vulnerable"],
-            "casi-amenazada": ["amenazada"],
-            "preocupacion-menor": ["menor", "preocupación menor"]
-        }
-        terminos_c = conservation_map.get(conservation_filter, [])
-        if terminos_c:
-            from sqlalchemy import or_
-            condiciones_c = [EstadoConservacion.nombre.ilike(f"%{t}%") for t in terminos_c]
-            q = q.filter(or_(*condiciones_c))
-
-    total_count = q.with_entities(func.count(func.distinct(Especie.id))).scalar()
-
-    order_map = {
-        "nombre": Especie.nombre_comun,
-        "conservation": EstadoConservacion.nombre,
-        "size": Especie.poblacion_estimada.desc(),
-        "habitat": Especie.nombre_comun,
-        "added": Especie.id.desc()
-    }
-    orden = order_map.get(sort_by, Especie.nombre_comun)
-    q = q.order_by(orden).distinct().offset(offset).limit(limit)
-    filas = q.all()
+        estado_ids = registro_slugs.ids(db, "estados_conservacion", conservation_filter)
+        if estado_ids is not None:
+            q = q.filter(Especie.id_estado_conservacion.in_(sorted(estado_ids)))
+
+    total_count = contar_total(db, q, Especie.id, total)
+
+    if sort_by == "relevancia" and rank is None:
+        sort_by = "nombre"
+    if sort_by not in ("relevancia", "conservation", "size", "added"):
+        sort_by = "nombre"
+    columnas, descendente = _claves_orden_especies(sort_by, rank)
+    # La tarjeta trae hábitats, amenazas y slug ya resueltos: la página sale en
+    # una sola consulta. Se agrega después de contar para no afectar el total.
+    if con_tarjeta:
+        q = q.outerjoin(TarjetaEspecie, TarjetaEspecie.id_especie == Especie.id).add_entity(TarjetaEspecie)
+    n_entidades = 3 if con_tarjeta else 1
+    q = ordenar_keyset(q.add_columns(*columnas), columnas, descendente).distinct()
+    if cursor:
+        q = aplicar_keyset(q, columnas, descendente, decode_cursor(cursor, sort_by))
+    else:
+        q = q.offset(offset)
+    q = q.limit(limit + 1)
+    resultado = q.all()
+
+    next_cursor = siguiente_cursor(sort_by, [tuple(fila[n_entidades:]) for fila in resultado], limit)
+    if con_tarjeta:
+        filas = [(fila[0], fila[1], fila[2]) for fila in resultado[:limit]]
+    else:
+        filas = [(fila[0], None, None) for fila in resultado[:limit]]
+
+    # Especies sin tarjeta (cargadas por SQL directo, antes de la reconstrucción)
+    habitats_por_especie, amenazas_por_especie = cargar_habitats_amenazas(
+        db, [especie.id for especie, _, tarjeta in filas if con_tarjeta and tarjeta is None]
+    )
 
     especies = []
-    for especie, estado in filas:
-        estado_slug = _mapear_estado_conservacion(estado.nombre if estado else None)
-
-        habitats_nombres = [
-            h.nombre for h in
-            db.query(Habitat)
-            .join(EspecieHabitat, Habitat.id == EspecieHabitat.id_habitat)
-            .filter(EspecieHabitat.id_especie == especie.id)
-            .all()
-        ] or ["Océano Atlántico", "Océano Pacífico"]
-
-        amenazas_rows = (
-            db.query(Amenaza)
-            .join(EspecieAmenaza, Amenaza.id == EspecieAmenaza.id_amenaza)
-            .filter(EspecieAmenaza.id_especie == especie.id)
-            .all()
-        )
-        amenazas_nombres = [a.nombre for a in amenazas_rows] or ["Contaminación", "Pesca excesiva"]
-        amenaza_ids = [a.id for a in amenazas_rows]
-
-        habitat_rows = (
-            db.query(Habitat)
-            .join(EspecieHabitat, Habitat.id == EspecieHabitat.id_habitat)
-            .filter(EspecieHabitat.id_especie == especie.id)
-            .all()
-        )
-        habitats_nombres = [h.nombre for h in habitat_rows] or ["Océano Atlántico", "Océano Pacífico"]
-        habitat_ids = [h.id for h in habitat_rows]
-
-        especies.append({
-            "id": especie.id,
-            "nombre": especie.nombre_comun,
-            "nombre_comun": especie.nombre_comun,
-            "nombre_cientifico": especie.nombre_cientifico,
-            "descripcion": especie.descripcion or "Sin descripción disponible",
-            "esperanza_vida": f"{especie.esperanza_vida} años" if especie.esperanza_vida else "No disponible",
-            "poblacion_estimada": especie.poblacion_estimada,
-            "id_estado_conservacion": especie.id_estado_conservacion,
-            "imagen": especie.imagen_url or "",
-            "imagen_url": especie.imagen_url,
-            "estado_conservacion": estado_slug,
-            "longitud": "Variable",
-            "ubicacion": ", ".join(habitats_nombres),
-            "habitat": habitats_nombres[0].lower().replace(" ", "-") if habitats_nombres else "marino",
-            "tipo": "marina",
-            "region": "global",
-            "amenazas": amenazas_nombres,
-            "amenaza_ids": amenaza_ids,
-            "habitats": habitats_nombres,
-            "habitat_ids": habitat_ids,
-        })
+    for especie, estado, tarjeta in filas:
+        fila = SimpleNamespace(especie=especie, estado_slug=None, amenaza_ids=[], amenazas=[],
+                               habitat_ids=[], habitats=[])
+        if tarjeta is not None:
+            fila.estado_slug = tarjeta.estado_conservacion
+            fila.amenaza_ids, fila.amenazas = list(tarjeta.amenaza_ids), list(tarjeta.amenazas)
+            fila.habitat_ids, fila.habitats = list(tarjeta.habitat_ids), list(tarjeta.habitats)
+        elif con_tarjeta:
+            fila.estado_slug = mapear_estado_conservacion(estado.nombre if estado else None)
+            amenazas_rows = amenazas_por_especie.get(especie.id, [])
+            fila.amenaza_ids, fila.amenazas = [a.id for a in amenazas_rows], [a.nombre for a in amenazas_rows]
+            habitat_rows = habitats_por_especie.get(especie.id, [])
+            fila.habitat_ids, fila.habitats = [h.id for h in habitat_rows], [h.nombre for h in habitat_rows]
+        fila.amenazas = fila.amenazas or ["Contaminación", "Pesca excesiva"]
+        fila.habitats = fila.habitats or ["Océano Atlántico", "Océano Pacífico"]
+
+        especies.append(serializar(fila, CAMPOS_ESPECIE, campos))
+
+    return especies, total_count, next_cursor
+
+
+def _obtener_especie(db: Session, especie_id: int):
+    resultado = (
+        db.query(Especie, EstadoConservacion)
+        .outerjoin(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
+        .filter(Especie.id == especie_id, especie_visible)
+        .first()
+    )
+    if not resultado:
+        raise HTTPException(status_code=404, detail="Especie no encontrada")
 
-    return especies, total_count
+    especie, estado = resultado
+    estado_slug = mapear_estado_conservacion(estado.nombre if estado else None)
+
+    amenazas_rows = (
+        db.query(Amenaza)
+        .join(EspecieAmenaza, Amenaza.id == EspecieAmenaza.id_amenaza)
+        .filter(EspecieAmenaza.id_especie == especie_id)
+        .all()
+    )
+    amenazas_nombres = [a.nombre for a in amenazas_rows]
+    amenaza_ids = [a.id for a in amenazas_rows]
+
+    habitats_rows = (
+        db.query(Habitat)
+        .join(EspecieHabitat, Habitat.id == EspecieHabitat.id_habitat)
+        .filter(EspecieHabitat.id_especie == especie_id)
+        .all()
+    )
+    habitats_nombres = [h.nombre for h in habitats_rows]
+    habitat_ids = [h.id for h in habitats_rows]
+
+    caracteristicas = (
+        db.query(Caracteristica)
+        .join(EspecieCaracteristica, Caracteristica.id == EspecieCaracteristica.id_caracteristica)
+        .filter(EspecieCaracteristica.id_especie == especie_id)
+        .all()
+    )
+    longitud = "Variable"
+    peso = "Variable"
+    for c in caracteristicas:
+        tipo = c.tipo_caracteristica.lower()
+        if "longitud" in tipo or "tamaño" in tipo or "talla" in tipo:
+            longitud = c.valor
+        elif "peso" in tipo:
+            peso = c.valor
+
+    return {
+        "id": especie.id,
+        "nombre_comun": especie.nombre_comun,
+        "nombre": especie.nombre_comun,
+        "nombre_cientifico": especie.nombre_cientifico,
+        "descripcion": especie.descripcion or "Sin descripción disponible",
+        "esperanza_vida": especie.esperanza_vida,
+        "poblacion_estimada": especie.poblacion_estimada,
+        "id_estado_conservacion": especie.id_estado_conservacion,
+        "imagen_url": especie.imagen_url,
+        "imagen": especie.imagen_url,
+        "estado_conservacion": estado_slug,
+        "amenazas": amenazas_nombres,
+        "amenaza_ids": amenaza_ids,
+        "habitats": habitats_nombres,
+        "habitat_ids": habitat_ids,
+        "longitud": longitud,
+        "peso": peso,
+        "habitat": habitats_nombres[0].lower().replace(" ", "-") if habitats_nombres else "marino"
+    }
 
 
 @router.get("/tipos-especies")
@@ -163,40 +260,26 @@ async def get_tipos_especies():
 
 
 @router.get("/especies/estadisticas")
+@single_flight("especies-estadisticas")
 async def get_especies_estadisticas(
     fecha_desde: Optional[str] = Query(None),
     fecha_hasta: Optional[str] = Query(None),
     estado: Optional[str] = Query(None),
     habitat: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        from datetime import date
-
-        especie_query = db.query(Especie)
-        especie_query = build_especie_filters(especie_query, estado=estado, habitat=habitat)
-        total_especies = especie_query.count()
-
-        stats_query = (
-            db.query(EstadoConservacion.nombre, func.count(Especie.id))
-            .join(Especie, Especie.id_estado_conservacion == EstadoConservacion.id)
-        )
-        if habitat:
-            stats_query = stats_query.join(
-                EspecieHabitat, Especie.id == EspecieHabitat.id_especie
-            ).join(Habitat, EspecieHabitat.id_habitat == Habitat.id).filter(Habitat.nombre == habitat)
-        stats_conservacion = stats_query.group_by(EstadoConservacion.nombre).all()
-        conservacion_map = {nombre: cantidad for nombre, cantidad in stats_conservacion}
+        stats = await db.run_sync(estadisticas_especies.obtener, estado, habitat)
 
         return {"success": True, "estadisticas": {
-            "total_especies": total_especies,
-            "en_peligro_critico": conservacion_map.get("Extinción Crítica", 0),
-            "en_peligro": conservacion_map.get("En Peligro", 0),
-            "vulnerables": conservacion_map.get("Vulnerable", 0),
-            "especies_marinas": total_especies,
-            "especies_agregadas_hoy": 0,
-            "especies_agregadas_mes": 0,
-            "habitats_representados": 7,
+            "total_especies": stats["total"],
+            "en_peligro_critico": stats["por_estado"].get("extincion-critica", 0),
+            "en_peligro": stats["por_estado"].get("peligro", 0),
+            "vulnerables": stats["por_estado"].get("vulnerable", 0),
+            "especies_marinas": stats["total"],
+            "especies_agregadas_hoy": stats["agregadas_hoy"],
+            "especies_agregadas_mes": stats["agregadas_mes"],
+            "habitats_representados": stats["habitats_representados"],
             "regiones_cubiertas": 7
         }}
     except Exception as e:
@@ -210,7 +293,9 @@ async def get_especies_estadisticas(
 
 
 @router.get("/especies/opciones-filtros")
-async def get_opciones_filtros(db: Session = Depends(get_db)):
+@conditional_get(["catalogo:habitats"])
+@cached_catalog("opciones_filtros", catalogos=["habitats"])
+async def get_opciones_filtros(db: AsyncSession = Depends(get_async_db)):
     regiones = [
         {"id": "pacifico", "nombre": "Océano Pacífico"},
         {"id": "atlantico", "nombre": "Océano Atlántico"},
@@ -232,9 +317,10 @@ async def get_opciones_filtros(db: Session = Depends(get_db)):
         {"id": "conservation", "nombre": "Estado de Conservación"},
         {"id": "size", "nombre": "Tamaño"},
         {"id": "habitat", "nombre": "Hábitat"},
-        {"id": "added", "nombre": "Recién Agregados"}
+        {"id": "added", "nombre": "Recién Agregados"},
+        {"id": "relevancia", "nombre": "Relevancia"}
     ]
-    habitats_db = db.query(Habitat).order_by(Habitat.nombre).all()
+    habitats_db = (await db.execute(select(Habitat).order_by(Habitat.nombre))).scalars().all()
     habitats = [{"id": h.id, "nombre": h.nombre, "descripcion": h.descripcion} for h in habitats_db]
     tipos_data = await get_tipos_especies()
 
@@ -247,6 +333,22 @@ async def get_opciones_filtros(db: Session = Depends(get_db)):
     }}
 
 
+@router.get("/especies/sugerencias")
+async def sugerencias_especies(
+    q: str = Query("", max_length=100),
+    limite: int = Query(LIMITE_SUGERENCIAS, ge=1, le=20),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        # Solo va a la base si el índice de esta réplica aún no se armó
+        # (p. ej. Redis no estaba al arrancar).
+        if not indice_sugerencias.cargado:
+            await db.run_sync(indice_sugerencias.cargar)
+        return {"success": True, "sugerencias": indice_sugerencias.buscar(q, limite)}
+    except Exception as e:
+        raise safe_500(e, "sugerencias_especies")
+
+
 @router.get("/especies/busqueda-avanzada")
 async def busqueda_avanzada_especies(
     nombre: str = Query(""),
@@ -255,7 +357,7 @@ async def busqueda_avanzada_especies(
     conservation: str = Query(""),
     tipo: str = Query(""),
     region: str = Query(""),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         terminos = []
@@ -265,9 +367,9 @@ async def busqueda_avanzada_especies(
             terminos.append(nombre_cientifico.strip())
         search = " ".join(terminos)
 
-        especies, total_count = _get_especies_filtered(
-            db, search=search, conservation_filter=conservation,
-            habitat_filter=habitat, sort_by="nombre", page=1, limit=100
+        especies, total_count, _ = await db.run_sync(
+            _get_especies_filtered, search=search, conservation_filter=conservation,
+            habitat_filter=habitat, sort_by="relevancia", page=1, limit=100
         )
         return {"success": True, "especies": especies, "total": total_count}
     except HTTPException:
@@ -278,6 +380,8 @@ async def busqueda_avanzada_especies(
 
 
 @router.get("/especies")
+@conditional_get(["especies", *CATALOGOS_ESPECIE])
+@cached_response(["especies", *CATALOGOS_ESPECIE])
 async def get_especies(
     search: str = Query(""),
     habitat: str = Query(""),
@@ -285,12 +389,19 @@ async def get_especies(
     sort: str = Query("nombre"),
     page: int = Query(1),
     limit: int = Query(12),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    total: str = Query("exacto"),
+    fields: Optional[str] = Query(None, description="Claves a devolver separadas por coma, p. ej. id,nombre,imagen"),
+    include: Optional[str] = Query(None, description="Grupos de claves: habitats, amenazas"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        especies, total_count = _get_especies_filtered(
-            db, search=search.strip(), conservation_filter=conservation,
-            habitat_filter=habitat, sort_by=sort, page=page, limit=limit
+        validar_modo_total(total)
+        campos = resolver_campos(fields, include, CAMPOS_ESPECIE, GRUPOS_ESPECIE)
+        especies, total_count, next_cursor = await db.run_sync(
+            _get_especies_filtered, search=search.strip(), conservation_filter=conservation,
+            habitat_filter=habitat, sort_by=sort, page=page, limit=limit,
+            cursor=cursor, total=total, campos=campos
         )
         return {
             "success": True,
@@ -298,7 +409,8 @@ async def get_especies(
             "total": total_count,
             "page": page,
             "limit": limit,
-            "total_pages": (total_count + limit - 1) // limit
+            "total_pages": (total_count + limit - 1) // limit if total_count is not None else None,
+            "next_cursor": next_cursor
         }
     except HTTPException:
         raise
@@ -307,73 +419,12 @@ async def get_especies(
 
 
 @router.get("/especies/{especie_id}")
-async def get_especie(especie_id: int, db: Session = Depends(get_db)):
+@conditional_get(_claves_especie)
+@cached_response(_claves_especie)
+async def get_especie(especie_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        resultado = (
-            db.query(Especie, EstadoConservacion)
-            .outerjoin(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
-            .filter(Especie.id == especie_id)
-            .first()
-        )
-        if not resultado:
-            raise HTTPException(status_code=404, detail="Especie no encontrada")
-
-        especie, estado = resultado
-        estado_slug = _mapear_estado_conservacion(estado.nombre if estado else None)
-
-        amenazas_rows = (
-            db.query(Amenaza)
-            .join(EspecieAmenaza, Amenaza.id == EspecieAmenaza.id_amenaza)
-            .filter(EspecieAmenaza.id_especie == especie_id)
-            .all()
-        )
-        amenazas_nombres = [a.nombre for a in amenazas_rows]
-        amenaza_ids = [a.id for a in amenazas_rows]
-
-        habitats_rows = (
-            db.query(Habitat)
-            .join(EspecieHabitat, Habitat.id == EspecieHabitat.id_habitat)
-            .filter(EspecieHabitat.id_especie == especie_id)
-            .all()
-        )
-        habitats_nombres = [h.nombre for h in habitats_rows]
-        habitat_ids = [h.id for h in habitats_rows]
-
-        caracteristicas = (
-            db.query(Caracteristica)
-            .join(EspecieCaracteristica, Caracteristica.id == EspecieCaracteristica.id_caracteristica)
-            .filter(EspecieCaracteristica.id_especie == especie_id)
-            .all()
-        )
-        longitud = "Variable"
-        peso = "Variable"
-        for c in caracteristicas:
-            tipo = c.tipo_caracteristica.lower()
-            if "longitud" in tipo or "tamaño" in tipo or "talla" in tipo:
-                longitud = c.valor
-            elif "peso" in tipo:
-                peso = c.valor
-
-        return {"success": True, "especie": {
-            "id": especie.id,
-            "nombre_comun": especie.nombre_comun,
-            "nombre": especie.nombre_comun,
-            "nombre_cientifico": especie.nombre_cientifico,
-            "descripcion": especie.descripcion or "Sin descripción disponible",
-            "esperanza_vida": especie.esperanza_vida,
-            "poblacion_estimada": especie.poblacion_estimada,
-            "id_estado_conservacion": especie.id_estado_conservacion,
-            "imagen_url": especie.imagen_url,
-            "imagen": especie.imagen_url,
-            "estado_conservacion": estado_slug,
-            "amenazas": amenazas_nombres,
-            "amenaza_ids": amenaza_ids,
-            "habitats": habitats_nombres,
-            "habitat_ids": habitat_ids,
-            "longitud": longitud,
-            "peso": peso,
-            "habitat": habitats_nombres[0].lower().replace(" ", "-") if habitats_nombres else "marino"
-        }}
+        especie = await db.run_sync(_obtener_especie, especie_id)
+        return {"success": True, "especie": especie}
 
     except HTTPException:
         raise
@@ -450,6 +501,7 @@ async def create_especie(
                     except (ValueError, TypeError):
                         continue
 
+        refrescar_tarjetas(db, [especie_id])
         db.commit()
 
         if colaborador and orm_db:
@@ -468,7 +520,10 @@ async def create_especie(
             finally:
                 orm_db.close()
 
-        publish_event("especie_created", {"id": especie_id, "nombre_comun": nueva_especie.nombre_comun})
+        publish_event("especie_created", {
+            "id": especie_id, "nombre_comun": nueva_especie.nombre_comun,
+            "nombre_cientifico": nueva_especie.nombre_cientifico
+        })
 
         return {"success": True, "especie_id": especie_id, "message": "Especie creada correctamente"}
 
@@ -478,6 +533,88 @@ async def create_especie(
         raise safe_500(e, "create_especie")
 
 
+MAX_IMPORTACION_BYTES = 50 * 1024 * 1024  # 50MB
+IMPORTACION_EN_MEMORIA_BYTES = 1024 * 1024  # arriba de esto el cuerpo va a disco
+
+
+@router.post("/especies/importar")
+async def importar_especies_masivo(
+    request: Request,
+    formato: Optional[str] = Query(None, description="csv o ndjson; por defecto se toma del Content-Type"),
+    estricto: bool = Query(False, description="Si hay cualquier fila con error no se importa nada"),
+    current_user: dict = Depends(get_current_colaborador),
+    db: Session = Depends(get_db)
+):
+    try:
+        try:
+            formato = detectar_formato(request.headers.get("content-type", ""), formato)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        with tempfile.SpooledTemporaryFile(max_size=IMPORTACION_EN_MEMORIA_BYTES) as archivo:
+            recibidos = 0
+            async for bloque in request.stream():
+                recibidos += len(bloque)
+                if recibidos > MAX_IMPORTACION_BYTES:
+                    raise HTTPException(status_code=413, detail="El archivo excede el tamaño máximo de 50MB")
+                archivo.write(bloque)
+            archivo.seek(0)
+            texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+            try:
+                resumen, ids = await run_in_threadpool(importar_especies, db, texto, formato)
+            except (UnicodeDecodeError, csv.Error) as e:
+                db.rollback()
+                raise HTTPException(status_code=400, detail=f"No se pudo leer el archivo: {e}")
+            finally:
+                texto.detach()
+
+        if estricto and resumen["total_errores"]:
+            db.rollback()
+            raise HTTPException(status_code=400, detail={
+                "message": "La importación tiene filas con errores; no se importó ninguna", **resumen
+            })
+        db.commit()
+
+        if ids:
+            publish_event("especies_importadas", {
+                "total": len(ids), "primer_id": ids[0], "ultimo_id": ids[-1]
+            })
+
+        return {"success": True, **resumen}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise safe_500(e, "importar_especies_masivo")
+
+
+def _ids_relacion(valores) -> set:
+    ids = set()
+    for valor in valores or []:
+        if valor and str(valor).strip() and str(valor) != "null":
+            try:
+                ids.add(int(valor))
+            except (ValueError, TypeError):
+                continue
+    return ids
+
+
+def _sincronizar_relacion(db: Session, modelo, columna, especie_id: int, actuales: set, nuevos: set):
+    """Aplica solo la diferencia: un DELETE para los vínculos que sobran y un
+    INSERT de varias filas para los que faltan."""
+    sobrantes = actuales - nuevos
+    faltantes = nuevos - actuales
+    if sobrantes:
+        db.execute(
+            delete(modelo)
+            .where(modelo.id_especie == especie_id, columna.in_(sobrantes))
+            .execution_options(synchronize_session=False)
+        )
+    if faltantes:
+        db.execute(insert(modelo), [{"id_especie": especie_id, columna.key: i} for i in sorted(faltantes)])
+
+
 @router.put("/especies/{especie_id}")
 async def update_especie(
     especie_id: int,
@@ -515,37 +652,43 @@ async def update_especie(
             except HTTPException:
                 raise
 
-        especie = db.query(Especie).filter(Especie.id == especie_id).first()
+        especie = db.query(Especie).filter(Especie.id == especie_id, especie_visible).first()
         if not especie:
             raise HTTPException(status_code=404, detail="Especie no encontrada")
 
-        especie.nombre_comun = data.nombre_comun
-        especie.nombre_cientifico = data.nombre_cientifico
-        especie.descripcion = data.descripcion or None
-        especie.esperanza_vida = data.esperanza_vida or None
-        especie.poblacion_estimada = data.poblacion_estimada or None
-        especie.id_estado_conservacion = data.id_estado_conservacion
-        especie.imagen_url = data.imagen_url or None
+        campos = {
+            "nombre_comun": data.nombre_comun,
+            "nombre_cientifico": data.nombre_cientifico,
+            "descripcion": data.descripcion or None,
+            "esperanza_vida": data.esperanza_vida or None,
+            "poblacion_estimada": data.poblacion_estimada or None,
+            "id_estado_conservacion": data.id_estado_conservacion,
+            "imagen_url": data.imagen_url or None,
+        }
+        campos_cambiados = {k: v for k, v in campos.items() if getattr(especie, k) != v}
 
-        db.query(EspecieAmenaza).filter(EspecieAmenaza.id_especie == especie_id).delete()
-        db.query(EspecieHabitat).filter(EspecieHabitat.id_especie == especie_id).delete()
+        amenazas_actuales = {
+            a for (a,) in db.query(EspecieAmenaza.id_amenaza).filter(EspecieAmenaza.id_especie == especie_id)
+        }
+        habitats_actuales = {
+            h for (h,) in db.query(EspecieHabitat.id_habitat).filter(EspecieHabitat.id_especie == especie_id)
+        }
+        amenazas_nuevas = _ids_relacion(data.amenazas)
+        habitats_nuevos = _ids_relacion(data.habitats)
 
-        if data.amenazas:
-            for amenaza_id in data.amenazas:
-                if amenaza_id and str(amenaza_id).strip() and str(amenaza_id) != "null":
-                    try:
-                        db.add(EspecieAmenaza(id_especie=especie_id, id_amenaza=int(amenaza_id)))
-                    except (ValueError, TypeError):
-                        continue
+        if not campos_cambiados and amenazas_nuevas == amenazas_actuales and habitats_nuevos == habitats_actuales:
+            if orm_db:
+                orm_db.close()
+            return {"success": True, "message": "Especie actualizada correctamente", "sin_cambios": True}
 
-        if data.habitats:
-            for habitat_id in data.habitats:
-                if habitat_id and str(habitat_id).strip() and str(habitat_id) != "null":
-                    try:
-                        db.add(EspecieHabitat(id_especie=especie_id, id_habitat=int(habitat_id)))
-                    except (ValueError, TypeError):
-                        continue
+        for campo, valor in campos_cambiados.items():
+            setattr(especie, campo, valor)
+        _sincronizar_relacion(db, EspecieAmenaza, EspecieAmenaza.id_amenaza, especie_id,
+                              amenazas_actuales, amenazas_nuevas)
+        _sincronizar_relacion(db, EspecieHabitat, EspecieHabitat.id_habitat, especie_id,
+                              habitats_actuales, habitats_nuevos)
 
+        refrescar_tarjetas(db, [especie_id])
         db.commit()
 
         if colaborador and orm_db:
@@ -564,7 +707,9 @@ async def update_especie(
             finally:
                 orm_db.close()
 
-        publish_event("especie_updated", {"id": especie_id, "nombre_comun": especie.nombre_comun})
+        publish_event("especie_updated", {
+            "id": especie_id, "nombre_comun": especie.nombre_comun, "nombre_cientifico": especie.nombre_cientifico
+        })
 
         return {"success": True, "message": "Especie actualizada correctamente"}
 
@@ -574,29 +719,30 @@ async def update_especie(
         raise safe_500(e, "update_especie")
 
 
-@router.delete("/especies/{especie_id}")
+@router.delete("/especies/{especie_id}", status_code=202)
 async def delete_especie(
     especie_id: int,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_colaborador),
     db: Session = Depends(get_db)
 ):
     try:
-        especie = db.query(Especie).filter(Especie.id == especie_id).first()
+        especie = db.query(Especie).filter(Especie.id == especie_id, especie_visible).first()
         if not especie:
             raise HTTPException(status_code=404, detail="Especie no encontrada")
 
         nombre = especie.nombre_comun
 
-        db.query(Avistamiento).filter(Avistamiento.id_especie == especie_id).delete()
-        db.query(EspecieAmenaza).filter(EspecieAmenaza.id_especie == especie_id).delete()
-        db.query(EspecieHabitat).filter(EspecieHabitat.id_especie == especie_id).delete()
-        db.query(EspecieCaracteristica).filter(EspecieCaracteristica.id_especie == especie_id).delete()
-        db.delete(especie)
+        # Se oculta de inmediato; avistamientos, vínculos y la fila se borran
+        # por lotes en segundo plano con progreso por sway:events.
+        especie.eliminada_en = datetime.utcnow()
+        db.query(TarjetaEspecie).filter(TarjetaEspecie.id_especie == especie_id).delete()
         db.commit()
 
         publish_event("especie_deleted", {"id": especie_id})
+        background_tasks.add_task(eliminar_especie_por_lotes, db.get_bind(), especie_id)
 
-        return {"success": True, "message": f'Especie "{nombre}" eliminada exitosamente'}
+        return {"success": True, "message": f'Especie "{nombre}" eliminada exitosamente', "en_proceso": True}
 
     except HTTPException:
         raise
@@ -605,9 +751,11 @@ async def delete_especie(
 
 
 @router.get("/estados-conservacion")
-async def get_estados_conservacion(db: Session = Depends(get_db)):
+@conditional_get(["catalogo:estados_conservacion"])
+@cached_catalog("estados_conservacion")
+async def get_estados_conservacion(db: AsyncSession = Depends(get_async_db)):
     try:
-        estados = db.query(EstadoConservacion).order_by(EstadoConservacion.nombre).all()
+        estados = (await db.execute(select(EstadoConservacion).order_by(EstadoConservacion.nombre))).scalars().all()
         return {"success": True, "estados": [
             {"id": e.id, "nombre": e.nombre, "descripcion": e.descripcion} for e in estados
         ]}
@@ -616,9 +764,11 @@ async def get_estados_conservacion(db: Session = Depends(get_db)):
 
 
 @router.get("/amenazas")
-async def get_amenazas(db: Session = Depends(get_db)):
+@conditional_get(["catalogo:amenazas"])
+@cached_catalog("amenazas")
+async def get_amenazas(db: AsyncSession = Depends(get_async_db)):
     try:
-        amenazas = db.query(Amenaza).order_by(Amenaza.nombre).all()
+        amenazas = (await db.execute(select(Amenaza).order_by(Amenaza.nombre))).scalars().all()
         return {"success": True, "amenazas": [
             {"id": a.id, "nombre": a.nombre, "descripcion": a.descripcion} for a in amenazas
         ]}
@@ -627,9 +777,11 @@ async def get_amenazas(db: Session = Depends(get_db)):
 
 
 @router.get("/habitats")
-async def get_habitats(db: Session = Depends(get_db)):
+@conditional_get(["catalogo:habitats"])
+@cached_catalog("habitats")
+async def get_habitats(db: AsyncSession = Depends(get_async_db)):
     try:
-        habitats = db.query(Habitat).order_by(Habitat.nombre).all()
+        habitats = (await db.execute(select(Habitat).order_by(Habitat.nombre))).scalars().all()
         return {"success": True, "habitats": [
             {"id": h.id, "nombre": h.nombre, "descripcion": h.descripcion} for h in habitats
         ]}
@@ -1,12 +1,13 @@
-import os
-import uuid
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request, Query, BackgroundTasks
 from fastapi.responses import Response
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.data.database import get_db, build_avistamiento_filters
+from collections import Counter
+from typing import List, Optional
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Float, Integer, case, cast, func
+from sqlalchemy.exc import IntegrityError
+from app.data.database import get_db, get_async_db, build_avistamiento_filters
 from app.data.models import (
     Especie, EstadoConservacion, Avistamiento, Pedido,
     DetallePedido, Usuario
@@ -15,6 +16,21 @@ from app.security.auth import get_current_colaborador
 from app.config import AVISTAMIENTOS_UPLOAD_DIR
 from app.services.realtime_publish import publish_event
 from app.services.errors import safe_500
+from app.services.single_flight import single_flight
+from app.services.campos import necesita, resolver_campos, serializar
+from app.services.eliminacion_especies import especie_visible
+from app.services.estadisticas_especies import estadisticas_especies
+from app.services.geo import filtro_bbox, filtro_radio, parsear_bbox, parsear_punto
+from app.services.teselas import CELDAS_POR_LADO, claves_tesela, latitud_de_fila, limites_tesela, validar_tesela
+from app.services.versiones import conditional_get
+from app.services.cache_respuestas import cached_response
+from app.services.series_avistamientos import calcular_serie, sumar_avistamientos
+from app.services.subidas import guardar_subida
+from app.services.derivados_imagenes import procesar_foto_avistamiento
+from app.services.streaming import filas_async, respuesta_stream, validar_modo_stream
+from app.services.paginacion import (
+    aplicar_keyset, contar_total, decode_cursor, ordenar_keyset, siguiente_cursor, sin_nulos, validar_modo_total
+)
 from datetime import datetime
 
 router = APIRouter(prefix="/api", tags=["estadisticas"])
@@ -25,19 +41,16 @@ FOTO_MAGIC_NUMBERS = {
     b"\x89PNG\r\n\x1a\n": ".png",
 }
 MAX_FOTO_SIZE = 5 * 1024 * 1024  # 5MB
+AVISTAMIENTOS_LIMIT_CURSOR = 100
 
 
 @router.get("/estadisticas")
-async def api_estadisticas(db: Session = Depends(get_db)):
+@single_flight("estadisticas")
+async def api_estadisticas(db: AsyncSession = Depends(get_async_db)):
     try:
-        especies_catalogadas = db.query(func.count(Especie.id)).scalar()
-
-        en_peligro = (
-            db.query(func.count(Especie.id))
-            .join(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
-            .filter(EstadoConservacion.nombre.in_(["En Peligro", "Extinción Crítica"]))
-            .scalar()
-        )
+        stats = await db.run_sync(estadisticas_especies.obtener)
+        especies_catalogadas = stats["total"]
+        en_peligro = stats["por_estado"].get("extincion-critica", 0) + stats["por_estado"].get("peligro", 0)
 
         return {
             "success": True,
@@ -61,19 +74,24 @@ async def api_estadisticas(db: Session = Depends(get_db)):
         }
 
 
+def _totales_pedidos(db: Session):
+    return (
+        db.query(
+            func.coalesce(func.sum(Pedido.total), 0),
+            func.coalesce(func.count(Pedido.id), 0),
+            func.coalesce(func.sum(DetallePedido.cantidad), 0)
+        )
+        .outerjoin(DetallePedido, Pedido.id == DetallePedido.id_pedido)
+        .filter(func.extract("year", Pedido.fecha_pedido) == 2025)
+        .first()
+    )
+
+
 @router.get("/impacto-sostenible")
-async def get_impacto_sostenible(db: Session = Depends(get_db)):
+@single_flight("impacto-sostenible")
+async def get_impacto_sostenible(db: AsyncSession = Depends(get_async_db)):
     try:
-        resultado = (
-            db.query(
-                func.coalesce(func.sum(Pedido.total), 0),
-                func.coalesce(func.count(Pedido.id), 0),
-                func.coalesce(func.sum(DetallePedido.cantidad), 0)
-            )
-            .outerjoin(DetallePedido, Pedido.id == DetallePedido.id_pedido)
-            .filter(func.extract("year", Pedido.fecha_pedido) == 2025)
-            .first()
-        )
+        resultado = await db.run_sync(_totales_pedidos)
 
         total_ventas = float(resultado[0]) if resultado and resultado[0] else 0
         total_pedidos = int(resultado[1]) if resultado and resultado[1] else 0
@@ -94,6 +112,149 @@ async def get_impacto_sostenible(db: Session = Depends(get_db)):
         }}
 
 
+CAMPOS_AVISTAMIENTO = {
+    "id": lambda r: r.Avistamiento.id,
+    "fecha": lambda r: r.Avistamiento.fecha.isoformat() if r.Avistamiento.fecha else None,
+    "latitud": lambda r: float(r.Avistamiento.latitud) if r.Avistamiento.latitud else None,
+    "longitud": lambda r: float(r.Avistamiento.longitud) if r.Avistamiento.longitud else None,
+    "notas": lambda r: r.Avistamiento.notas,
+    "especie_nombre": lambda r: r.Especie.nombre_comun,
+    "especie_cientifica": lambda r: r.Especie.nombre_cientifico,
+    "email_usuario": lambda r: r.Usuario.email,
+    "foto_url": lambda r: r.Avistamiento.foto_url,
+    "foto_variantes": lambda r: r.Avistamiento.foto_variantes,
+}
+GRUPOS_AVISTAMIENTO = {
+    "especie": ("especie_nombre", "especie_cientifica"),
+    "usuario": ("email_usuario",),
+}
+COLUMNAS_AVISTAMIENTO = ("fecha", "latitud", "longitud", "notas", "foto_url", "foto_variantes")
+
+
+def _query_avistamientos(db: Session, fecha_desde=None, fecha_hasta=None, estado=None, habitat=None, especie_id=None,
+                         campos=None, bbox=None, cerca=None, radio_km=None):
+    # Los joins con Especie y Usuario se mantienen siempre (filtran filas);
+    # lo que depende de `campos` es qué columnas viajan desde la base.
+    entidades = [Avistamiento]
+    opciones = [load_only(Avistamiento.id, *[
+        getattr(Avistamiento, c) for c in COLUMNAS_AVISTAMIENTO if necesita(campos, c)
+    ])]
+    if necesita(campos, *GRUPOS_AVISTAMIENTO["especie"]):
+        entidades.append(Especie)
+        opciones.append(load_only(Especie.nombre_comun, Especie.nombre_cientifico))
+    if necesita(campos, *GRUPOS_AVISTAMIENTO["usuario"]):
+        entidades.append(Usuario)
+        opciones.append(load_only(Usuario.email))
+
+    query = (
+        db.query(*entidades)
+        .join(Especie, Avistamiento.id_especie == Especie.id)
+        .join(Usuario, Avistamiento.id_usuario == Usuario.id)
+        .filter(especie_visible)
+        .options(*opciones)
+    )
+    query = build_avistamiento_filters(
+        query, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, especie_id=especie_id
+    )
+    if estado:
+        query = query.join(
+            EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id
+        ).filter(EstadoConservacion.nombre == estado)
+    if habitat:
+        from app.data.models import EspecieHabitat, Habitat
+        query = query.join(
+            EspecieHabitat, Especie.id == EspecieHabitat.id_especie
+        ).join(Habitat, EspecieHabitat.id_habitat == Habitat.id).filter(Habitat.nombre == habitat)
+    if bbox:
+        query = query.filter(filtro_bbox(Avistamiento.geohash, Avistamiento.latitud, Avistamiento.longitud, bbox))
+    if cerca:
+        query = query.filter(filtro_radio(
+            Avistamiento.geohash, Avistamiento.latitud, Avistamiento.longitud, *cerca, radio_km
+        ))
+    return query, len(entidades)
+
+
+def _sentencia_stream_avistamientos(db: Session, **filtros):
+    query, _ = _query_avistamientos(db, **filtros)
+    return query.order_by(Avistamiento.fecha.desc(), Avistamiento.id.desc()).statement
+
+
+def _listar_avistamientos(db: Session, fecha_desde=None, fecha_hasta=None, estado=None, habitat=None, especie_id=None,
+                          limit=None, cursor=None, total="ninguno", campos=None, bbox=None, cerca=None, radio_km=None):
+    query, n = _query_avistamientos(
+        db, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, estado=estado, habitat=habitat,
+        especie_id=especie_id, campos=campos, bbox=bbox, cerca=cerca, radio_km=radio_km,
+    )
+    total_avistamientos = contar_total(db, query, Avistamiento.id, total)
+
+    # Sin limit ni cursor se conserva la respuesta completa que esperan los
+    # clientes actuales; con cursor se pagina por (fecha, id) descendente.
+    columnas = [sin_nulos(Avistamiento.fecha, "'1970-01-01 00:00:00.000000'"), Avistamiento.id]
+    query = ordenar_keyset(query.add_columns(*columnas), columnas, True)
+    if cursor:
+        limit = limit or AVISTAMIENTOS_LIMIT_CURSOR
+        query = aplicar_keyset(query, columnas, True, decode_cursor(cursor, "fecha"))
+    if limit:
+        query = query.limit(limit + 1)
+    resultado = query.all()
+
+    next_cursor = siguiente_cursor("fecha", [tuple(fila[n:]) for fila in resultado], limit) if limit else None
+    filas = resultado[:limit] if limit else resultado
+
+    avistamientos = [serializar(fila, CAMPOS_AVISTAMIENTO, campos) for fila in filas]
+    return avistamientos, total_avistamientos, next_cursor
+
+
+def _agrupar_tesela(db: Session, z: int, x: int, y: int) -> list:
+    """Grupos de avistamientos de la tesela. El binning lo hace la base en una
+    sola consulta (GROUP BY celda y especie); en Python solo se juntan las
+    especies de cada celda."""
+    oeste, sur, este, norte = limites_tesela(z, x, y)
+    n = 2 ** z
+    latitud = cast(Avistamiento.latitud, Float)
+    longitud = cast(Avistamiento.longitud, Float)
+
+    ancho_celda = (este - oeste) / CELDAS_POR_LADO
+    columna = cast(func.floor((longitud - oeste) / ancho_celda), Integer)
+    # El borde este cae en la celda siguiente; se cuenta en la última.
+    celda_x = case((columna >= CELDAS_POR_LADO, CELDAS_POR_LADO - 1), else_=columna)
+    # En Mercator las filas no son lineales en latitud: se comparan contra los
+    # bordes precalculados de cada fila de celdas, de norte a sur.
+    bordes = [latitud_de_fila(y + k / CELDAS_POR_LADO, n) for k in range(1, CELDAS_POR_LADO)]
+    celda_y = case(*[(latitud >= borde, k) for k, borde in enumerate(bordes)], else_=CELDAS_POR_LADO - 1)
+
+    filas = (
+        db.query(
+            celda_x.label("cx"), celda_y.label("cy"), Avistamiento.id_especie,
+            func.count(Avistamiento.id), func.sum(latitud), func.sum(longitud),
+        )
+        .join(Especie, Avistamiento.id_especie == Especie.id)
+        .filter(especie_visible, filtro_bbox(
+            Avistamiento.geohash, Avistamiento.latitud, Avistamiento.longitud, (oeste, sur, este, norte)
+        ))
+        .group_by("cx", "cy", Avistamiento.id_especie)
+        .all()
+    )
+
+    grupos = {}
+    for cx, cy, especie_id, cantidad, suma_lat, suma_lon in filas:
+        grupo = grupos.setdefault((cx, cy), {"celda": [cx, cy], "total": 0, "lat": 0.0, "lon": 0.0, "especies": {}})
+        grupo["total"] += cantidad
+        grupo["lat"] += suma_lat
+        grupo["lon"] += suma_lon
+        grupo["especies"][str(especie_id)] = cantidad
+    return [
+        {
+            "celda": g["celda"],
+            "total": g["total"],
+            "latitud": round(g["lat"] / g["total"], 6),
+            "longitud": round(g["lon"] / g["total"], 6),
+            "especies": g["especies"],
+        }
+        for _, g in sorted(grupos.items())
+    ]
+
+
 @router.get("/avistamientos")
 async def get_avistamientos(
     fecha_desde: Optional[str] = None,
@@ -101,44 +262,49 @@ async def get_avistamientos(
     estado: Optional[str] = None,
     habitat: Optional[str] = None,
     especie_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: str = "ninguno",
+    fields: Optional[str] = Query(None, description="Claves a devolver separadas por coma, p. ej. id,latitud,longitud"),
+    include: Optional[str] = Query(None, description="Grupos de claves: especie, usuario"),
+    stream: Optional[str] = Query(None, description="json o ndjson: envía todas las filas a medida que se leen"),
+    bbox: Optional[str] = Query(None, description="oeste,sur,este,norte en grados"),
+    near: Optional[str] = Query(None, description="latitud,longitud del centro; requiere radius_km"),
+    radius_km: Optional[float] = Query(None, gt=0, le=20000),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        query = (
-            db.query(Avistamiento, Especie, Usuario)
-            .join(Especie, Avistamiento.id_especie == Especie.id)
-            .join(Usuario, Avistamiento.id_usuario == Usuario.id)
-        )
-        query = build_avistamiento_filters(
-            query, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, especie_id=especie_id
+        validar_modo_total(total)
+        validar_modo_stream(stream)
+        campos = resolver_campos(fields, include, CAMPOS_AVISTAMIENTO, GRUPOS_AVISTAMIENTO)
+        if (near is None) != (radius_km is None):
+            raise HTTPException(status_code=400, detail="near y radius_km van juntos")
+        espacial = {
+            "bbox": parsear_bbox(bbox) if bbox else None,
+            "cerca": parsear_punto(near) if near else None,
+            "radio_km": radius_km,
+        }
+        if stream:
+            sentencia = await db.run_sync(
+                _sentencia_stream_avistamientos, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+                estado=estado, habitat=habitat, especie_id=especie_id, campos=campos, **espacial,
+            )
+            return respuesta_stream(
+                filas_async(db.bind, sentencia), lambda fila: serializar(fila, CAMPOS_AVISTAMIENTO, campos),
+                "avistamientos", stream,
+            )
+        avistamientos, total_avistamientos, next_cursor = await db.run_sync(
+            _listar_avistamientos, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+            estado=estado, habitat=habitat, especie_id=especie_id,
+            limit=limit, cursor=cursor, total=total, campos=campos, **espacial,
         )
-        if estado:
-            query = query.join(
-                EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id
-            ).filter(EstadoConservacion.nombre == estado)
-        if habitat:
-            from app.data.models import EspecieHabitat, Habitat
-            query = query.join(
-                EspecieHabitat, Especie.id == EspecieHabitat.id_especie
-            ).join(Habitat, EspecieHabitat.id_habitat == Habitat.id).filter(Habitat.nombre == habitat)
-
-        registros = query.order_by(Avistamiento.fecha.desc()).all()
-
-        avistamientos = []
-        for avistamiento, especie, usuario in registros:
-            avistamientos.append({
-                "id": avistamiento.id,
-                "fecha": avistamiento.fecha.isoformat() if avistamiento.fecha else None,
-                "latitud": float(avistamiento.latitud) if avistamiento.latitud else None,
-                "longitud": float(avistamiento.longitud) if avistamiento.longitud else None,
-                "notas": avistamiento.notas,
-                "especie_nombre": especie.nombre_comun,
-                "especie_cientifica": especie.nombre_cientifico,
-                "email_usuario": usuario.email,
-                "foto_url": avistamiento.foto_url
-            })
-
-        return {"success": True, "avistamientos": avistamientos}
+
+        return {
+            "success": True,
+            "avistamientos": avistamientos,
+            "total": total_avistamientos,
+            "next_cursor": next_cursor,
+        }
 
     except HTTPException:
         raise
@@ -146,6 +312,51 @@ async def get_avistamientos(
         raise safe_500(e, "get_avistamientos")
 
 
+@router.get("/avistamientos/tiles/{z}/{x}/{y}")
+@conditional_get(claves_tesela)
+@cached_response(claves_tesela, ttl=3600)
+async def get_tesela_avistamientos(z: int, x: int, y: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        validar_tesela(z, x, y)
+        grupos = await db.run_sync(_agrupar_tesela, z, x, y)
+        return {
+            "success": True,
+            "tesela": {"z": z, "x": x, "y": y, "limites": limites_tesela(z, x, y), "celdas": CELDAS_POR_LADO},
+            "grupos": grupos,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise safe_500(e, "get_tesela_avistamientos")
+
+
+@router.get("/avistamientos/series")
+@conditional_get(["avistamientos", "especies"])
+async def get_series_avistamientos(
+    granularity: str = Query("day", description="day, week o month"),
+    especie_id: Optional[int] = None,
+    desde: Optional[str] = Query(None, description="AAAA-MM-DD, inclusive"),
+    hasta: Optional[str] = Query(None, description="AAAA-MM-DD, inclusive"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        serie = await db.run_sync(calcular_serie, granularity, especie_id, desde, hasta)
+        return {"success": True, "granularity": granularity, "especie_id": especie_id, "serie": serie}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise safe_500(e, "get_series_avistamientos")
+
+
+def _parsear_fecha_avistamiento(valor: str) -> datetime:
+    # Los clientes JS mandan toISOString() ("...Z"); se guarda en hora local
+    # sin zona, como el resto de las fechas y como datetime.now().
+    fecha = datetime.fromisoformat(valor.replace("T", " "))
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone().replace(tzinfo=None)
+    return fecha
+
+
 class AvistamientoCreate(BaseModel):
     id_especie: int
     fecha_avistamiento: str
@@ -162,46 +373,63 @@ class AvistamientoCreate(BaseModel):
     @classmethod
     def validar_fecha_avistamiento(cls, v):
         try:
-            datetime.fromisoformat(v.replace("T", " "))
+            _parsear_fecha_avistamiento(v)
         except ValueError:
             raise ValueError("fecha_avistamiento debe tener un formato de fecha/hora ISO válido")
         return v
 
 
+def _usuario_nuevo(data: AvistamientoCreate) -> Usuario:
+    if data.nombre and data.apellido_paterno:
+        primer_nombre = data.nombre
+        apellido_paterno = data.apellido_paterno
+        apellido_materno = data.apellido_materno
+    else:
+        partes = data.nombre_usuario.split()
+        primer_nombre = partes[0] if partes else "Usuario"
+        apellido_paterno = partes[1] if len(partes) > 1 else "Sin Apellido"
+        apellido_materno = partes[2] if len(partes) > 2 else None
+
+    return Usuario(
+        nombre=primer_nombre,
+        apellido_paterno=apellido_paterno,
+        apellido_materno=apellido_materno,
+        email=data.email_usuario,
+        activo=True
+    )
+
+
+def _evento_avistamiento(avistamiento: Avistamiento, especie: Especie, email: str) -> dict:
+    return {
+        "id": avistamiento.id,
+        "id_especie": avistamiento.id_especie,
+        "fecha": avistamiento.fecha.isoformat(),
+        "notas": avistamiento.notas,
+        "especie_nombre": especie.nombre_comun,
+        "especie_cientifica": especie.nombre_cientifico,
+        "email_usuario": email,
+        "latitud": float(avistamiento.latitud) if avistamiento.latitud else None,
+        "longitud": float(avistamiento.longitud) if avistamiento.longitud else None,
+        "foto_url": avistamiento.foto_url,
+    }
+
+
 @router.post("/reportar-avistamiento")
 async def reportar_avistamiento(data: AvistamientoCreate, db: Session = Depends(get_db)):
     try:
-        from datetime import datetime as dt
-
-        fecha_obj = dt.fromisoformat(data.fecha_avistamiento.replace("T", " "))
-        if fecha_obj > dt.now():
+        fecha_obj = _parsear_fecha_avistamiento(data.fecha_avistamiento)
+        if fecha_obj > datetime.now():
             raise HTTPException(status_code=400, detail="La fecha del avistamiento no puede ser futura")
 
         user = db.query(Usuario).filter(Usuario.email == data.email_usuario).first()
 
         if not user:
-            if data.nombre and data.apellido_paterno:
-                primer_nombre = data.nombre
-                apellido_paterno = data.apellido_paterno
-                apellido_materno = data.apellido_materno
-            else:
-                partes = data.nombre_usuario.split()
-                primer_nombre = partes[0] if partes else "Usuario"
-                apellido_paterno = partes[1] if len(partes) > 1 else "Sin Apellido"
-                apellido_materno = partes[2] if len(partes) > 2 else None
-
-            user = Usuario(
-                nombre=primer_nombre,
-                apellido_paterno=apellido_paterno,
-                apellido_materno=apellido_materno,
-                email=data.email_usuario,
-                activo=True
-            )
+            user = _usuario_nuevo(data)
             db.add(user)
             db.commit()
             db.refresh(user)
 
-        especie = db.query(Especie).filter(Especie.id == data.id_especie).first()
+        especie = db.query(Especie).filter(Especie.id == data.id_especie, especie_visible).first()
         if not especie:
             raise HTTPException(status_code=400, detail=f"Especie con ID {data.id_especie} no encontrada")
 
@@ -214,21 +442,11 @@ async def reportar_avistamiento(data: AvistamientoCreate, db: Session = Depends(
             id_usuario=user.id
         )
         db.add(nuevo_avistamiento)
+        sumar_avistamientos(db, {(nuevo_avistamiento.id_especie, fecha_obj.date()): 1})
         db.commit()
         db.refresh(nuevo_avistamiento)
 
-        publish_event("avistamiento_created", {
-            "id": nuevo_avistamiento.id,
-            "id_especie": nuevo_avistamiento.id_especie,
-            "fecha": nuevo_avistamiento.fecha.isoformat(),
-            "notas": nuevo_avistamiento.notas,
-            "especie_nombre": especie.nombre_comun,
-            "especie_cientifica": especie.nombre_cientifico,
-            "email_usuario": user.email,
-            "latitud": float(nuevo_avistamiento.latitud) if nuevo_avistamiento.latitud else None,
-            "longitud": float(nuevo_avistamiento.longitud) if nuevo_avistamiento.longitud else None,
-            "foto_url": nuevo_avistamiento.foto_url,
-        })
+        publish_event("avistamiento_created", _evento_avistamiento(nuevo_avistamiento, especie, user.email))
 
         return {"success": True, "message": "Avistamiento reportado exitosamente", "id": nuevo_avistamiento.id}
 
@@ -238,6 +456,120 @@ async def reportar_avistamiento(data: AvistamientoCreate, db: Session = Depends(
         raise safe_500(e, "reportar_avistamiento")
 
 
+MAX_LOTE_AVISTAMIENTOS = 500
+
+
+class AvistamientoLoteItem(AvistamientoCreate):
+    # La genera el cliente (p. ej. un UUID) al guardar el avistamiento sin
+    # conexión; reenviar el lote no duplica lo que ya se registró.
+    clave_idempotencia: str = Field(..., min_length=8, max_length=64)
+
+
+class AvistamientosLote(BaseModel):
+    avistamientos: List[AvistamientoLoteItem] = Field(..., min_length=1, max_length=MAX_LOTE_AVISTAMIENTOS)
+
+
+def _registrar_lote(db: Session, items: list):
+    """Resuelve claves, especies y usuarios con una consulta cada uno e inserta
+    los avistamientos válidos sin hacer commit. Devuelve los resultados en el
+    orden del lote y los payloads de los creados."""
+    claves = {i.clave_idempotencia for i in items}
+    existentes = dict(
+        db.query(Avistamiento.clave_idempotencia, Avistamiento.id)
+        .filter(Avistamiento.clave_idempotencia.in_(claves))
+        .all()
+    )
+    especies = {
+        e.id: e for e in
+        db.query(Especie).filter(Especie.id.in_({i.id_especie for i in items}), especie_visible).all()
+    }
+    usuarios = {u.email: u for u in db.query(Usuario).filter(Usuario.email.in_({i.email_usuario for i in items})).all()}
+
+    ahora = datetime.now()
+    resultados, creados, conteos = [], {}, Counter()
+    for item in items:
+        clave = item.clave_idempotencia
+        if clave in existentes or clave in creados:
+            resultados.append({"clave_idempotencia": clave, "estado": "duplicado"})
+            continue
+        fecha = _parsear_fecha_avistamiento(item.fecha_avistamiento)
+        especie = especies.get(item.id_especie)
+        if fecha > ahora:
+            error = "La fecha del avistamiento no puede ser futura"
+        elif not especie:
+            error = f"Especie con ID {item.id_especie} no encontrada"
+        else:
+            error = None
+        if error:
+            resultados.append({"clave_idempotencia": clave, "estado": "error", "detail": error})
+            continue
+
+        usuario = usuarios.get(item.email_usuario)
+        if not usuario:
+            usuario = usuarios[item.email_usuario] = _usuario_nuevo(item)
+            db.add(usuario)
+        avistamiento = Avistamiento(
+            especie=especie,
+            usuario=usuario,
+            fecha=fecha,
+            latitud=item.latitud,
+            longitud=item.longitud,
+            notas=item.notas or "",
+            clave_idempotencia=clave,
+        )
+        db.add(avistamiento)
+        creados[clave] = (avistamiento, especie, usuario.email)
+        conteos[(especie.id, fecha.date())] += 1
+        resultados.append({"clave_idempotencia": clave, "estado": "creado"})
+
+    db.flush()
+    sumar_avistamientos(db, conteos)
+    for resultado in resultados:
+        clave = resultado["clave_idempotencia"]
+        if resultado["estado"] == "creado":
+            resultado["id"] = creados[clave][0].id
+        elif resultado["estado"] == "duplicado":
+            resultado["id"] = existentes[clave] if clave in existentes else creados[clave][0].id
+    return resultados, [_evento_avistamiento(*creado) for creado in creados.values()]
+
+
+@router.post("/reportar-avistamiento/lote")
+async def reportar_avistamientos_lote(data: AvistamientosLote, db: Session = Depends(get_db)):
+    """Sincronización de la app móvil: muchos avistamientos en una sola
+    transacción. Cada uno trae su clave de idempotencia; los ya registrados
+    vuelven como "duplicado" con su id y los inválidos como "error", sin
+    frenar al resto. Publica un solo evento con todos los creados."""
+    try:
+        for intento in range(2):
+            try:
+                resultados, eventos = _registrar_lote(db, data.avistamientos)
+                db.commit()
+                break
+            except IntegrityError:
+                # Otra petición registró la misma clave (o creó el mismo
+                # usuario) a la vez; al repetir ya aparece como existente.
+                db.rollback()
+                if intento:
+                    raise
+
+        if eventos:
+            publish_event("avistamientos_created", {"avistamientos": eventos})
+
+        estados = Counter(r["estado"] for r in resultados)
+        return {
+            "success": True,
+            "creados": estados["creado"],
+            "duplicados": estados["duplicado"],
+            "errores": estados["error"],
+            "resultados": resultados,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise safe_500(e, "reportar_avistamientos_lote")
+
+
 @router.delete("/avistamientos/{avistamiento_id}")
 async def eliminar_avistamiento(
     avistamiento_id: int,
@@ -249,10 +581,18 @@ async def eliminar_avistamiento(
         if not avistamiento:
             raise HTTPException(status_code=404, detail="Avistamiento no encontrado")
 
+        # Las coordenadas van en el evento para invalidar solo sus teselas.
+        evento = {
+            "id": avistamiento_id,
+            "latitud": float(avistamiento.latitud) if avistamiento.latitud is not None else None,
+            "longitud": float(avistamiento.longitud) if avistamiento.longitud is not None else None,
+        }
+        if avistamiento.fecha is not None:
+            sumar_avistamientos(db, {(avistamiento.id_especie, avistamiento.fecha.date()): -1})
         db.delete(avistamiento)
         db.commit()
 
-        publish_event("avistamiento_deleted", {"id": avistamiento_id})
+        publish_event("avistamiento_deleted", evento)
 
         return {"success": True, "message": "Avistamiento eliminado exitosamente"}
 
@@ -269,6 +609,7 @@ async def eliminar_avistamiento(
 async def subir_foto_avistamiento(
     request: Request,
     avistamiento_id: int,
+    background_tasks: BackgroundTasks,
     foto: UploadFile = File(...),
     current_user: dict = Depends(get_current_colaborador),
     db: Session = Depends(get_db)
@@ -286,21 +627,14 @@ async def subir_foto_avistamiento(
         if content_length and int(content_length) > MAX_FOTO_SIZE:
             raise HTTPException(status_code=413, detail="La imagen supera el límite de 5MB")
 
-        contenido = await foto.read()
-        if len(contenido) > MAX_FOTO_SIZE:
-            raise HTTPException(status_code=413, detail="La imagen supera el límite de 5MB")
-
-        if not any(contenido.startswith(magic) for magic in FOTO_MAGIC_NUMBERS):
-            raise HTTPException(status_code=400, detail="El contenido del archivo no es una imagen JPEG o PNG válida")
-
-        nombre_archivo = f"{uuid.uuid4().hex}{extension}"
-        os.makedirs(AVISTAMIENTOS_UPLOAD_DIR, exist_ok=True)
-        ruta_absoluta = os.path.join(AVISTAMIENTOS_UPLOAD_DIR, nombre_archivo)
-        with open(ruta_absoluta, "wb") as f:
-            f.write(contenido)
+        nombre_archivo = await guardar_subida(
+            foto, AVISTAMIENTOS_UPLOAD_DIR, FOTO_MAGIC_NUMBERS, MAX_FOTO_SIZE, extension
+        )
 
         avistamiento.foto_url = f"/api/uploads/avistamientos/{nombre_archivo}"
+        avistamiento.foto_variantes = None
         db.commit()
+        background_tasks.add_task(procesar_foto_avistamiento, db.get_bind(), avistamiento.id, avistamiento.foto_url)
 
         publish_event("avistamiento_updated", {
             "id": avistamiento.id,
@@ -354,23 +688,10 @@ async def descargar_reporte_especies(
 
         story.append(Spacer(1, 0.3 * inch))
 
-        total_especies = db.query(func.count(Especie.id)).scalar()
-
-        en_peligro = (
-            db.query(func.count(Especie.id))
-            .join(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
-            .filter(EstadoConservacion.nombre.in_(["En Peligro", "Extinción Crítica"]))
-            .scalar()
-        )
-
-        vulnerables = (
-            db.query(func.count(Especie.id))
-            .join(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
-            .filter(EstadoConservacion.nombre == "Vulnerable")
-            .scalar()
-        )
+        stats = estadisticas_especies.obtener(db, estado, habitat)
+        en_peligro = stats["por_estado"].get("extincion-critica", 0) + stats["por_estado"].get("peligro", 0)
 
-        especies_query = db.query(Especie)
+        especies_query = db.query(Especie).filter(especie_visible)
         especies_query = build_especie_filters(especies_query, estado=estado, habitat=habitat)
         if especie_id:
             especies_query = especies_query.filter(Especie.id == especie_id)
@@ -379,9 +700,9 @@ async def descargar_reporte_especies(
         story.append(Paragraph("Resumen General", styles["Heading2"]))
         stat_data = [
             ["Métrica", "Valor"],
-            ["Total Especies Catalogadas", str(total_especies)],
+            ["Total Especies Catalogadas", str(stats["total"])],
             ["En Peligro / Extinción Crítica", str(en_peligro)],
-            ["Vulnerables", str(vulnerables)],
+            ["Vulnerables", str(stats["por_estado"].get("vulnerable", 0))],
         ]
         stat_table = Table(stat_data, colWidths=[3 * inch, 2 * inch])
         stat_table.setStyle(TableStyle([
@@ -1,9 +1,10 @@
 from datetime import datetime, date, time
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Optional
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from app.data.database import get_db
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.data.database import get_db, get_async_db
 from app.data.models import (
     Evento, TipoEvento, Modalidad, Organizador, Usuario,
     Estatus, Direccion, Calle, Colonia, Municipio, Estado, RegistroEvento
@@ -12,107 +13,181 @@ from app.security.auth import get_optional_organizador_user
 from app.models.eventos import EventoCreate
 from app.services.realtime_publish import publish_event
 from app.services.errors import safe_500
+from app.services.campos import necesita, resolver_campos, serializar
+from app.services.cache_catalogos import cached_catalog
+from app.services.versiones import conditional_get
+from app.services.cache_respuestas import cached_response
 
 router = APIRouter(prefix="/api", tags=["eventos"])
 
 
-def _base_eventos_query(db: Session):
-    return (
-        db.query(Evento, TipoEvento, Modalidad, Usuario, Estatus, Calle, Colonia, Municipio, Estado)
-        .outerjoin(TipoEvento, Evento.id_tipo_evento == TipoEvento.id)
-        .outerjoin(Modalidad, Evento.id_modalidad == Modalidad.id)
-        .outerjoin(Organizador, Evento.id_organizador == Organizador.id)
-        .outerjoin(Usuario, Organizador.id_usuario == Usuario.id)
-        .outerjoin(Estatus, Evento.id_estatus == Estatus.id)
-        .outerjoin(Direccion, Evento.id_direccion == Direccion.id)
-        .outerjoin(Calle, Direccion.id_calle == Calle.id)
-        .outerjoin(Colonia, Calle.id_colonia == Colonia.id)
-        .outerjoin(Municipio, Colonia.id_municipio == Municipio.id)
-        .outerjoin(Estado, Municipio.id_estado == Estado.id)
-    )
-
-
-def _serializar_eventos(db: Session, filas):
-    conteos_registro = dict(
-        db.query(RegistroEvento.id_evento, func.count(RegistroEvento.id))
-        .group_by(RegistroEvento.id_evento)
-        .all()
+def _direccion_completa(r):
+    partes_dir = []
+    if r.Calle:
+        partes_dir.append(r.Calle.nombre)
+        if r.Calle.n_exterior:
+            partes_dir.append(str(r.Calle.n_exterior))
+    if r.Colonia:
+        partes_dir.append(r.Colonia.nombre)
+    if r.Municipio:
+        partes_dir.append(r.Municipio.nombre)
+    if r.Estado:
+        partes_dir.append(r.Estado.nombre)
+    return ", ".join(p for p in partes_dir if p)
+
+
+def _nombre_organizador(r):
+    if not r.Usuario:
+        return None
+    partes_nombre = [r.Usuario.nombre, r.Usuario.apellido_paterno, r.Usuario.apellido_materno]
+    return " ".join(p for p in partes_nombre if p)
+
+
+def _costo(r):
+    return float(r.Evento.costo) if r.Evento.costo else 0.0
+
+
+CAMPOS_EVENTO = {
+    "id": lambda r: r.Evento.id,
+    "title": lambda r: r.Evento.titulo,
+    "titulo": lambda r: r.Evento.titulo,
+    "descripcion": lambda r: r.Evento.descripcion,
+    "start": lambda r: r.Evento.fecha_evento.isoformat() if r.Evento.fecha_evento else None,
+    "fecha_evento": lambda r: r.Evento.fecha_evento.isoformat() if r.Evento.fecha_evento else None,
+    "hora_inicio": lambda r: str(r.Evento.hora_inicio) if r.Evento.hora_inicio else None,
+    "hora_fin": lambda r: str(r.Evento.hora_fin) if r.Evento.hora_fin else None,
+    "url_evento": lambda r: r.Evento.url_evento,
+    "capacidad_maxima": lambda r: r.Evento.capacidad_maxima,
+    "costo": _costo,
+    "tipo_evento": lambda r: r.TipoEvento.nombre if r.TipoEvento else None,
+    "modalidad": lambda r: r.Modalidad.nombre if r.Modalidad else None,
+    "organizador": _nombre_organizador,
+    "estatus": lambda r: r.Estatus.nombre if r.Estatus else None,
+    "direccion": _direccion_completa,
+    "es_gratuito": lambda r: _costo(r) == 0.0,
+    "registrados": lambda r: r.registrados,
+}
+COLUMNAS_EVENTO = {
+    "title": "titulo", "titulo": "titulo", "descripcion": "descripcion", "start": "fecha_evento",
+    "fecha_evento": "fecha_evento", "hora_inicio": "hora_inicio", "hora_fin": "hora_fin",
+    "url_evento": "url_evento", "capacidad_maxima": "capacidad_maxima", "costo": "costo", "es_gratuito": "costo",
+}
+GRUPOS_EVENTO = {
+    "direccion": ("direccion",),
+    "organizador": ("organizador",),
+    "registrados": ("registrados",),
+}
+
+
+def _base_eventos_query(db: Session, campos=None, filtra_tipo=False, filtra_modalidad=False, filtra_organizador=False):
+    # Todos los joins son muchos-a-uno y externos: los que la respuesta o los
+    # filtros no necesitan se omiten sin cambiar las filas.
+    entidades = [Evento, Estatus]
+    con_tipo = filtra_tipo or necesita(campos, "tipo_evento")
+    con_modalidad = filtra_modalidad or necesita(campos, "modalidad")
+    con_organizador = necesita(campos, "organizador")
+    con_direccion = necesita(campos, "direccion")
+    if con_tipo:
+        entidades.append(TipoEvento)
+    if con_modalidad:
+        entidades.append(Modalidad)
+    if con_organizador:
+        entidades.append(Usuario)
+    if con_direccion:
+        entidades += [Calle, Colonia, Municipio, Estado]
+
+    q = db.query(*entidades).outerjoin(Estatus, Evento.id_estatus == Estatus.id)
+    if campos is not None:
+        columnas = {c for k, c in COLUMNAS_EVENTO.items() if k in campos}
+        q = q.options(load_only(Evento.id, *[getattr(Evento, c) for c in sorted(columnas)]))
+    if con_tipo:
+        q = q.outerjoin(TipoEvento, Evento.id_tipo_evento == TipoEvento.id)
+    if con_modalidad:
+        q = q.outerjoin(Modalidad, Evento.id_modalidad == Modalidad.id)
+    if con_organizador or filtra_organizador:
+        q = q.outerjoin(Organizador, Evento.id_organizador == Organizador.id)
+    if con_organizador:
+        q = q.outerjoin(Usuario, Organizador.id_usuario == Usuario.id)
+    if con_direccion:
+        q = (
+            q.outerjoin(Direccion, Evento.id_direccion == Direccion.id)
+            .outerjoin(Calle, Direccion.id_calle == Calle.id)
+            .outerjoin(Colonia, Calle.id_colonia == Colonia.id)
+            .outerjoin(Municipio, Colonia.id_municipio == Municipio.id)
+            .outerjoin(Estado, Municipio.id_estado == Estado.id)
+        )
+    if necesita(campos, "registrados"):
+        registrados = (
+            db.query(RegistroEvento.id_evento, func.count(RegistroEvento.id).label("registrados"))
+            .group_by(RegistroEvento.id_evento)
+            .subquery()
+        )
+        q = q.add_columns(func.coalesce(registrados.c.registrados, 0).label("registrados"))
+        q = q.outerjoin(registrados, registrados.c.id_evento == Evento.id)
+    return q
+
+
+def _serializar_eventos(filas, campos=None):
+    return [serializar(fila, CAMPOS_EVENTO, campos) for fila in filas]
+
+
+def _listar_eventos(db: Session, tipo="", modalidad="", fecha_inicio="", fecha_fin="", id_usuario_organizador=None,
+                    campos=None):
+    q = _base_eventos_query(
+        db, campos, filtra_tipo=bool(tipo), filtra_modalidad=bool(modalidad),
+        filtra_organizador=id_usuario_organizador is not None,
+    ).filter(Estatus.nombre == "Activo")
+
+    if tipo:
+        q = q.filter(TipoEvento.nombre == tipo)
+    if modalidad:
+        q = q.filter(Modalidad.nombre == modalidad)
+    if fecha_inicio:
+        q = q.filter(Evento.fecha_evento >= fecha_inicio)
+    if fecha_fin:
+        q = q.filter(Evento.fecha_evento <= fecha_fin)
+    if id_usuario_organizador is not None:
+        q = q.filter(Organizador.id_usuario == id_usuario_organizador)
+
+    q = q.order_by(Evento.fecha_evento.asc(), Evento.hora_inicio.asc())
+    return _serializar_eventos(q.all(), campos)
+
+
+def _listar_registros_usuario(db: Session, user_id: int):
+    q = (
+        _base_eventos_query(db)
+        .join(RegistroEvento, RegistroEvento.id_evento == Evento.id)
+        .filter(RegistroEvento.id_usuario == user_id)
+        .order_by(Evento.fecha_evento.asc(), Evento.hora_inicio.asc())
     )
-
-    eventos = []
-    for evento, tipo_ev, modal, usr, est, calle, colonia, municipio, estado_geo in filas:
-        partes_dir = []
-        if calle:
-            partes_dir.append(calle.nombre)
-            if calle.n_exterior:
-                partes_dir.append(str(calle.n_exterior))
-        if colonia:
-            partes_dir.append(colonia.nombre)
-        if municipio:
-            partes_dir.append(municipio.nombre)
-        if estado_geo:
-            partes_dir.append(estado_geo.nombre)
-        direccion_completa = ", ".join(p for p in partes_dir if p)
-
-        nombre_organizador = None
-        if usr:
-            partes_nombre = [usr.nombre, usr.apellido_paterno, usr.apellido_materno]
-            nombre_organizador = " ".join(p for p in partes_nombre if p)
-
-        costo = float(evento.costo) if evento.costo else 0.0
-
-        eventos.append({
-            "id": evento.id,
-            "title": evento.titulo,
-            "titulo": evento.titulo,
-            "descripcion": evento.descripcion,
-            "start": evento.fecha_evento.isoformat() if evento.fecha_evento else None,
-            "fecha_evento": evento.fecha_evento.isoformat() if evento.fecha_evento else None,
-            "hora_inicio": str(evento.hora_inicio) if evento.hora_inicio else None,
-            "hora_fin": str(evento.hora_fin) if evento.hora_fin else None,
-            "url_evento": evento.url_evento,
-            "capacidad_maxima": evento.capacidad_maxima,
-            "costo": costo,
-            "tipo_evento": tipo_ev.nombre if tipo_ev else None,
-            "modalidad": modal.nombre if modal else None,
-            "organizador": nombre_organizador,
-            "estatus": est.nombre if est else None,
-            "direccion": direccion_completa,
-            "es_gratuito": costo == 0.0,
-            "registrados": conteos_registro.get(evento.id, 0),
-        })
-    return eventos
+    return _serializar_eventos(q.all())
 
 
 @router.get("/eventos")
+@conditional_get(["eventos"])
+@cached_response(["eventos"])
 async def get_eventos(
     tipo: str = Query(""),
     modalidad: str = Query(""),
     fecha_inicio: str = Query(""),
     fecha_fin: str = Query(""),
     mine: bool = Query(False),
+    fields: Optional[str] = Query(None, description="Claves a devolver separadas por coma, p. ej. id,titulo,start"),
+    include: Optional[str] = Query(None, description="Grupos de claves: direccion, organizador, registrados"),
     current_user: Optional[dict] = Depends(get_optional_organizador_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         if mine and not current_user:
             raise HTTPException(status_code=401, detail="Se requiere autenticación para filtrar tus eventos")
-        q = _base_eventos_query(db).filter(Estatus.nombre == "Activo")
-
-        if tipo:
-            q = q.filter(TipoEvento.nombre == tipo)
-        if modalidad:
-            q = q.filter(Modalidad.nombre == modalidad)
-        if fecha_inicio:
-            q = q.filter(Evento.fecha_evento >= fecha_inicio)
-        if fecha_fin:
-            q = q.filter(Evento.fecha_evento <= fecha_fin)
-        if mine:
-            q = q.filter(Organizador.id_usuario == int(current_user["sub"]))
-
-        q = q.order_by(Evento.fecha_evento.asc(), Evento.hora_inicio.asc())
-        filas = q.all()
-        eventos = _serializar_eventos(db, filas)
+
+        campos = resolver_campos(fields, include, CAMPOS_EVENTO, GRUPOS_EVENTO)
+        eventos = await db.run_sync(
+            _listar_eventos, tipo=tipo, modalidad=modalidad,
+            fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
+            id_usuario_organizador=int(current_user["sub"]) if mine else None,
+            campos=campos,
+        )
 
         return {"success": True, "eventos": eventos}
 
@@ -292,6 +367,7 @@ async def registrar_asistencia(
         )
         db.add(nuevo_registro)
         db.commit()
+        publish_event("evento_updated", {"id": evento_id})
 
         return {"success": True, "message": "Asistencia confirmada"}
 
@@ -322,6 +398,7 @@ async def cancelar_asistencia(
 
         db.delete(registro)
         db.commit()
+        publish_event("evento_updated", {"id": evento_id})
 
         return {"success": True, "message": "Asistencia cancelada"}
 
@@ -334,21 +411,14 @@ async def cancelar_asistencia(
 @router.get("/eventos/mis-registros")
 async def get_mis_registros(
     current_user: Optional[dict] = Depends(get_optional_organizador_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         if not current_user:
             raise HTTPException(status_code=401, detail="Se requiere autenticación")
         user_id = int(current_user["sub"])
 
-        q = (
-            _base_eventos_query(db)
-            .join(RegistroEvento, RegistroEvento.id_evento == Evento.id)
-            .filter(RegistroEvento.id_usuario == user_id)
-            .order_by(Evento.fecha_evento.asc(), Evento.hora_inicio.asc())
-        )
-        filas = q.all()
-        eventos = _serializar_eventos(db, filas)
+        eventos = await db.run_sync(_listar_registros_usuario, user_id)
 
         return {"success": True, "eventos": eventos}
 
@@ -359,9 +429,11 @@ async def get_mis_registros(
 
 
 @router.get("/tipos-evento")
-async def get_tipos_evento(db: Session = Depends(get_db)):
+@conditional_get(["catalogo:tipos_evento"])
+@cached_catalog("tipos_evento")
+async def get_tipos_evento(db: AsyncSession = Depends(get_async_db)):
     try:
-        tipos = db.query(TipoEvento).order_by(TipoEvento.nombre).all()
+        tipos = (await db.execute(select(TipoEvento).order_by(TipoEvento.nombre))).scalars().all()
         return {"success": True, "tipos": [
             {"id": t.id, "nombre": t.nombre, "descripcion": t.descripcion} for t in tipos
         ]}
@@ -370,9 +442,11 @@ async def get_tipos_evento(db: Session = Depends(get_db)):
 
 
 @router.get("/modalidades")
-async def get_modalidades(db: Session = Depends(get_db)):
+@conditional_get(["catalogo:modalidades"])
+@cached_catalog("modalidades")
+async def get_modalidades(db: AsyncSession = Depends(get_async_db)):
     try:
-        modalidades = db.query(Modalidad).order_by(Modalidad.nombre).all()
+        modalidades = (await db.execute(select(Modalidad).order_by(Modalidad.nombre))).scalars().all()
         return {"success": True, "modalidades": [
             {"id": m.id, "nombre": m.nombre} for m in modalidades
         ]}
@@ -8,6 +8,9 @@ from app.data.models import (
 from app.security.auth import get_current_tienda_user, get_current_colaborador
 from app.models.pedidos import PedidoCreate, CarritoAgregar
 from app.services.errors import safe_500
+from app.services.cache_catalogos import cached_catalog
+from app.services.realtime_publish import publish_event
+from app.services.versiones import conditional_get
 
 router = APIRouter(prefix="/api", tags=["pedidos"])
 
@@ -143,15 +146,19 @@ async def crear_pedido(
                 id_estatus=3
             ))
 
+        productos_actualizados = []
         for item in data.productos:
             item_id = item.get("id") if isinstance(item, dict) else getattr(item, "id", None)
             item_qty = int(item.get("quantity", item.get("cantidad", 1)) if isinstance(item, dict) else getattr(item, "quantity", 1))
             producto = db.query(Producto).filter(Producto.id == item_id).first()
             if producto:
                 producto.stock = producto.stock - item_qty
+                productos_actualizados.append(producto.id)
 
         nuevo_pedido.id_estatus = 3
         db.commit()
+        if productos_actualizados:
+            publish_event("productos_updated", {"ids": productos_actualizados})
 
         return {"success": True, "pedido_id": nuevo_pedido.id, "total": total, "message": "Pedido creado exitosamente"}
 
@@ -363,6 +370,8 @@ async def agregar_al_carrito(data: CarritoAgregar, db: Session = Depends(get_db)
 
 
 @router.get("/tipos-tarjeta")
+@conditional_get(["catalogo:tipos_tarjeta"])
+@cached_catalog("tipos_tarjeta")
 async def get_tipos_tarjeta(db: Session = Depends(get_db)):
     try:
         from app.data.models import TipoTarjeta
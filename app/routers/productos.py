@@ -1,100 +1,167 @@
+from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.data.database import get_db, construir_nombre_completo
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from app.data.database import get_async_db, construir_nombre_completo
 from app.data.models import Producto, CategoriaProducto, Material, ResenaProducto, Usuario
 from app.services.errors import safe_500
+from app.services.campos import necesita, resolver_campos, serializar
+from app.services.cache_catalogos import cached_catalog
+from app.services.versiones import conditional_get
+from app.services.cache_respuestas import cached_response
+from app.services.paginacion import (
+    aplicar_keyset, contar_total, decode_cursor, ordenar_keyset, siguiente_cursor, sin_nulos, validar_modo_total
+)
 
 router = APIRouter(prefix="/api", tags=["productos"])
 
 
+ORDENES_PRODUCTOS = ("precio_asc", "precio_desc", "nombre", "popularidad", "fecha_agregado")
+
+
+def _claves_orden_productos(ordenar, resenas_sq):
+    if ordenar == "precio_asc":
+        return [sin_nulos(Producto.precio, "0"), Producto.id], False
+    if ordenar == "precio_desc":
+        return [sin_nulos(Producto.precio, "0"), Producto.id], True
+    if ordenar == "nombre":
+        return [sin_nulos(Producto.nombre, "''"), Producto.id], False
+    if ordenar == "popularidad":
+        return [func.coalesce(resenas_sq.c.total_resenas, 0), Producto.id], True
+    return [func.coalesce(Producto.fecha_agregado, datetime(1970, 1, 1)), Producto.id], True
+
+
+CAMPOS_PRODUCTO = {
+    "id": lambda r: r.Producto.id,
+    "name": lambda r: r.Producto.nombre,
+    "description": lambda r: r.Producto.descripcion,
+    "price": lambda r: float(r.Producto.precio) if r.Producto.precio is not None else None,
+    "stock": lambda r: r.Producto.stock,
+    "image_url": lambda r: r.Producto.imagen_url,
+    "dimensions": lambda r: r.Producto.dimensiones,
+    "weight_grams": lambda r: r.Producto.peso_gramos,
+    "is_sustainable": lambda r: bool(r.Producto.es_sostenible),
+    "date_added": lambda r: r.Producto.fecha_agregado.isoformat() if r.Producto.fecha_agregado else None,
+    "category": lambda r: r.CategoriaProducto.nombre if r.CategoriaProducto else None,
+    "material": lambda r: r.Material.nombre if r.Material else None,
+    "average_rating": lambda r: round(float(r.calificacion_promedio) if r.calificacion_promedio is not None else 0.0, 1),
+    "total_reviews": lambda r: r.total_resenas if r.total_resenas else 0,
+}
+GRUPOS_PRODUCTO = {
+    "categoria": ("category",),
+    "material": ("material",),
+    "resenas": ("average_rating", "total_reviews"),
+}
+COLUMNAS_PRODUCTO = {
+    "name": "nombre", "description": "descripcion", "price": "precio", "stock": "stock",
+    "image_url": "imagen_url", "dimensions": "dimensiones", "weight_grams": "peso_gramos",
+    "is_sustainable": "es_sostenible", "date_added": "fecha_agregado",
+}
+
+
+def _listar_productos(db: Session, categoria_id=None, busqueda="", pagina=1, limite=6, ordenar="fecha_agregado",
+                      cursor=None, total="exacto", campos=None):
+    if ordenar not in ORDENES_PRODUCTOS:
+        ordenar = "fecha_agregado"
+
+    # Subquery: avg rating and review count per product
+    resenas_sq = (
+        db.query(
+            ResenaProducto.id_producto.label("id_producto"),
+            func.avg(ResenaProducto.calificacion).label("calificacion_promedio"),
+            func.count(ResenaProducto.id).label("total_resenas"),
+        )
+        .group_by(ResenaProducto.id_producto)
+        .subquery()
+    )
+
+    # Los outer joins son muchos-a-uno: quitarlos no cambia las filas, así que
+    # solo se hacen si la respuesta (o el orden) los necesita.
+    entidades = [Producto]
+    con_categoria = necesita(campos, "category")
+    con_material = necesita(campos, "material")
+    if con_categoria:
+        entidades.append(CategoriaProducto)
+    if con_material:
+        entidades.append(Material)
+    con_resenas = necesita(campos, *GRUPOS_PRODUCTO["resenas"]) or ordenar == "popularidad"
+    if con_resenas:
+        entidades += [resenas_sq.c.calificacion_promedio, resenas_sq.c.total_resenas]
+
+    q = db.query(*entidades)
+    if campos is not None:
+        q = q.options(load_only(Producto.id, *[
+            getattr(Producto, c) for k, c in COLUMNAS_PRODUCTO.items() if k in campos
+        ]))
+    if con_categoria:
+        q = q.outerjoin(CategoriaProducto, Producto.id_categoria == CategoriaProducto.id)
+    if con_material:
+        q = q.outerjoin(Material, Producto.id_material == Material.id)
+    if con_resenas:
+        q = q.outerjoin(resenas_sq, Producto.id == resenas_sq.c.id_producto)
+    q = q.filter(Producto.activo == True)
+
+    if categoria_id:
+        q = q.filter(Producto.id_categoria == categoria_id)
+    if busqueda:
+        like = f"%{busqueda}%"
+        q = q.filter(
+            (Producto.nombre.ilike(like)) | (Producto.descripcion.ilike(like))
+        )
+
+    total_productos = contar_total(db, q, Producto.id, total)
+
+    columnas, descendente = _claves_orden_productos(ordenar, resenas_sq)
+    q = ordenar_keyset(q.add_columns(*columnas), columnas, descendente)
+    if cursor:
+        q = aplicar_keyset(q, columnas, descendente, decode_cursor(cursor, ordenar))
+    else:
+        q = q.offset((pagina - 1) * limite)
+    resultado = q.limit(limite + 1).all()
+
+    n = len(entidades)
+    next_cursor = siguiente_cursor(ordenar, [tuple(fila[n:]) for fila in resultado], limite)
+    productos = [serializar(fila, CAMPOS_PRODUCTO, campos) for fila in resultado[:limite]]
+
+    return productos, total_productos, next_cursor
+
+
+def _claves_producto(producto_id, **_):
+    return [f"producto:{producto_id}", "catalogo:categorias", "catalogo:materiales"]
+
+
 @router.get("/productos")
+@cached_response(["productos", "catalogo:categorias", "catalogo:materiales"])
 async def get_productos(
     categoria_id: Optional[int] = Query(None),
     busqueda: str = Query(""),
     pagina: int = Query(1),
     limite: int = Query(6),
     ordenar: str = Query("fecha_agregado"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    total: str = Query("exacto"),
+    fields: Optional[str] = Query(None, description="Claves a devolver separadas por coma, p. ej. id,name,price"),
+    include: Optional[str] = Query(None, description="Grupos de claves: categoria, material, resenas"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        # Subquery: avg rating and review count per product
-        resenas_sq = (
-            db.query(
-                ResenaProducto.id_producto.label("id_producto"),
-                func.avg(ResenaProducto.calificacion).label("calificacion_promedio"),
-                func.count(ResenaProducto.id).label("total_resenas"),
-            )
-            .group_by(ResenaProducto.id_producto)
-            .subquery()
+        validar_modo_total(total)
+        campos = resolver_campos(fields, include, CAMPOS_PRODUCTO, GRUPOS_PRODUCTO)
+        productos, total_productos, next_cursor = await db.run_sync(
+            _listar_productos, categoria_id=categoria_id, busqueda=busqueda,
+            pagina=pagina, limite=limite, ordenar=ordenar, cursor=cursor, total=total, campos=campos,
         )
 
-        q = (
-            db.query(
-                Producto,
-                CategoriaProducto,
-                Material,
-                resenas_sq.c.calificacion_promedio,
-                resenas_sq.c.total_resenas,
-            )
-            .outerjoin(CategoriaProducto, Producto.id_categoria == CategoriaProducto.id)
-            .outerjoin(Material, Producto.id_material == Material.id)
-            .outerjoin(resenas_sq, Producto.id == resenas_sq.c.id_producto)
-            .filter(Producto.activo == True)
-        )
-
-        if categoria_id:
-            q = q.filter(Producto.id_categoria == categoria_id)
-        if busqueda:
-            like = f"%{busqueda}%"
-            q = q.filter(
-                (Producto.nombre.ilike(like)) | (Producto.descripcion.ilike(like))
-            )
-
-        if ordenar == "precio_asc":
-            q = q.order_by(Producto.precio.asc())
-        elif ordenar == "precio_desc":
-            q = q.order_by(Producto.precio.desc())
-        elif ordenar == "nombre":
-            q = q.order_by(Producto.nombre.asc())
-        elif ordenar == "popularidad":
-            q = q.order_by(func.coalesce(resenas_sq.c.total_resenas, 0).desc())
-        else:
-            q = q.order_by(Producto.fecha_agregado.desc())
-
-        total_productos = q.count()
-        offset = (pagina - 1) * limite
-        rows = q.offset(offset).limit(limite).all()
-
-        productos = []
-        for p, cat, mat, calificacion_promedio, total_resenas in rows:
-            avg_rating = float(calificacion_promedio) if calificacion_promedio is not None else 0.0
-            total_rev = total_resenas if total_resenas else 0
-            productos.append({
-                "id": p.id,
-                "name": p.nombre,
-                "description": p.descripcion,
-                "price": float(p.precio),
-                "stock": p.stock,
-                "image_url": p.imagen_url,
-                "dimensions": p.dimensiones,
-                "weight_grams": p.peso_gramos,
-                "is_sustainable": bool(p.es_sostenible),
-                "date_added": p.fecha_agregado.isoformat() if p.fecha_agregado else None,
-                "category": cat.nombre if cat else None,
-                "material": mat.nombre if mat else None,
-                "average_rating": round(avg_rating, 1),
-                "total_reviews": total_rev,
-            })
-
         return {
             "success": True,
             "products": productos,
             "total": total_productos,
             "pagina": pagina,
             "limite": limite,
-            "total_paginas": (total_productos + limite - 1) // limite,
+            "total_paginas": (total_productos + limite - 1) // limite if total_productos is not None else None,
+            "next_cursor": next_cursor,
         }
 
     except HTTPException:
@@ -105,49 +172,53 @@ async def get_productos(
         raise HTTPException(status_code=500, detail="Ocurrió un error al procesar la solicitud.")
 
 
-@router.get("/producto/{producto_id}")
-async def get_producto_detalle(producto_id: int, db: Session = Depends(get_db)):
-    try:
-        row = (
-            db.query(Producto, CategoriaProducto, Material)
-            .outerjoin(CategoriaProducto, Producto.id_categoria == CategoriaProducto.id)
-            .outerjoin(Material, Producto.id_material == Material.id)
-            .filter(Producto.id == producto_id, Producto.activo == True)
-            .first()
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="Producto no encontrado")
-
-        p, cat, mat = row
-
-        stats = (
-            db.query(
-                func.coalesce(func.avg(ResenaProducto.calificacion), 0).label("avg"),
-                func.count(ResenaProducto.id).label("total"),
-            )
-            .filter(ResenaProducto.id_producto == producto_id)
-            .one()
+def _obtener_producto(db: Session, producto_id: int):
+    row = (
+        db.query(Producto, CategoriaProducto, Material)
+        .outerjoin(CategoriaProducto, Producto.id_categoria == CategoriaProducto.id)
+        .outerjoin(Material, Producto.id_material == Material.id)
+        .filter(Producto.id == producto_id, Producto.activo == True)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+    p, cat, mat = row
+
+    stats = (
+        db.query(
+            func.coalesce(func.avg(ResenaProducto.calificacion), 0).label("avg"),
+            func.count(ResenaProducto.id).label("total"),
         )
+        .filter(ResenaProducto.id_producto == producto_id)
+        .one()
+    )
 
-        return {
-            "success": True,
-            "producto": {
-                "id": p.id,
-                "nombre": p.nombre,
-                "descripcion": p.descripcion,
-                "precio": float(p.precio),
-                "stock": p.stock,
-                "imagen_url": p.imagen_url,
-                "dimensiones": p.dimensiones,
-                "peso_gramos": p.peso_gramos,
-                "es_sostenible": bool(p.es_sostenible),
-                "fecha_agregado": p.fecha_agregado.isoformat() if p.fecha_agregado else None,
-                "categoria_nombre": cat.nombre if cat else None,
-                "material_nombre": mat.nombre if mat else None,
-                "calificacion_promedio": round(float(stats.avg), 1),
-                "total_reseñas": stats.total,
-            },
-        }
+    return {
+        "id": p.id,
+        "nombre": p.nombre,
+        "descripcion": p.descripcion,
+        "precio": float(p.precio),
+        "stock": p.stock,
+        "imagen_url": p.imagen_url,
+        "dimensiones": p.dimensiones,
+        "peso_gramos": p.peso_gramos,
+        "es_sostenible": bool(p.es_sostenible),
+        "fecha_agregado": p.fecha_agregado.isoformat() if p.fecha_agregado else None,
+        "categoria_nombre": cat.nombre if cat else None,
+        "material_nombre": mat.nombre if mat else None,
+        "calificacion_promedio": round(float(stats.avg), 1),
+        "total_reseñas": stats.total,
+    }
+
+
+@router.get("/producto/{producto_id}")
+@conditional_get(_claves_producto)
+@cached_response(_claves_producto)
+async def get_producto_detalle(producto_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        producto = await db.run_sync(_obtener_producto, producto_id)
+        return {"success": True, "producto": producto}
 
     except HTTPException:
         raise
@@ -155,27 +226,31 @@ async def get_producto_detalle(producto_id: int, db: Session = Depends(get_db)):
         raise safe_500(e, "get_producto_detalle")
 
 
-@router.get("/reseñas/{producto_id}")
-async def get_resenas_producto(producto_id: int, db: Session = Depends(get_db)):
-    try:
-        rows = (
-            db.query(ResenaProducto, Usuario)
-            .join(Usuario, ResenaProducto.id_usuario == Usuario.id)
-            .filter(ResenaProducto.id_producto == producto_id)
-            .order_by(ResenaProducto.fecha_resena.desc())
-            .all()
-        )
+def _listar_resenas(db: Session, producto_id: int):
+    rows = (
+        db.query(ResenaProducto, Usuario)
+        .join(Usuario, ResenaProducto.id_usuario == Usuario.id)
+        .filter(ResenaProducto.id_producto == producto_id)
+        .order_by(ResenaProducto.fecha_resena.desc())
+        .all()
+    )
+
+    resenas = []
+    for r, u in rows:
+        resenas.append({
+            "id": r.id,
+            "calificacion": r.calificacion,
+            "comentario": r.comentario,
+            "fecha_reseña": r.fecha_resena.isoformat() if r.fecha_resena else None,
+            "usuario_nombre": construir_nombre_completo(u.nombre, u.apellido_paterno, u.apellido_materno),
+        })
+    return resenas
 
-        resenas = []
-        for r, u in rows:
-            resenas.append({
-                "id": r.id,
-                "calificacion": r.calificacion,
-                "comentario": r.comentario,
-                "fecha_reseña": r.fecha_resena.isoformat() if r.fecha_resena else None,
-                "usuario_nombre": construir_nombre_completo(u.nombre, u.apellido_paterno, u.apellido_materno),
-            })
 
+@router.get("/reseñas/{producto_id}")
+async def get_resenas_producto(producto_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        resenas = await db.run_sync(_listar_resenas, producto_id)
         return {"reseñas": resenas}
 
     except HTTPException:
@@ -185,9 +260,11 @@ async def get_resenas_producto(producto_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/materiales")
-async def get_materiales(db: Session = Depends(get_db)):
+@conditional_get(["catalogo:materiales"])
+@cached_catalog("materiales")
+async def get_materiales(db: AsyncSession = Depends(get_async_db)):
     try:
-        materiales = db.query(Material).order_by(Material.nombre).all()
+        materiales = (await db.execute(select(Material).order_by(Material.nombre))).scalars().all()
         return {"materiales": [{"id": m.id, "nombre": m.nombre} for m in materiales]}
     except HTTPException:
         raise
@@ -196,9 +273,11 @@ async def get_materiales(db: Session = Depends(get_db)):
 
 
 @router.get("/categorias")
-async def get_categories(db: Session = Depends(get_db)):
+@conditional_get(["catalogo:categorias"])
+@cached_catalog("categorias")
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
     try:
-        cats = db.query(CategoriaProducto).order_by(CategoriaProducto.nombre).all()
+        cats = (await db.execute(select(CategoriaProducto).order_by(CategoriaProducto.nombre))).scalars().all()
         return {
             "success": True,
             "categories": [{"id": c.id, "name": c.nombre, "description": c.descripcion or ""} for c in cats],
@@ -0,0 +1,58 @@
+import os
+import re
+import stat
+from mimetypes import guess_type
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+
+from app.config import UPLOAD_DIR, UPLOADS_X_ACCEL_PREFIX
+from app.security.rate_limit import limiter
+from app.services.subidas import PREFIJO_UPLOADS, ruta_de_url
+from app.services.versiones import coincide_etag
+
+router = APIRouter(prefix="/api/uploads", tags=["uploads"])
+
+# Los archivos subidos nunca se reescriben: el nombre es el SHA-256 del
+# contenido (las variantes derivan de ese nombre), así que una URL vale para siempre.
+CACHE_CONTROL_UPLOADS = "public, max-age=31536000, immutable"
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+def _etag(archivo: str, info: os.stat_result) -> str:
+    raiz, _ = os.path.splitext(os.path.basename(archivo))
+    if _SHA256.fullmatch(raiz):
+        return f'"{raiz}"'
+    # Variantes y fotos anteriores a los nombres por contenido.
+    return f'"{info.st_size:x}-{info.st_mtime_ns:x}"'
+
+
+@router.api_route("/{ruta:path}", methods=["GET", "HEAD"])
+@limiter.exempt
+async def servir_upload(ruta: str, request: Request):
+    """Fotos subidas, con ETag fuerte, caché inmutable y soporte de Range
+    (FileResponse usa sendfile cuando el servidor lo ofrece). Con
+    UPLOADS_X_ACCEL_PREFIX solo se validan y se delega el envío a nginx, que
+    responde con su propio ETag (mtime y tamaño) en vez del SHA-256."""
+    archivo = ruta_de_url(PREFIJO_UPLOADS + ruta)
+    if archivo is None:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+    try:
+        info = await run_in_threadpool(os.stat, archivo)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+    if not stat.S_ISREG(info.st_mode):
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+    etag = _etag(archivo, info)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL_UPLOADS}
+    if coincide_etag(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    if UPLOADS_X_ACCEL_PREFIX:
+        relativa = quote(os.path.relpath(archivo, UPLOAD_DIR))
+        headers["X-Accel-Redirect"] = f"{UPLOADS_X_ACCEL_PREFIX.rstrip('/')}/{relativa}"
+        return Response(headers=headers, media_type=guess_type(archivo)[0] or "application/octet-stream")
+    return FileResponse(archivo, headers=headers, stat_result=info)
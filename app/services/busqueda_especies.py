@@ -0,0 +1,67 @@
+import unicodedata
+
+from sqlalchemy import func, literal_column, or_
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.data.models import Especie
+
+# Configuración de texto de Postgres (spanish + unaccent) y la columna
+# generada `especies.busqueda`; ver la sección "BÚSQUEDA DE ESPECIES" en
+# SWAY_PostgreSQL.sql. La columna no está mapeada en el modelo para que la
+# base SQLite de pruebas no la necesite.
+CONFIG_TS = "sway_es"
+busqueda_vector = literal_column("especies.busqueda", type_=TSVECTOR)
+
+
+def plegar(texto: str) -> str:
+    """Minúsculas y sin acentos: 'Tortuga Laúd' -> 'tortuga laud'."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def _patron_like(texto: str) -> str:
+    escapado = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escapado}%"
+
+
+def aplicar_busqueda(db, query, termino: str):
+    """Filtra `query` por el término de búsqueda y devuelve (query, rank).
+
+    En Postgres combina el tsvector (stemming en español, sin acentos) con
+    similitud de trigramas para tolerar errores de dedo; `rank` sirve para
+    ordenar por relevancia. En otros motores (la SQLite de pruebas) cae al
+    `ilike` de siempre y `rank` es None.
+    """
+    termino = " ".join((termino or "").split())
+    if not termino:
+        return query, None
+    if db.get_bind().dialect.name == "postgresql":
+        return _busqueda_postgres(query, termino)
+    return _busqueda_simple(query, termino), None
+
+
+def _busqueda_postgres(query, termino):
+    tsquery = func.websearch_to_tsquery(CONFIG_TS, termino)
+    plegado = plegar(termino)
+    patron = _patron_like(plegado)
+    comun = func.sway_unaccent(func.lower(Especie.nombre_comun))
+    cientifico = func.sway_unaccent(func.lower(Especie.nombre_cientifico))
+
+    query = query.filter(or_(
+        busqueda_vector.op("@@")(tsquery),
+        comun.like(patron, escape="\\"),
+        cientifico.like(patron, escape="\\"),
+        comun.op("%")(plegado),
+        cientifico.op("%")(plegado),
+    ))
+    rank = func.ts_rank_cd(busqueda_vector, tsquery) + func.greatest(
+        func.similarity(comun, plegado), func.similarity(cientifico, plegado)
+    )
+    return query, rank
+
+
+def _busqueda_simple(query, termino):
+    return query.filter(or_(
+        Especie.nombre_comun.ilike(f"%{termino}%"),
+        Especie.nombre_cientifico.ilike(f"%{termino}%"),
+    ))
@@ -0,0 +1,79 @@
+import functools
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from app.services.realtime_publish import publish_event
+
+CATALOGO_EVENT = "catalogo_updated"
+# Red de seguridad por si un cambio entra por SQL directo y nadie publica el evento.
+DEFAULT_TTL_SECONDS = 3600
+
+
+class CatalogCache:
+    """Caché por réplica de las respuestas de catálogos, guardadas ya
+    serializadas. Cada entrada depende de uno o más catálogos (tablas) y se
+    descarta cuando llega `catalogo_updated` por `sway:events`."""
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        body, _, expires_at = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return body
+
+    def set(self, key, body: bytes, catalogos):
+        self._entries[key] = (body, frozenset(catalogos), time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, catalogos=None):
+        if catalogos is None:
+            self._entries.clear()
+            return
+        catalogos = set(catalogos)
+        for key in [k for k, (_, deps, _) in self._entries.items() if deps & catalogos]:
+            self._entries.pop(key, None)
+
+    def handle_event(self, message: dict):
+        if message.get("type") != CATALOGO_EVENT:
+            return
+        catalogos = (message.get("payload") or {}).get("catalogos")
+        self.invalidate(catalogos or None)
+
+
+catalog_cache = CatalogCache()
+
+
+def cached_catalog(key: str, catalogos=None):
+    """Decorador para rutas GET de catálogos: devuelve los bytes guardados sin
+    tocar la base de datos y solo ejecuta la ruta cuando no hay entrada."""
+    dependencias = catalogos or [key]
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            body = catalog_cache.get(key)
+            if body is None:
+                resultado = await func(*args, **kwargs)
+                if isinstance(resultado, Response):
+                    return resultado
+                body = json.dumps(jsonable_encoder(resultado), ensure_ascii=False).encode("utf-8")
+                catalog_cache.set(key, body, dependencias)
+            return Response(content=body, media_type="application/json")
+        return wrapper
+    return decorator
+
+
+def notificar_cambio_catalogo(*catalogos: str) -> None:
+    # Se invalida primero la réplica local por si Redis no está disponible;
+    # las demás réplicas lo hacen al recibir el evento.
+    catalog_cache.invalidate(catalogos)
+    publish_event(CATALOGO_EVENT, {"catalogos": list(catalogos)})
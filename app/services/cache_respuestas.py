@@ -0,0 +1,105 @@
+import functools
+import hashlib
+import json
+import os
+from urllib.parse import urlencode
+
+import redis.asyncio as aioredis
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from app.services.decoradores import agregar_request, tomar_request
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+RESPUESTA_PREFIX = "sway:resp:"
+SURROGATE_PREFIX = "sway:sk:"
+# La purga por surrogate keys es la invalidación normal; el TTL solo acota
+# lo que pueda quedar si una escritura se cruza con el llenado de la entrada.
+DEFAULT_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+_async_client = None
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.from_url(REDIS_URL, socket_connect_timeout=2, socket_timeout=2)
+    return _async_client
+
+
+def clave_respuesta(request: Request) -> str:
+    """Ruta + query string normalizado (parámetros ordenados) + alcance de
+    autenticación, para que dos usuarios no compartan respuestas de `mine`."""
+    query = urlencode(sorted(request.query_params.multi_items()))
+    auth = request.headers.get("authorization", "")
+    huella = "|".join([request.url.path, query, hashlib.sha1(auth.encode()).hexdigest() if auth else ""])
+    return RESPUESTA_PREFIX + hashlib.sha1(huella.encode()).hexdigest()
+
+
+async def _leer(clave: str):
+    return await _get_async_client().get(clave)
+
+
+async def _guardar(clave: str, body: bytes, surrogates, ttl: int):
+    pipe = _get_async_client().pipeline(transaction=False)
+    pipe.set(clave, body, ex=ttl)
+    for surrogate in surrogates:
+        pipe.sadd(SURROGATE_PREFIX + surrogate, clave)
+        pipe.expire(SURROGATE_PREFIX + surrogate, ttl)
+    await pipe.execute()
+
+
+def purgar_respuestas(client, surrogates) -> None:
+    """Borra las respuestas etiquetadas con cualquiera de `surrogates`. Se usa
+    el cliente síncrono de `publish_event`, así la purga ocurre en la misma
+    escritura y vale para todas las réplicas."""
+    if not surrogates:
+        return
+    pipe = client.pipeline(transaction=True)
+    for surrogate in surrogates:
+        pipe.smembers(SURROGATE_PREFIX + surrogate)
+    for surrogate in surrogates:
+        pipe.delete(SURROGATE_PREFIX + surrogate)
+    resultados = pipe.execute()
+    claves = set()
+    for miembros in resultados[:len(surrogates)]:
+        claves.update(miembros or ())
+    if claves:
+        client.delete(*claves)
+
+
+def cached_response(surrogates, ttl: int = DEFAULT_TTL_SECONDS):
+    """Decorador opcional para rutas GET de solo lectura: guarda el JSON ya
+    serializado en Redis (compartido entre api1 y api2) y lo etiqueta con
+    `surrogates`, una lista fija o una función de los parámetros de la ruta.
+    Las dependencias (API key, sesión) se resuelven antes, igual que sin caché."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = tomar_request(kwargs, agregado)
+            clave = clave_respuesta(request)
+            try:
+                body = await _leer(clave)
+            except Exception as e:
+                print(f"[cache_respuestas] lectura fallida para {request.url.path}: {e}")
+                clave, body = None, None
+            if body is not None:
+                return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+            resultado = await func(*args, **kwargs)
+            if isinstance(resultado, Response):
+                return resultado
+            body = json.dumps(jsonable_encoder(resultado), ensure_ascii=False).encode("utf-8")
+            if clave is not None:
+                lista = surrogates(**kwargs) if callable(surrogates) else surrogates
+                try:
+                    await _guardar(clave, body, lista, ttl)
+                except Exception as e:
+                    print(f"[cache_respuestas] no se pudo guardar {request.url.path}: {e}")
+            return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+        agregado = agregar_request(func, wrapper)
+        return wrapper
+    return decorator
@@ -0,0 +1,45 @@
+from fastapi import HTTPException
+
+
+def resolver_campos(fields, include, disponibles, grupos=None):
+    """Interpreta `fields=` (claves sueltas) e `include=` (grupos de claves de
+    una relación) de una ruta de listado. Devuelve None cuando no se pidió
+    nada, que significa la respuesta completa de siempre; si no, el conjunto
+    de claves a devolver. `id` va siempre para que el cliente pueda paginar."""
+    grupos = grupos or {}
+    if not fields and not include:
+        return None
+
+    campos = {"id"}
+    desconocidos = []
+    for nombre in _separar(fields):
+        if nombre in disponibles:
+            campos.add(nombre)
+        else:
+            desconocidos.append(nombre)
+    for nombre in _separar(include):
+        if nombre in grupos:
+            campos.update(grupos[nombre])
+        else:
+            desconocidos.append(nombre)
+    if desconocidos:
+        validos = sorted(set(disponibles) | set(grupos))
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(validos)}"
+        )
+    return campos
+
+
+def _separar(valor):
+    return [p.strip() for p in (valor or "").split(",") if p.strip()]
+
+
+def necesita(campos, *claves) -> bool:
+    return campos is None or any(c in campos for c in claves)
+
+
+def serializar(fila, extractores: dict, campos) -> dict:
+    """Arma el dict solo con las claves pedidas; los extractores de las demás
+    ni se llaman, así no se tocan columnas o relaciones que no se cargaron."""
+    return {k: f(fila) for k, f in extractores.items() if campos is None or k in campos}
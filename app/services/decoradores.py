@@ -0,0 +1,21 @@
+import inspect
+
+from fastapi import Request
+
+
+def agregar_request(func, wrapper) -> bool:
+    """Para decoradores de rutas que necesitan el Request aunque la ruta no lo
+    declare: agrega `request` a la firma que ve FastAPI. Devuelve True si lo
+    agregó, y entonces el wrapper debe sacarlo de kwargs antes de llamar a la ruta."""
+    firma = inspect.signature(func)
+    if "request" in firma.parameters:
+        return False
+    parametros = list(firma.parameters.values()) + [
+        inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+    ]
+    wrapper.__signature__ = firma.replace(parameters=parametros)
+    return True
+
+
+def tomar_request(kwargs: dict, agregado: bool) -> Request:
+    return kwargs.pop("request") if agregado else kwargs["request"]
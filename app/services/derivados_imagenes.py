@@ -0,0 +1,159 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps, features
+from sqlalchemy.orm import Session
+
+from app.data.models import Avistamiento
+from app.services.realtime_publish import publish_event
+from app.services.subidas import ruta_de_url
+
+# Lado mayor en px de cada variante; la cuadrícula del portal y los popups del
+# mapa usan "thumb", la vista de detalle "medium".
+VARIANTES = {"thumb": 200, "medium": 800}
+FORMATO_VARIANTES, EXTENSION_VARIANTES = ("WEBP", ".webp") if features.check("webp") else ("JPEG", ".jpg")
+CALIDAD_VARIANTES = 80
+TAMANO_LOTE_DERIVADOS = 50
+# Holgado para cámaras de teléfono (~50 MP). Una imagen más grande se
+# rechaza en vez de descomprimirse: un PNG de 5 MB puede ocupar cientos de MB.
+MAX_PIXELES_FOTO = 60_000_000
+Image.MAX_IMAGE_PIXELS = MAX_PIXELES_FOTO
+
+_pool = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    # Redimensionar es CPU puro: en procesos aparte no compite con el event
+    # loop ni con el GIL de la réplica.
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=int(os.getenv("DERIVADOS_WORKERS", "2")))
+    return _pool
+
+
+def cerrar_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _url_variante(url: str, variante: str) -> str:
+    return f"{os.path.splitext(url)[0]}.{variante}{EXTENSION_VARIANTES}"
+
+
+def generar_variantes(ruta: str) -> None:
+    """Escribe junto al original una copia reducida por variante. Corre en el
+    pool de procesos. No copia EXIF ni otros metadatos (ubicación GPS del
+    teléfono, modelo de cámara); la orientación se aplica antes a los píxeles."""
+    base = os.path.splitext(ruta)[0]
+    with Image.open(ruta) as original:
+        ancho, alto = original.size
+        if ancho * alto > MAX_PIXELES_FOTO:
+            raise ValueError(f"{ancho}x{alto} supera el límite de {MAX_PIXELES_FOTO} píxeles")
+        # En JPEG decodifica directo a 1/2, 1/4 u 1/8 sin bajar de la variante mayor.
+        lado_mayor = max(VARIANTES.values())
+        original.draft("RGB", (lado_mayor, lado_mayor))
+        imagen = ImageOps.exif_transpose(original)
+        if FORMATO_VARIANTES == "JPEG" or imagen.mode not in ("RGB", "RGBA"):
+            imagen = imagen.convert("RGB" if FORMATO_VARIANTES == "JPEG" else "RGBA")
+        for variante, lado in VARIANTES.items():
+            copia = imagen.copy()
+            copia.thumbnail((lado, lado))
+            destino = f"{base}.{variante}{EXTENSION_VARIANTES}"
+            temporal = f"{destino}.{os.getpid()}.tmp"
+            copia.save(temporal, FORMATO_VARIANTES, quality=CALIDAD_VARIANTES)
+            os.replace(temporal, destino)
+
+
+def _existen(rutas) -> bool:
+    return all(os.path.exists(ruta) for ruta in rutas)
+
+
+async def crear_variantes(url: str):
+    """Genera las variantes de `url` en el pool y devuelve {variante: url}, o
+    None si el archivo no es local o Pillow no lo pudo leer."""
+    ruta = ruta_de_url(url)
+    if ruta is None:
+        return None
+    variantes = {variante: _url_variante(url, variante) for variante in VARIANTES}
+    # Con nombres por contenido, una foto repetida ya tiene sus variantes.
+    if await run_in_threadpool(_existen, [ruta_de_url(u) for u in variantes.values()]):
+        return variantes
+    try:
+        await asyncio.get_running_loop().run_in_executor(_executor(), generar_variantes, ruta)
+    except Exception as e:
+        print(f"[derivados] no se pudieron generar variantes de {url}: {e}")
+        return None
+    return variantes
+
+
+def _guardar_variantes_avistamiento(bind, avistamiento_id: int, foto_url: str, variantes: dict) -> bool:
+    db = Session(bind=bind)
+    try:
+        # Si mientras tanto se subió otra foto, estas variantes ya no aplican.
+        actualizados = (
+            db.query(Avistamiento)
+            .filter(Avistamiento.id == avistamiento_id, Avistamiento.foto_url == foto_url)
+            .update({Avistamiento.foto_variantes: variantes}, synchronize_session=False)
+        )
+        db.commit()
+        return bool(actualizados)
+    finally:
+        db.close()
+
+
+async def procesar_foto_avistamiento(bind, avistamiento_id: int, foto_url: str) -> None:
+    """Tarea en segundo plano tras subir una foto: genera las variantes, las
+    registra junto a `foto_url` y avisa a los clientes."""
+    variantes = await crear_variantes(foto_url)
+    if not variantes:
+        return
+    if await run_in_threadpool(_guardar_variantes_avistamiento, bind, avistamiento_id, foto_url, variantes):
+        await run_in_threadpool(publish_event, "avistamiento_updated", {
+            "id": avistamiento_id,
+            "foto_url": foto_url,
+            "foto_variantes": variantes,
+        })
+
+
+def rellenar_variantes(db) -> int:
+    """Genera las variantes que faltan para fotos subidas antes de que
+    existiera este proceso, por lotes y en paralelo en el pool."""
+    total, ultimo_id = 0, 0
+    while True:
+        filas = (
+            db.query(Avistamiento)
+            .filter(Avistamiento.id > ultimo_id, Avistamiento.foto_url.isnot(None),
+                    Avistamiento.foto_variantes.is_(None))
+            .order_by(Avistamiento.id)
+            .limit(TAMANO_LOTE_DERIVADOS)
+            .all()
+        )
+        if not filas:
+            return total
+        ultimo_id = filas[-1].id
+        locales = [(a, ruta_de_url(a.foto_url)) for a in filas]
+        locales = [(a, ruta) for a, ruta in locales if ruta and os.path.exists(ruta)]
+        futuros = [(a, _executor().submit(generar_variantes, ruta)) for a, ruta in locales]
+        for avistamiento, futuro in futuros:
+            try:
+                futuro.result()
+            except Exception as e:
+                print(f"[derivados] avistamiento {avistamiento.id}: {e}")
+                continue
+            avistamiento.foto_variantes = {v: _url_variante(avistamiento.foto_url, v) for v in VARIANTES}
+            total += 1
+        db.commit()
+
+
+if __name__ == "__main__":
+    from app.data.database import sessionLocal
+
+    sesion = sessionLocal()
+    try:
+        print(f"Avistamientos con variantes: {rellenar_variantes(sesion)}")
+    finally:
+        sesion.close()
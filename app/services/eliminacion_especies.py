@@ -0,0 +1,69 @@
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from app.data.models import (
+    Especie, Avistamiento, AvistamientoDiario, EspecieAmenaza, EspecieHabitat, EspecieCaracteristica,
+    TarjetaEspecie
+)
+from app.services.realtime_publish import publish_event
+
+TAMANO_LOTE_ELIMINACION = 1000
+PROGRESO_EVENT = "especie_eliminacion_progreso"
+COMPLETADA_EVENT = "especie_eliminacion_completada"
+
+# Las especies marcadas siguen en la tabla mientras se borran sus avistamientos;
+# toda lectura pública debe filtrar con esta condición.
+especie_visible = Especie.eliminada_en.is_(None)
+
+
+def eliminar_especie_por_lotes(bind, especie_id: int, tamano_lote: int = None) -> None:
+    """Borra los avistamientos de una especie ya marcada en lotes acotados, un
+    commit por lote para no retener locks, y al final sus vínculos y la especie.
+    Usa su propia sesión: corre después de que la petición respondió. Si algo
+    falla la especie queda oculta y se reintenta al arrancar la API."""
+    tamano_lote = tamano_lote or TAMANO_LOTE_ELIMINACION
+    db = Session(bind=bind)
+    try:
+        total = (
+            db.query(func.count(Avistamiento.id)).filter(Avistamiento.id_especie == especie_id).scalar()
+        )
+        borrados = 0
+        while True:
+            ids = [
+                i for (i,) in db.query(Avistamiento.id)
+                .filter(Avistamiento.id_especie == especie_id)
+                .limit(tamano_lote)
+            ]
+            if not ids:
+                break
+            db.execute(delete(Avistamiento).where(Avistamiento.id.in_(ids)))
+            db.commit()
+            borrados += len(ids)
+            publish_event(PROGRESO_EVENT, {"id": especie_id, "borrados": borrados, "total": total})
+
+        db.query(EspecieAmenaza).filter(EspecieAmenaza.id_especie == especie_id).delete()
+        db.query(EspecieHabitat).filter(EspecieHabitat.id_especie == especie_id).delete()
+        db.query(EspecieCaracteristica).filter(EspecieCaracteristica.id_especie == especie_id).delete()
+        db.query(TarjetaEspecie).filter(TarjetaEspecie.id_especie == especie_id).delete()
+        db.query(AvistamientoDiario).filter(AvistamientoDiario.id_especie == especie_id).delete()
+        db.query(Especie).filter(Especie.id == especie_id).delete()
+        db.commit()
+
+        publish_event(COMPLETADA_EVENT, {"id": especie_id, "avistamientos_borrados": borrados})
+    except Exception as e:
+        db.rollback()
+        print(f"[eliminacion] falló el borrado de la especie {especie_id}: {e}")
+    finally:
+        db.close()
+
+
+def reanudar_eliminaciones(bind) -> None:
+    """Retoma las eliminaciones que quedaron a medias (reinicio o error). Es
+    seguro que dos réplicas lo hagan a la vez: cada lote borra lo que quede."""
+    db = Session(bind=bind)
+    try:
+        pendientes = [i for (i,) in db.query(Especie.id).filter(Especie.eliminada_en.isnot(None))]
+    finally:
+        db.close()
+    for especie_id in pendientes:
+        eliminar_especie_por_lotes(bind, especie_id)
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import distinct, func, select
+
+from app.data.models import Especie, EspecieHabitat, EstadoConservacion, Habitat
+from app.services.cache_catalogos import CATALOGO_EVENT
+from app.services.eliminacion_especies import especie_visible
+from app.services.slugs_filtros import slug_de_estado
+
+# Los contadores "de hoy" y "del mes" dependen del reloj además de las escrituras.
+TTL_ESTADISTICAS = 300
+# Los filtros llegan crudos del query string: sin tope, cualquiera podría
+# llenar la caché con combinaciones inventadas.
+MAX_ENTRADAS_ESTADISTICAS = 128
+
+
+def calcular_estadisticas(db, estado=None, habitat=None) -> dict:
+    """Todos los contadores de especies para un juego de filtros en una sola
+    consulta: un GROUP BY por estado de conservación con FILTER para las
+    altas recientes y los hábitats distintos como subconsulta escalar."""
+    hoy = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    inicio_mes = hoy.replace(day=1)
+
+    condiciones = [especie_visible]
+    if estado:
+        condiciones.append(Especie.id_estado_conservacion.in_(
+            select(EstadoConservacion.id).where(EstadoConservacion.nombre == estado)
+        ))
+    if habitat:
+        condiciones.append(Especie.id.in_(
+            select(EspecieHabitat.id_especie)
+            .join(Habitat, EspecieHabitat.id_habitat == Habitat.id)
+            .where(Habitat.nombre == habitat)
+        ))
+    habitats_representados = (
+        select(func.count(distinct(EspecieHabitat.id_habitat)))
+        .where(EspecieHabitat.id_especie.in_(select(Especie.id).where(*condiciones)))
+        .scalar_subquery()
+    )
+
+    filas = (
+        db.query(
+            EstadoConservacion.nombre,
+            func.count(Especie.id),
+            func.count(Especie.id).filter(Especie.fecha_agregado >= hoy),
+            func.count(Especie.id).filter(Especie.fecha_agregado >= inicio_mes),
+            habitats_representados,
+        )
+        .select_from(Especie)
+        .outerjoin(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
+        .filter(*condiciones)
+        .group_by(EstadoConservacion.nombre)
+        .all()
+    )
+
+    por_estado = {}
+    for nombre, cantidad, _, _, _ in filas:
+        slug = slug_de_estado(nombre)
+        if slug:
+            por_estado[slug] = por_estado.get(slug, 0) + cantidad
+    return {
+        "total": sum(f[1] for f in filas),
+        "por_estado": por_estado,
+        "agregadas_hoy": sum(f[2] for f in filas),
+        "agregadas_mes": sum(f[3] for f in filas),
+        "habitats_representados": filas[0][4] if filas else 0,
+    }
+
+
+class EstadisticasEspecies:
+    """Caché por réplica de `calcular_estadisticas` por combinación de
+    filtros. Se vacía con cualquier evento de especies (o de los catálogos
+    de estados y hábitats) que llega por `sway:events`."""
+
+    def __init__(self, ttl_seconds: int = TTL_ESTADISTICAS, max_entradas: int = MAX_ENTRADAS_ESTADISTICAS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, db, estado=None, habitat=None) -> dict:
+        clave = (estado or None, habitat or None)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[1] >= time.monotonic():
+                self._entradas.move_to_end(clave)
+                return entrada[0]
+        resultado = calcular_estadisticas(db, *clave)
+        with self._lock:
+            self._entradas[clave] = (resultado, time.monotonic() + self.ttl_seconds)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return resultado
+
+    def invalidate(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def handle_event(self, message: dict):
+        tipo = message.get("type") or ""
+        if tipo == CATALOGO_EVENT:
+            catalogos = (message.get("payload") or {}).get("catalogos")
+            if catalogos and not {"habitats", "estados_conservacion"} & set(catalogos):
+                return
+            self.invalidate()
+        elif tipo.startswith("especie") and not tipo.endswith("_progreso"):
+            self.invalidate()
+
+
+estadisticas_especies = EstadisticasEspecies()
@@ -0,0 +1,192 @@
+import math
+
+from fastapi import HTTPException
+from sqlalchemy import Float, and_, cast, func, or_
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION_GEOHASH = 9  # celdas de ~5 m
+# Cuántas celdas puede tener la cobertura de un bbox antes de bajar de precisión.
+MAX_CELDAS_BBOX = 32
+RADIO_TIERRA_KM = 6371.0088
+TAMANO_LOTE_GEOHASH = 1000
+
+
+def codificar_geohash(latitud, longitud, precision: int = PRECISION_GEOHASH):
+    if latitud is None or longitud is None:
+        return None
+    latitud, longitud = float(latitud), float(longitud)
+    rango_lat, rango_lon = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, caracter, par = [], 0, 0, True
+    while len(geohash) < precision:
+        rango, valor = (rango_lon, longitud) if par else (rango_lat, latitud)
+        medio = (rango[0] + rango[1]) / 2
+        caracter <<= 1
+        if valor >= medio:
+            caracter |= 1
+            rango[0] = medio
+        else:
+            rango[1] = medio
+        par = not par
+        bits += 1
+        if bits == 5:
+            geohash.append(BASE32[caracter])
+            bits, caracter = 0, 0
+    return "".join(geohash)
+
+
+def tamano_celda(precision: int):
+    """(alto, ancho) en grados de una celda de `precision` caracteres."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def _indices(sur, oeste, norte, este, precision):
+    alto, ancho = tamano_celda(precision)
+    filas = range(int((sur + 90) // alto), int(min(norte + 90, 180 - 1e-9) // alto) + 1)
+    columnas = range(int((oeste + 180) // ancho), int(min(este + 180, 360 - 1e-9) // ancho) + 1)
+    return filas, columnas, alto, ancho
+
+
+def prefijos_bbox(sur, oeste, norte, este, max_celdas: int = MAX_CELDAS_BBOX):
+    """Prefijos de geohash que cubren el rectángulo: la precisión más fina
+    con la que alcanzan `max_celdas` celdas."""
+    elegida = 1
+    for precision in range(1, PRECISION_GEOHASH + 1):
+        filas, columnas, _, _ = _indices(sur, oeste, norte, este, precision)
+        if len(filas) * len(columnas) > max_celdas:
+            break
+        elegida = precision
+    filas, columnas, alto, ancho = _indices(sur, oeste, norte, este, elegida)
+    return sorted({
+        codificar_geohash(-90 + (i + 0.5) * alto, -180 + (j + 0.5) * ancho, elegida)
+        for i in filas for j in columnas
+    })
+
+
+def _siguiente_prefijo(prefijo: str):
+    """Menor cadena mayor que todas las que empiezan con `prefijo`."""
+    while prefijo and prefijo[-1] == BASE32[-1]:
+        prefijo = prefijo[:-1]
+    if not prefijo:
+        return None
+    return prefijo[:-1] + BASE32[BASE32.index(prefijo[-1]) + 1]
+
+
+def _rango_prefijo(columna, prefijo):
+    siguiente = _siguiente_prefijo(prefijo)
+    if siguiente is None:
+        return columna >= prefijo
+    # Rango en vez de LIKE: usa el índice b-tree en cualquier motor.
+    return and_(columna >= prefijo, columna < siguiente)
+
+
+def _cajas(bbox):
+    """Parte el bbox en dos si cruza el antimeridiano."""
+    oeste, sur, este, norte = bbox
+    if oeste <= este:
+        return [(sur, oeste, norte, este)]
+    return [(sur, oeste, norte, 180.0), (sur, -180.0, norte, este)]
+
+
+def filtro_bbox(col_geohash, col_latitud, col_longitud, bbox):
+    """Condición para `bbox = (oeste, sur, este, norte)`: rangos de geohash
+    (índice) y después la comparación exacta de coordenadas."""
+    condiciones = []
+    for sur, oeste, norte, este in _cajas(bbox):
+        celdas = or_(*[_rango_prefijo(col_geohash, p) for p in prefijos_bbox(sur, oeste, norte, este)])
+        condiciones.append(and_(
+            celdas,
+            col_latitud.between(sur, norte),
+            col_longitud.between(oeste, este),
+        ))
+    return or_(*condiciones)
+
+
+def bbox_de_radio(latitud, longitud, radio_km):
+    delta_lat = math.degrees(radio_km / RADIO_TIERRA_KM)
+    sur, norte = max(latitud - delta_lat, -90.0), min(latitud + delta_lat, 90.0)
+    if sur == -90.0 or norte == 90.0:
+        return -180.0, sur, 180.0, norte
+    delta_lon = math.degrees(radio_km / (RADIO_TIERRA_KM * math.cos(math.radians(latitud))))
+    if delta_lon >= 180:
+        return -180.0, sur, 180.0, norte
+    oeste = (longitud - delta_lon + 540) % 360 - 180
+    este = (longitud + delta_lon + 540) % 360 - 180
+    return oeste, sur, este, norte
+
+
+def filtro_radio(col_geohash, col_latitud, col_longitud, latitud, longitud, radio_km):
+    """Avistamientos a `radio_km` o menos del punto. Primero el bbox que
+    contiene al círculo y luego la distancia exacta (haversine), comparada
+    contra el umbral precalculado para no necesitar asin/sqrt en SQL."""
+    a_rad = math.pi / 180
+    lat = cast(col_latitud, Float) * a_rad
+    lon = cast(col_longitud, Float) * a_rad
+    lat0, lon0 = math.radians(latitud), math.radians(longitud)
+    sen_dlat = func.sin((lat - lat0) / 2)
+    sen_dlon = func.sin((lon - lon0) / 2)
+    haversine = sen_dlat * sen_dlat + math.cos(lat0) * func.cos(lat) * sen_dlon * sen_dlon
+    umbral = math.sin(min(radio_km / RADIO_TIERRA_KM, math.pi) / 2) ** 2
+    return and_(
+        filtro_bbox(col_geohash, col_latitud, col_longitud, bbox_de_radio(latitud, longitud, radio_km)),
+        haversine <= umbral,
+    )
+
+
+def _numeros(texto, cantidad, nombre):
+    try:
+        valores = [float(v) for v in (texto or "").split(",")]
+    except ValueError:
+        valores = []
+    if len(valores) != cantidad or not all(math.isfinite(v) for v in valores):
+        raise HTTPException(status_code=400, detail=f"{nombre} debe tener {cantidad} números separados por coma")
+    return valores
+
+
+def parsear_bbox(texto):
+    """`oeste,sur,este,norte` (orden de GeoJSON). El oeste puede ser mayor que
+    el este si la caja cruza el antimeridiano."""
+    oeste, sur, este, norte = _numeros(texto, 4, "bbox")
+    if not (-180 <= oeste <= 180 and -180 <= este <= 180 and -90 <= sur <= norte <= 90):
+        raise HTTPException(status_code=400, detail="bbox fuera de rango")
+    return oeste, sur, este, norte
+
+
+def parsear_punto(texto):
+    latitud, longitud = _numeros(texto, 2, "near")
+    if not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+        raise HTTPException(status_code=400, detail="near fuera de rango")
+    return latitud, longitud
+
+
+def rellenar_geohash(db) -> int:
+    """Calcula el geohash de los avistamientos que no lo tienen, por lotes;
+    para una base existente antes de usar los filtros espaciales."""
+    from app.data.models import Avistamiento
+
+    total = 0
+    while True:
+        filas = (
+            db.query(Avistamiento)
+            .filter(Avistamiento.geohash.is_(None), Avistamiento.latitud.isnot(None),
+                    Avistamiento.longitud.isnot(None))
+            .order_by(Avistamiento.id)
+            .limit(TAMANO_LOTE_GEOHASH)
+            .all()
+        )
+        if not filas:
+            return total
+        for avistamiento in filas:
+            avistamiento.geohash = codificar_geohash(avistamiento.latitud, avistamiento.longitud)
+        db.commit()
+        total += len(filas)
+
+
+if __name__ == "__main__":
+    from app.data.database import sessionLocal
+
+    sesion = sessionLocal()
+    try:
+        print(f"Avistamientos con geohash: {rellenar_geohash(sesion)}")
+    finally:
+        sesion.close()
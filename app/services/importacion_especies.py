@@ -0,0 +1,137 @@
+import csv
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.data.models import Especie, EstadoConservacion, Habitat, Amenaza, EspecieHabitat, EspecieAmenaza
+from app.models.especies import EspecieImportada
+from app.services.busqueda_especies import plegar
+from app.services.tarjetas_especies import refrescar_tarjetas
+
+FORMATOS_IMPORTACION = ("csv", "ndjson")
+TAMANO_LOTE = 500
+MAX_ERRORES_REPORTADOS = 100
+
+
+def detectar_formato(content_type: str, formato=None) -> str:
+    if formato:
+        formato = formato.lower()
+    elif "ndjson" in (content_type or "") or "jsonl" in (content_type or ""):
+        formato = "ndjson"
+    else:
+        formato = "csv"
+    if formato not in FORMATOS_IMPORTACION:
+        raise ValueError(f"formato debe ser uno de: {', '.join(FORMATOS_IMPORTACION)}")
+    return formato
+
+
+def _leer_filas(archivo, formato: str):
+    """Genera (número de línea, fila o excepción) sin cargar el archivo entero."""
+    if formato == "csv":
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, {k.strip(): v for k, v in fila.items() if k}
+        return
+    for numero, linea in enumerate(archivo, 1):
+        if not linea.strip():
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError as e:
+            yield numero, ValueError(f"JSON inválido: {e}")
+            continue
+        yield numero, fila if isinstance(fila, dict) else ValueError("cada línea debe ser un objeto JSON")
+
+
+def _cargar_mapas(db: Session):
+    # Un solo viaje por catálogo; los nombres se comparan sin acentos ni mayúsculas.
+    return (
+        {plegar(n): i for i, n in db.query(EstadoConservacion.id, EstadoConservacion.nombre)},
+        {plegar(n): i for i, n in db.query(Habitat.id, Habitat.nombre)},
+        {plegar(n): i for i, n in db.query(Amenaza.id, Amenaza.nombre)},
+    )
+
+
+def _resolver(nombres, mapa, etiqueta):
+    ids, faltantes = [], []
+    for nombre in nombres:
+        id_ = mapa.get(plegar(nombre))
+        if id_ is None:
+            faltantes.append(nombre)
+        elif id_ not in ids:
+            ids.append(id_)
+    if faltantes:
+        raise ValueError(f"{etiqueta} desconocidos: {', '.join(faltantes)}")
+    return ids
+
+
+def _mensaje_validacion(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+
+def _insertar_lote(db: Session, lote) -> list:
+    ids = db.execute(
+        insert(Especie).returning(Especie.id, sort_by_parameter_order=True),
+        [especie for especie, _, _ in lote],
+    ).scalars().all()
+
+    habitats = [{"id_especie": e, "id_habitat": h} for e, (_, hs, _) in zip(ids, lote) for h in hs]
+    amenazas = [{"id_especie": e, "id_amenaza": a} for e, (_, _, am) in zip(ids, lote) for a in am]
+    if habitats:
+        db.execute(insert(EspecieHabitat), habitats)
+    if amenazas:
+        db.execute(insert(EspecieAmenaza), amenazas)
+    refrescar_tarjetas(db, ids)
+    return ids
+
+
+def importar_especies(db: Session, archivo, formato: str):
+    """Valida e inserta por lotes dentro de la transacción actual (no hace
+    commit). Las filas inválidas o repetidas se reportan y se omiten.
+    Devuelve (resumen, ids insertados)."""
+    estados, habitats, amenazas = _cargar_mapas(db)
+    existentes = {plegar(n) for (n,) in db.query(Especie.nombre_cientifico)}
+    resumen = {"recibidas": 0, "importadas": 0, "total_errores": 0, "errores": []}
+    ids, lote = [], []
+
+    for linea, fila in _leer_filas(archivo, formato):
+        resumen["recibidas"] += 1
+        try:
+            if isinstance(fila, Exception):
+                raise fila
+            datos = EspecieImportada(**fila)
+            id_estado = estados.get(plegar(datos.estado_conservacion))
+            if id_estado is None:
+                raise ValueError(f"estado de conservación desconocido: {datos.estado_conservacion}")
+            habitat_ids = _resolver(datos.habitats, habitats, "hábitats")
+            amenaza_ids = _resolver(datos.amenazas, amenazas, "amenazas")
+            clave = plegar(datos.nombre_cientifico)
+            if clave in existentes:
+                raise ValueError(f"la especie {datos.nombre_cientifico} ya existe")
+        except (ValidationError, ValueError, TypeError) as e:
+            resumen["total_errores"] += 1
+            if len(resumen["errores"]) < MAX_ERRORES_REPORTADOS:
+                mensaje = _mensaje_validacion(e) if isinstance(e, ValidationError) else str(e)
+                resumen["errores"].append({"linea": linea, "error": mensaje})
+            continue
+
+        existentes.add(clave)
+        lote.append(({
+            "nombre_comun": datos.nombre_comun,
+            "nombre_cientifico": datos.nombre_cientifico,
+            "descripcion": datos.descripcion or None,
+            "esperanza_vida": datos.esperanza_vida,
+            "poblacion_estimada": datos.poblacion_estimada,
+            "id_estado_conservacion": id_estado,
+            "imagen_url": datos.imagen_url or None,
+        }, habitat_ids, amenaza_ids))
+        if len(lote) >= TAMANO_LOTE:
+            ids.extend(_insertar_lote(db, lote))
+            lote = []
+
+    if lote:
+        ids.extend(_insertar_lote(db, lote))
+    resumen["importadas"] = len(ids)
+    return resumen, ids
@@ -0,0 +1,112 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal_column, tuple_
+
+# total=exacto  -> count() completo (comportamiento original)
+# total=estimado -> estimación del planner de Postgres (exacto en SQLite)
+# total=ninguno -> no se cuenta; la página sale en tiempo constante
+MODOS_TOTAL = ("exacto", "estimado", "ninguno")
+
+
+def _serializar_valor(valor):
+    if isinstance(valor, datetime):
+        return {"dt": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"d": valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {"dec": str(valor)}
+    return valor
+
+
+def _deserializar_valor(valor):
+    if isinstance(valor, dict):
+        if "dt" in valor:
+            return datetime.fromisoformat(valor["dt"])
+        if "d" in valor:
+            return date.fromisoformat(valor["d"])
+        if "dec" in valor:
+            return Decimal(valor["dec"])
+    return valor
+
+
+def encode_cursor(orden: str, valores) -> str:
+    contenido = json.dumps({"o": orden, "v": [_serializar_valor(v) for v in valores]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(contenido.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, orden: str) -> list:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        contenido = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valores = [_deserializar_valor(v) for v in contenido["v"]]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    if contenido.get("o") != orden:
+        raise HTTPException(status_code=400, detail="El cursor no corresponde al ordenamiento solicitado")
+    return valores
+
+
+def validar_modo_total(modo: str) -> str:
+    if modo not in MODOS_TOTAL:
+        raise HTTPException(status_code=400, detail=f"total debe ser uno de: {', '.join(MODOS_TOTAL)}")
+    return modo
+
+
+def aplicar_keyset(query, columnas, descendente: bool, valores):
+    """Filtra las filas posteriores a `valores` según el orden (columnas..., id).
+    La comparación por tupla permite a Postgres usar el índice compuesto."""
+    if len(valores) != len(columnas):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    if descendente:
+        return query.filter(tuple_(*columnas) < tuple_(*valores))
+    return query.filter(tuple_(*columnas) > tuple_(*valores))
+
+
+def sin_nulos(columna, valor_sql: str):
+    """COALESCE para columnas de orden que admiten NULL: con un NULL en el
+    cursor la comparación por tupla no encuentra nada y se pierden páginas.
+    El valor va literal en el SQL (no como parámetro) para que Postgres
+    reconozca la expresión del índice."""
+    return func.coalesce(columna, literal_column(valor_sql, type_=columna.type))
+
+
+def ordenar_keyset(query, columnas, descendente: bool):
+    return query.order_by(*[c.desc() if descendente else c.asc() for c in columnas])
+
+
+def siguiente_cursor(orden: str, claves, limit: int):
+    """`claves` son los valores de orden de las filas leídas con limit + 1:
+    si sobró una fila, hay otra página y el cursor apunta a la última visible."""
+    if limit <= 0 or len(claves) <= limit:
+        return None
+    return encode_cursor(orden, claves[limit - 1])
+
+
+def contar_total(db, query, columna_id, modo: str):
+    if modo == "ninguno":
+        return None
+    base = query.order_by(None)
+    if modo == "estimado" and db.get_bind().dialect.name == "postgresql":
+        estimado = _estimar_filas(db, base.with_entities(columna_id).distinct())
+        if estimado is not None:
+            return estimado
+    return base.with_entities(func.count(func.distinct(columna_id))).scalar()
+
+
+def _estimar_filas(db, query):
+    try:
+        compilado = query.statement.compile(dialect=db.get_bind().dialect)
+        with db.begin_nested():
+            plan = db.connection().exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {compilado}", compilado.params
+            ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        print(f"[paginacion] no se pudo estimar el total: {e}")
+        return None
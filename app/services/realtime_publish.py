@@ -3,6 +3,9 @@ import os
 
 import redis
 
+from app.services.cache_respuestas import purgar_respuestas
+from app.services.versiones import claves_para_evento, incrementar_versiones
+
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
 CHANNEL = "sway:events"
 
@@ -19,6 +22,11 @@ def _get_client():
 def publish_event(event_type: str, payload: dict) -> None:
     try:
         client = _get_client()
+        # Versiones y caché compartida se actualizan antes de publicar para que
+        # quien reaccione al evento ya reciba el ETag y la respuesta nuevos.
+        claves = claves_para_evento(event_type, payload)
+        incrementar_versiones(client, claves)
+        purgar_respuestas(client, claves)
         client.publish(CHANNEL, json.dumps({"type": event_type, "payload": payload}))
     except Exception as e:
         print(f"[realtime] publish failed for {event_type}: {e}")
@@ -0,0 +1,78 @@
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.data.models import AvistamientoDiario, Especie
+from app.services.eliminacion_especies import especie_visible
+
+GRANULARIDADES = ("day", "week", "month")
+_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def sumar_avistamientos(db, conteos: dict) -> None:
+    """Suma (o resta, con valores negativos) a los conteos diarios. `conteos`
+    es {(id_especie, dia): delta}. No hace commit: va en la transacción del
+    avistamiento para que el rollup nunca quede desfasado."""
+    insertar = _INSERTS[db.get_bind().dialect.name]
+    for (especie_id, dia), delta in conteos.items():
+        if delta > 0:
+            sentencia = insertar(AvistamientoDiario).values(id_especie=especie_id, dia=dia, total=delta)
+            db.execute(sentencia.on_conflict_do_update(
+                index_elements=[AvistamientoDiario.id_especie, AvistamientoDiario.dia],
+                set_={"total": AvistamientoDiario.total + sentencia.excluded.total},
+            ))
+        elif delta < 0:
+            db.execute(
+                update(AvistamientoDiario)
+                .where(AvistamientoDiario.id_especie == especie_id, AvistamientoDiario.dia == dia)
+                .values(total=AvistamientoDiario.total + delta)
+            )
+
+
+def _periodo(dialecto: str, granularidad: str):
+    dia = AvistamientoDiario.dia
+    if granularidad == "day":
+        return dia
+    if dialecto == "postgresql":
+        return func.date(func.date_trunc(granularidad, dia))
+    # SQLite: 'weekday 0' avanza al domingo; seis días antes es el lunes.
+    if granularidad == "week":
+        return func.date(dia, "weekday 0", "-6 days")
+    return func.date(dia, "start of month")
+
+
+def _fecha(valor, nombre):
+    if valor is None:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{nombre} debe ser una fecha AAAA-MM-DD")
+
+
+def calcular_serie(db, granularidad="day", especie_id=None, desde=None, hasta=None) -> list:
+    """Serie de avistamientos por día, semana (inicia en lunes) o mes, leída
+    del rollup diario: unas cuantas filas por periodo en vez de contar la
+    tabla de avistamientos."""
+    if granularidad not in GRANULARIDADES:
+        raise HTTPException(status_code=400, detail=f"granularity debe ser uno de: {', '.join(GRANULARIDADES)}")
+    desde, hasta = _fecha(desde, "desde"), _fecha(hasta, "hasta")
+
+    periodo = _periodo(db.get_bind().dialect.name, granularidad).label("periodo")
+    query = (
+        db.query(periodo, func.sum(AvistamientoDiario.total))
+        .join(Especie, AvistamientoDiario.id_especie == Especie.id)
+        .filter(especie_visible, AvistamientoDiario.total > 0)
+    )
+    if especie_id:
+        query = query.filter(AvistamientoDiario.id_especie == especie_id)
+    if desde:
+        query = query.filter(AvistamientoDiario.dia >= desde)
+    if hasta:
+        query = query.filter(AvistamientoDiario.dia <= hasta)
+
+    filas = query.group_by(periodo).order_by(periodo).all()
+    return [{"periodo": str(p)[:10], "total": int(total)} for p, total in filas]
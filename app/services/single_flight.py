@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import uuid
+from urllib.parse import urlencode
+
+import redis.asyncio as aioredis
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.decoradores import agregar_request, tomar_request
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+# Coordinación entre réplicas: opcional, la local siempre está activa.
+SINGLE_FLIGHT_REDIS = os.getenv("SINGLE_FLIGHT_REDIS", "0") == "1"
+LOCK_PREFIX = "sway:sf:lock:"
+RESULTADO_PREFIX = "sway:sf:resultado:"
+LOCK_MS = 5000
+RESULTADO_MS = 1000
+ESPERA_SEGUNDOS = 0.05
+
+_LIBERAR_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_en_curso = {}
+_async_client = None
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.from_url(REDIS_URL, socket_connect_timeout=2, socket_timeout=2)
+    return _async_client
+
+
+async def coalescer(clave: str, fabrica):
+    """Las llamadas concurrentes con la misma clave esperan una sola ejecución
+    de `fabrica` y reciben el mismo resultado. El shield evita que un cliente
+    que se desconecta cancele el cálculo de los demás."""
+    tarea = _en_curso.get(clave)
+    if tarea is None:
+        tarea = asyncio.ensure_future(fabrica())
+        _en_curso[clave] = tarea
+        tarea.add_done_callback(lambda t: _en_curso.pop(clave, None) if _en_curso.get(clave) is t else None)
+    return await asyncio.shield(tarea)
+
+
+async def _coalescer_entre_replicas(clave: str, fabrica):
+    """Una réplica toma un lock corto en Redis y deja el resultado un momento;
+    las demás lo esperan en vez de repetir las consultas. Si Redis falla o el
+    lock vence sin resultado, cada una calcula por su cuenta."""
+    try:
+        client = _get_async_client()
+        guardado = await client.get(RESULTADO_PREFIX + clave)
+        if guardado is not None:
+            return json.loads(guardado)
+        token = uuid.uuid4().hex
+        tengo_lock = await client.set(LOCK_PREFIX + clave, token, nx=True, px=LOCK_MS)
+    except Exception as e:
+        print(f"[single_flight] sin coordinación en Redis para {clave}: {e}")
+        return await fabrica()
+
+    if tengo_lock:
+        try:
+            resultado = await fabrica()
+            await client.set(RESULTADO_PREFIX + clave, json.dumps(jsonable_encoder(resultado)), px=RESULTADO_MS)
+            return resultado
+        finally:
+            try:
+                await client.eval(_LIBERAR_LOCK, 1, LOCK_PREFIX + clave, token)
+            except Exception as e:
+                print(f"[single_flight] no se pudo liberar el lock de {clave}: {e}")
+
+    limite = asyncio.get_running_loop().time() + LOCK_MS / 1000
+    while asyncio.get_running_loop().time() < limite:
+        await asyncio.sleep(ESPERA_SEGUNDOS)
+        try:
+            guardado = await client.get(RESULTADO_PREFIX + clave)
+        except Exception:
+            break
+        if guardado is not None:
+            return json.loads(guardado)
+    return await fabrica()
+
+
+def single_flight(nombre: str):
+    """Decorador para rutas GET caras: las peticiones idénticas (misma ruta y
+    query string) que llegan mientras otra se calcula comparten su resultado."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = tomar_request(kwargs, agregado)
+            clave = f"{nombre}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+            async def fabrica():
+                # La sesión de la petición se cierra si ese cliente se
+                # desconecta, y el cálculo compartido sigue corriendo: abre
+                # las suyas sobre el mismo engine.
+                async with contextlib.AsyncExitStack() as pila:
+                    propias = {
+                        nombre_arg: await pila.enter_async_context(AsyncSession(bind=valor.bind))
+                        for nombre_arg, valor in kwargs.items() if isinstance(valor, AsyncSession)
+                    }
+                    return await func(*args, **{**kwargs, **propias})
+
+            if SINGLE_FLIGHT_REDIS:
+                return await coalescer(clave, lambda: _coalescer_entre_replicas(clave, fabrica))
+            return await coalescer(clave, fabrica)
+
+        agregado = agregar_request(func, wrapper)
+        return wrapper
+    return decorator
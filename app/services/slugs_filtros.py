@@ -0,0 +1,94 @@
+import threading
+import time
+
+from app.data.models import EstadoConservacion, Habitat
+from app.services.busqueda_especies import plegar
+from app.services.cache_catalogos import CATALOGO_EVENT, DEFAULT_TTL_SECONDS
+
+# Slug del filtro -> fragmentos (sin acentos) que aparecen en el nombre del catálogo.
+HABITAT_SLUGS = {
+    "arrecife": ["arrecife", "coral"],
+    "aguas-profundas": ["profundas", "abisales"],
+    "aguas-abiertas": ["abiertas", "pelagicas", "oceanicas"],
+    "costero": ["costero", "costa", "litoral"],
+    "polar": ["polar", "artico", "antartico"],
+    "manglar": ["manglar", "manglares"],
+    "estuario": ["estuario", "estuarios"],
+}
+CONSERVACION_SLUGS = {
+    "extincion-critica": ["critic"],
+    "peligro": ["peligro"],
+    "vulnerable": ["vulnerable"],
+    "casi-amenazada": ["amenazada"],
+    "preocupacion-menor": ["menor", "preocupacion menor"],
+}
+
+# Un hábitat puede caer en varios filtros; un estado de conservación es un
+# solo nivel, así que cuenta solo para el primer slug que coincide.
+_CATALOGOS = {
+    "habitats": (Habitat, HABITAT_SLUGS, False),
+    "estados_conservacion": (EstadoConservacion, CONSERVACION_SLUGS, True),
+}
+
+
+def _coincidencias(plegado, slugs):
+    return [slug for slug, terminos in slugs.items() if any(t in plegado for t in terminos)]
+
+
+def slug_de_estado(nombre):
+    """Slug de filtro que corresponde a un nombre de estado de conservación
+    (crítico antes que peligro). Lo comparten el filtro, las tarjetas y las
+    estadísticas."""
+    coincidencias = _coincidencias(plegar(nombre or ""), CONSERVACION_SLUGS)
+    return coincidencias[0] if coincidencias else None
+
+
+class RegistroSlugs:
+    """Traduce los slugs de los filtros de especies a los ids del catálogo
+    que les corresponden, para filtrar con `id IN (...)` en vez de una
+    cadena de `ilike` por petición. Se arma con la primera petición que lo
+    necesita y se descarta al llegar `catalogo_updated` del catálogo (o al
+    vencer el TTL, por si el cambio entró por SQL directo)."""
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._mapas = {}
+        self._lock = threading.Lock()
+
+    def ids(self, db, catalogo: str, slug: str):
+        """Ids del catálogo para `slug`, o None si el slug no existe (el
+        filtro se ignora, como antes)."""
+        modelo, slugs, exclusivo = _CATALOGOS[catalogo]
+        if slug not in slugs:
+            return None
+        entrada = self._mapas.get(catalogo)
+        if entrada is None or entrada[1] < time.monotonic():
+            entrada = (self._construir(db, modelo, slugs, exclusivo), time.monotonic() + self.ttl_seconds)
+            with self._lock:
+                self._mapas[catalogo] = entrada
+        return entrada[0][slug]
+
+    @staticmethod
+    def _construir(db, modelo, slugs, exclusivo):
+        mapa = {slug: set() for slug in slugs}
+        for i, nombre in db.query(modelo.id, modelo.nombre):
+            coincidencias = _coincidencias(plegar(nombre), slugs)
+            for slug in coincidencias[:1] if exclusivo else coincidencias:
+                mapa[slug].add(i)
+        return {slug: frozenset(ids) for slug, ids in mapa.items()}
+
+    def invalidate(self, catalogos=None):
+        with self._lock:
+            if catalogos is None:
+                self._mapas.clear()
+            for catalogo in catalogos or ():
+                self._mapas.pop(catalogo, None)
+
+    def handle_event(self, message: dict):
+        if message.get("type") != CATALOGO_EVENT:
+            return
+        catalogos = (message.get("payload") or {}).get("catalogos")
+        self.invalidate(catalogos or None)
+
+
+registro_slugs = RegistroSlugs()
@@ -0,0 +1,86 @@
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Filas que se traen del cursor del servidor por viaje a la base; también es
+# cuántas filas se juntan en cada trozo que se escribe al socket.
+TAMANO_LOTE_STREAM = 500
+MODOS_STREAM = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+def validar_modo_stream(modo) -> None:
+    if modo is not None and modo not in MODOS_STREAM:
+        raise HTTPException(status_code=400, detail="stream debe ser 'json' o 'ndjson'")
+
+
+async def filas_async(bind, sentencia):
+    """Itera una sentencia ORM con un cursor del servidor. Abre su propia
+    sesión sobre el mismo engine: la de la petición se cierra antes de que
+    termine de enviarse el cuerpo."""
+    async with AsyncSession(bind=bind) as db:
+        resultado = await db.stream(sentencia.execution_options(yield_per=TAMANO_LOTE_STREAM))
+        async for fila in resultado:
+            yield fila
+
+
+def filas_sync(bind, sentencia):
+    db = Session(bind=bind)
+    try:
+        yield from db.execute(sentencia.execution_options(yield_per=TAMANO_LOTE_STREAM))
+    finally:
+        db.close()
+
+
+def _abrir(clave, modo):
+    return f'{{"success": true, "{clave}": [' if modo == "json" else ""
+
+
+def _cerrar(modo):
+    return "]}" if modo == "json" else ""
+
+
+def _item(datos, modo, primero):
+    texto = json.dumps(datos, ensure_ascii=False, default=str)
+    if modo == "ndjson":
+        return texto + "\n"
+    return texto if primero else "," + texto
+
+
+async def _cuerpo_async(filas, serializar_fila, clave, modo):
+    yield _abrir(clave, modo)
+    trozo, primero = [], True
+    async for fila in filas:
+        trozo.append(_item(serializar_fila(fila), modo, primero))
+        primero = False
+        if len(trozo) >= TAMANO_LOTE_STREAM:
+            yield "".join(trozo)
+            trozo = []
+    yield "".join(trozo) + _cerrar(modo)
+
+
+def _cuerpo_sync(filas, serializar_fila, clave, modo):
+    yield _abrir(clave, modo)
+    trozo, primero = [], True
+    for fila in filas:
+        trozo.append(_item(serializar_fila(fila), modo, primero))
+        primero = False
+        if len(trozo) >= TAMANO_LOTE_STREAM:
+            yield "".join(trozo)
+            trozo = []
+    yield "".join(trozo) + _cerrar(modo)
+
+
+def respuesta_stream(filas, serializar_fila, clave: str, modo: str) -> StreamingResponse:
+    """Respuesta que se escribe a medida que llegan las filas, con memoria
+    acotada sin importar cuántas sean. En modo `json` el documento es
+    `{"success": true, "<clave>": [...]}`; en `ndjson`, un objeto por línea.
+    `filas` puede ser async (rutas con AsyncSession) o sync, en cuyo caso
+    Starlette lo itera en el threadpool."""
+    if hasattr(filas, "__aiter__"):
+        cuerpo = _cuerpo_async(filas, serializar_fila, clave, modo)
+    else:
+        cuerpo = _cuerpo_sync(filas, serializar_fila, clave, modo)
+    return StreamingResponse(cuerpo, media_type=MODOS_STREAM[modo])
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import UPLOAD_DIR
+
+PREFIJO_UPLOADS = "/api/uploads/"
+TAMANO_TROZO = 64 * 1024
+# mkstemp crea el temporal con 0600 y os.replace lo conserva; las fotos se
+# guardaban con open(..., "wb") y las lee otro usuario (nginx).
+PERMISOS_SUBIDA = 0o644
+
+
+def ruta_de_url(url):
+    """Ruta en disco de una URL servida bajo /api/uploads, o None si la imagen
+    no es nuestra (p. ej. una URL externa)."""
+    if not url or not url.startswith(PREFIJO_UPLOADS):
+        return None
+    relativa = os.path.normpath(url[len(PREFIJO_UPLOADS):])
+    if relativa.startswith("..") or os.path.isabs(relativa):
+        return None
+    return os.path.join(UPLOAD_DIR, relativa)
+
+
+def _descartar(archivo, ruta) -> None:
+    archivo.close()
+    try:
+        os.unlink(ruta)
+    except FileNotFoundError:
+        pass
+
+
+async def guardar_subida(archivo: UploadFile, directorio: str, firmas, max_bytes: int, extension: str) -> str:
+    """Copia la subida a `directorio` por trozos y devuelve el nombre final.
+
+    Nunca tiene el archivo completo en memoria: cada trozo se valida (firma
+    en el primero, tamaño acumulado en todos) y se escribe en un temporal del
+    mismo directorio desde el threadpool, para no bloquear el event loop con
+    el disco. Al terminar se renombra de forma atómica, así nadie ve un
+    archivo a medio escribir; si algo falla el temporal se borra.
+
+    El nombre es el SHA-256 del contenido: un reintento con la misma foto
+    reutiliza el archivo que ya existe, y una URL nunca cambia de contenido,
+    así que se puede cachear para siempre."""
+    await run_in_threadpool(os.makedirs, directorio, exist_ok=True)
+    fd, temporal = await run_in_threadpool(tempfile.mkstemp, dir=directorio, prefix=".subida-")
+    destino = os.fdopen(fd, "wb")
+    try:
+        await run_in_threadpool(os.fchmod, fd, PERMISOS_SUBIDA)
+        total = 0
+        digest = hashlib.sha256()
+        while trozo := await archivo.read(TAMANO_TROZO):
+            if total == 0 and not any(trozo.startswith(firma) for firma in firmas):
+                raise HTTPException(status_code=400, detail="El contenido del archivo no es una imagen JPEG o PNG válida")
+            total += len(trozo)
+            if total > max_bytes:
+                raise HTTPException(status_code=413, detail=f"La imagen supera el límite de {max_bytes // (1024 * 1024)}MB")
+            digest.update(trozo)
+            await run_in_threadpool(destino.write, trozo)
+        if total == 0:
+            raise HTTPException(status_code=400, detail="El archivo está vacío")
+        await run_in_threadpool(destino.close)
+
+        nombre = f"{digest.hexdigest()}{extension}"
+        final = os.path.join(directorio, nombre)
+        if await run_in_threadpool(os.path.exists, final):
+            await run_in_threadpool(os.unlink, temporal)
+        else:
+            await run_in_threadpool(os.replace, temporal, final)
+        return nombre
+    except BaseException:
+        await run_in_threadpool(_descartar, destino, temporal)
+        raise
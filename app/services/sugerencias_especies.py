@@ -0,0 +1,131 @@
+import heapq
+import threading
+from bisect import bisect_left
+
+from sqlalchemy.orm import Session
+
+from app.data.models import Especie
+from app.services.busqueda_especies import plegar
+from app.services.eliminacion_especies import especie_visible
+
+LIMITE_SUGERENCIAS = 8
+
+
+def _claves(nombres):
+    """Claves plegadas de una especie: cada nombre completo y lo que sigue a
+    cada espacio, para que 'laud' encuentre 'Tortuga laúd'."""
+    claves = set()
+    for nombre in nombres:
+        palabras = plegar(nombre).split()
+        for i in range(len(palabras)):
+            claves.add(" ".join(palabras[i:]))
+    return claves
+
+
+class IndiceSugerencias:
+    """Índice por réplica de prefijos de nombres (común y científico) para el
+    autocompletado. Es un arreglo ordenado de (clave, id): buscar es un
+    bisect sin tocar la base. Se arma al suscribirse a `sway:events` y se
+    parchea con los eventos de especies.
+
+    Las lecturas corren en el event loop y los parches en un hilo, sin lock
+    para leer: claves, ids y nombres viven en una sola tupla que cada cambio
+    arma de nuevo y reemplaza de una sola asignación, así un lector nunca ve
+    nombres nuevos con un índice viejo."""
+
+    def __init__(self):
+        self._estado = None  # (claves, ids, nombres)
+        self._lock = threading.Lock()
+
+    @property
+    def cargado(self) -> bool:
+        return self._estado is not None
+
+    def cargar(self, db: Session) -> None:
+        filas = (
+            db.query(Especie.id, Especie.nombre_comun, Especie.nombre_cientifico)
+            .filter(especie_visible)
+            .all()
+        )
+        nombres = {i: (comun or "", cientifico or "") for i, comun, cientifico in filas}
+        entradas = sorted((clave, i) for i, par in nombres.items() for clave in _claves(par))
+        with self._lock:
+            self._estado = ([c for c, _ in entradas], [i for _, i in entradas], nombres)
+
+    def cargar_desde(self, bind) -> None:
+        db = Session(bind=bind)
+        try:
+            self.cargar(db)
+        finally:
+            db.close()
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._estado = None
+
+    def _parchear(self, quitar, agregar: dict) -> None:
+        """Una pasada O(N) sobre el índice más ordenar solo lo agregado; las
+        entradas nuevas se intercalan con un merge en vez de insertarse una a una."""
+        with self._lock:
+            if self._estado is None:
+                return
+            claves, ids, nombres = self._estado
+            afectados = set(quitar) | set(agregar)
+            nuevas = sorted((clave, i) for i, par in agregar.items() for clave in _claves(par))
+            entradas = list(heapq.merge(
+                ((c, i) for c, i in zip(claves, ids) if i not in afectados), nuevas
+            ))
+            nombres = {i: par for i, par in nombres.items() if i not in afectados}
+            nombres.update(agregar)
+            self._estado = ([c for c, _ in entradas], [i for _, i in entradas], nombres)
+
+    def _leer(self, bind, condicion) -> dict:
+        db = Session(bind=bind)
+        try:
+            filas = (
+                db.query(Especie.id, Especie.nombre_comun, Especie.nombre_cientifico)
+                .filter(condicion, especie_visible)
+                .all()
+            )
+        finally:
+            db.close()
+        return {i: (comun or "", cientifico or "") for i, comun, cientifico in filas}
+
+    def handle_event(self, message: dict, bind=None) -> None:
+        """Aplica un evento de `sway:events`. Alta y edición traen los nombres
+        en el payload; la importación masiva solo trae el rango de ids y se
+        lee de la base (por eso esto corre fuera del event loop)."""
+        tipo = message.get("type")
+        payload = message.get("payload") or {}
+        if tipo == "especie_deleted":
+            self._parchear([payload.get("id")], {})
+        elif tipo in ("especie_created", "especie_updated"):
+            especie_id = payload.get("id")
+            if "nombre_cientifico" in payload:
+                par = (payload.get("nombre_comun") or "", payload.get("nombre_cientifico") or "")
+                self._parchear([especie_id], {especie_id: par})
+            elif bind is not None:
+                self._parchear([especie_id], self._leer(bind, Especie.id == especie_id))
+        elif tipo == "especies_importadas" and bind is not None:
+            rango = Especie.id.between(payload.get("primer_id"), payload.get("ultimo_id"))
+            self._parchear([], self._leer(bind, rango))
+
+    def buscar(self, texto: str, limite: int = LIMITE_SUGERENCIAS):
+        prefijo = " ".join(plegar(texto).split())
+        estado = self._estado
+        if not prefijo or estado is None:
+            return []
+        claves, ids, nombres = estado
+        vistos, resultado = set(), []
+        j = bisect_left(claves, prefijo)
+        while j < len(claves) and claves[j].startswith(prefijo) and len(resultado) < limite:
+            especie_id = ids[j]
+            if especie_id not in vistos and especie_id in nombres:
+                vistos.add(especie_id)
+                comun, cientifico = nombres[especie_id]
+                resultado.append({"id": especie_id, "nombre_comun": comun, "nombre_cientifico": cientifico})
+            j += 1
+        return resultado
+
+
+indice_sugerencias = IndiceSugerencias()
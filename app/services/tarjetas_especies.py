@@ -0,0 +1,110 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.data.models import (
+    Especie, EstadoConservacion, Habitat, Amenaza, EspecieHabitat, EspecieAmenaza, TarjetaEspecie
+)
+from app.services.slugs_filtros import slug_de_estado
+
+TAMANO_LOTE_RECONSTRUCCION = 500
+
+
+def mapear_estado_conservacion(nombre_estado: Optional[str]) -> str:
+    """El mismo slug con el que filtra `?conservation=`; sin estado (o uno
+    que no coincide con ningún filtro) la tarjeta dice preocupación menor."""
+    return slug_de_estado(nombre_estado) or "preocupacion-menor"
+
+
+def cargar_habitats_amenazas(db: Session, especie_ids):
+    """Carga hábitats y amenazas de varias especies en una consulta por tabla
+    puente, en vez de dos/tres consultas por tarjeta."""
+    habitats_por_especie = defaultdict(list)
+    amenazas_por_especie = defaultdict(list)
+    if not especie_ids:
+        return habitats_por_especie, amenazas_por_especie
+
+    habitat_rows = (
+        db.query(EspecieHabitat.id_especie, Habitat)
+        .join(Habitat, Habitat.id == EspecieHabitat.id_habitat)
+        .filter(EspecieHabitat.id_especie.in_(especie_ids))
+        .order_by(EspecieHabitat.id_especie, Habitat.id)
+        .all()
+    )
+    for id_especie, habitat in habitat_rows:
+        habitats_por_especie[id_especie].append(habitat)
+
+    amenaza_rows = (
+        db.query(EspecieAmenaza.id_especie, Amenaza)
+        .join(Amenaza, Amenaza.id == EspecieAmenaza.id_amenaza)
+        .filter(EspecieAmenaza.id_especie.in_(especie_ids))
+        .order_by(EspecieAmenaza.id_especie, Amenaza.id)
+        .all()
+    )
+    for id_especie, amenaza in amenaza_rows:
+        amenazas_por_especie[id_especie].append(amenaza)
+
+    return habitats_por_especie, amenazas_por_especie
+
+
+def refrescar_tarjetas(db: Session, especie_ids) -> None:
+    """Recalcula las tarjetas de `especie_ids` dentro de la transacción actual
+    (no hace commit); las de especies que ya no existen se borran."""
+    especie_ids = list(set(especie_ids))
+    if not especie_ids:
+        return
+    db.flush()
+
+    estados = (
+        db.query(Especie.id, EstadoConservacion.nombre)
+        .outerjoin(EstadoConservacion, Especie.id_estado_conservacion == EstadoConservacion.id)
+        .filter(Especie.id.in_(especie_ids))
+        .all()
+    )
+    habitats_por_especie, amenazas_por_especie = cargar_habitats_amenazas(db, especie_ids)
+
+    db.query(TarjetaEspecie).filter(TarjetaEspecie.id_especie.in_(especie_ids)).delete(synchronize_session=False)
+    ahora = datetime.utcnow()
+    for especie_id, estado_nombre in estados:
+        habitats = habitats_por_especie.get(especie_id, [])
+        amenazas = amenazas_por_especie.get(especie_id, [])
+        db.add(TarjetaEspecie(
+            id_especie=especie_id,
+            estado_conservacion=mapear_estado_conservacion(estado_nombre),
+            habitat_ids=[h.id for h in habitats],
+            habitats=[h.nombre for h in habitats],
+            amenaza_ids=[a.id for a in amenazas],
+            amenazas=[a.nombre for a in amenazas],
+            actualizado=ahora,
+        ))
+
+
+def reconstruir_tarjetas(db: Session) -> int:
+    """Recalcula todas las tarjetas por lotes; para llenar la tabla en una base
+    existente o después de renombrar hábitats, amenazas o estados."""
+    total = 0
+    ultimo_id = 0
+    while True:
+        ids = [
+            fila.id for fila in
+            db.query(Especie.id).filter(Especie.id > ultimo_id)
+            .order_by(Especie.id).limit(TAMANO_LOTE_RECONSTRUCCION).all()
+        ]
+        if not ids:
+            return total
+        refrescar_tarjetas(db, ids)
+        db.commit()
+        total += len(ids)
+        ultimo_id = ids[-1]
+
+
+if __name__ == "__main__":
+    from app.data.database import sessionLocal
+
+    sesion = sessionLocal()
+    try:
+        print(f"Tarjetas recalculadas: {reconstruir_tarjetas(sesion)}")
+    finally:
+        sesion.close()
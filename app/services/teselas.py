@@ -0,0 +1,48 @@
+import math
+
+from fastapi import HTTPException
+
+# Teselas XYZ de Web Mercator, como las de OpenStreetMap/Leaflet.
+ZOOM_MAXIMO = 18
+LATITUD_MAXIMA = 85.05112878
+# Cada tesela se parte en CELDAS x CELDAS grupos (32 px en una tesela de 256).
+CELDAS_POR_LADO = 8
+
+
+def latitud_de_fila(fila: float, n: int) -> float:
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * fila / n))))
+
+
+def validar_tesela(z: int, x: int, y: int) -> None:
+    if not 0 <= z <= ZOOM_MAXIMO:
+        raise HTTPException(status_code=400, detail=f"z debe estar entre 0 y {ZOOM_MAXIMO}")
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tesela fuera del mapa")
+
+
+def limites_tesela(z: int, x: int, y: int):
+    """(oeste, sur, este, norte) en grados."""
+    n = 2 ** z
+    return x / n * 360 - 180, latitud_de_fila(y + 1, n), (x + 1) / n * 360 - 180, latitud_de_fila(y, n)
+
+
+def tesela_de_punto(latitud: float, longitud: float, z: int):
+    n = 2 ** z
+    latitud = max(min(latitud, LATITUD_MAXIMA), -LATITUD_MAXIMA)
+    x = int((longitud + 180) / 360 * n)
+    fila = (1 - math.asinh(math.tan(math.radians(latitud))) / math.pi) / 2 * n
+    return min(x, n - 1), min(max(int(fila), 0), n - 1)
+
+
+def claves_tesela(z: int, x: int, y: int, **_):
+    # "especies": borrar una especie oculta sus avistamientos de todas las teselas.
+    return [f"tesela:{z}/{x}/{y}", "especies"]
+
+
+def claves_teselas_de_punto(latitud, longitud):
+    """Una tesela por nivel de zoom: las únicas cuya respuesta cambia cuando
+    se agrega o borra un avistamiento en ese punto."""
+    if latitud is None or longitud is None:
+        return []
+    return [f"tesela:{z}/{x}/{y}" for z in range(ZOOM_MAXIMO + 1)
+            for x, y in [tesela_de_punto(float(latitud), float(longitud), z)]]
@@ -0,0 +1,124 @@
+import functools
+import hashlib
+import os
+import uuid
+
+import redis.asyncio as aioredis
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from app.services.decoradores import agregar_request, tomar_request
+from app.services.teselas import claves_teselas_de_punto
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+VERSION_PREFIX = "sway:version:"
+# Si Redis pierde los contadores vuelven a 0 y un ETag viejo podría volver a
+# coincidir; la época aleatoria cambia en ese caso y descarta todos los ETags.
+EPOCH_KEY = VERSION_PREFIX + "epoca"
+
+_async_client = None
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.from_url(REDIS_URL, socket_connect_timeout=2, socket_timeout=2)
+    return _async_client
+
+
+def claves_para_evento(event_type: str, payload: dict) -> list:
+    """Qué versiones sube cada evento de `publish_event`."""
+    payload = payload or {}
+    entidad_id = payload.get("id")
+    if event_type == "especie_eliminacion_progreso":
+        # El listado ya cambió al marcarla; los lotes no afectan lo que se ve.
+        return []
+    if event_type.startswith("especie_"):
+        claves = ["especies"]
+        if entidad_id is not None:
+            claves.append(f"especie:{entidad_id}")
+        return claves
+    if event_type == "especies_importadas":
+        return ["especies"]
+    if event_type.startswith("evento_"):
+        claves = ["eventos"]
+        if entidad_id is not None:
+            claves.append(f"evento:{entidad_id}")
+        return claves
+    if event_type == "avistamientos_created":
+        teselas = set()
+        for avistamiento in payload.get("avistamientos", []):
+            teselas.update(claves_teselas_de_punto(avistamiento.get("latitud"), avistamiento.get("longitud")))
+        return ["avistamientos"] + sorted(teselas)
+    if event_type.startswith("avistamiento_"):
+        return ["avistamientos"] + claves_teselas_de_punto(payload.get("latitud"), payload.get("longitud"))
+    if event_type.startswith("producto"):
+        return ["productos"] + [f"producto:{i}" for i in payload.get("ids", [])]
+    if event_type == "catalogo_updated":
+        return [f"catalogo:{c}" for c in payload.get("catalogos", [])]
+    return []
+
+
+def incrementar_versiones(client, claves) -> None:
+    if not claves:
+        return
+    pipe = client.pipeline(transaction=False)
+    for clave in claves:
+        pipe.incr(VERSION_PREFIX + clave)
+    pipe.execute()
+
+
+async def obtener_versiones(claves) -> list:
+    client = _get_async_client()
+    valores = await client.mget([EPOCH_KEY] + [VERSION_PREFIX + c for c in claves])
+    if valores[0] is None:
+        await client.set(EPOCH_KEY, uuid.uuid4().hex, nx=True)
+        valores[0] = await client.get(EPOCH_KEY)
+    return [(v.decode() if isinstance(v, bytes) else v) or "0" for v in valores]
+
+
+def calcular_etag(versiones, request: Request) -> str:
+    huella = "|".join([
+        *versiones,
+        request.url.query,
+        request.headers.get("authorization", ""),
+    ])
+    return '"' + hashlib.sha1(huella.encode()).hexdigest()[:20] + '"'
+
+
+def coincide_etag(if_none_match: str, etag: str) -> bool:
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos or f"W/{etag}" in candidatos
+
+
+def conditional_get(claves):
+    """Decorador para rutas GET: responde 304 sin ejecutar la ruta (ni tocar la
+    base) cuando el If-None-Match coincide con el ETag calculado a partir de
+    las versiones en Redis. `claves` es una lista fija o una función que recibe
+    los parámetros de la ruta. Si Redis no responde, la ruta se sirve normal."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = tomar_request(kwargs, agregado)
+            lista = claves(**kwargs) if callable(claves) else claves
+            try:
+                etag = calcular_etag(await obtener_versiones(lista), request)
+            except Exception as e:
+                print(f"[versiones] sin ETag para {request.url.path}: {e}")
+                etag = None
+
+            headers = {"ETag": etag, "Vary": "Authorization"} if etag else {}
+            if etag and coincide_etag(request.headers.get("if-none-match", ""), etag):
+                return Response(status_code=304, headers=headers)
+
+            resultado = await func(*args, **kwargs)
+            if not isinstance(resultado, Response):
+                resultado = JSONResponse(jsonable_encoder(resultado))
+            resultado.headers.update(headers)
+            return resultado
+
+        agregado = agregar_request(func, wrapper)
+        return wrapper
+    return decorator
@@ -1,20 +1,36 @@
-from sqlalchemy import create_engine
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# Sin Redis en las pruebas: un puerto cerrado falla al instante, en vez de
+# esperar a que el DNS no resuelva el host `redis` de docker-compose.
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1")
+
 from app.main import app
-from app.data.database import get_db, Base
+from app.data.database import get_db, get_async_db, Base
 from app.security.api_key import require_api_key
 from app.data.models import Estatus
 
+# Archivo temporal en vez de :memory: — el engine sync (fixtures y rutas de
+# escritura) y el async (rutas de lectura) necesitan ver la misma base.
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="sway-test-"), "sway_test.db")
+
 engine = create_engine(
-    "sqlite:///:memory:",
+    f"sqlite:///{TEST_DB_PATH}",
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
 TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base.metadata.create_all(engine)
 
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}")
+AsyncTestSession = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 db = TestSession()
 if not db.query(Estatus).filter(Estatus.nombre == "Cancelado").first():
     db.add(Estatus(nombre="Cancelado"))
@@ -30,5 +46,116 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with AsyncTestSession() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 app.dependency_overrides[require_api_key] = lambda: True
+
+
+@pytest.fixture
+def contar_sql():
+    """`contar_sql(fn, prefijos=None)` corre `fn` y devuelve `(resultado,
+    sentencias)` con el SQL que llegó a la base por cualquiera de los dos
+    engines; `prefijos` (p. ej. "SELECT") filtra por tipo de sentencia."""
+    motores = (engine, async_engine.sync_engine)
+
+    def _contar(fn, prefijos=None):
+        sentencias = []
+
+        def _registrar(conn, cursor, statement, parameters, context, executemany):
+            if prefijos is None or statement.lstrip().upper().startswith(prefijos):
+                sentencias.append(statement)
+
+        for motor in motores:
+            event.listen(motor, "before_cursor_execute", _registrar)
+        try:
+            resultado = fn()
+        finally:
+            for motor in motores:
+                event.remove(motor, "before_cursor_execute", _registrar)
+        return resultado, sentencias
+
+    return _contar
+
+
+class _Pipeline:
+    def __init__(self, redis_falso):
+        self.redis = redis_falso
+        self.operaciones = []
+
+    def __getattr__(self, nombre):
+        def _encolar(*args, **kwargs):
+            self.operaciones.append((nombre, args, kwargs))
+            return self
+        return _encolar
+
+    def execute(self):
+        return [getattr(self.redis, nombre)(*args, **kwargs) for nombre, args, kwargs in self.operaciones]
+
+
+class _PipelineAsync(_Pipeline):
+    async def execute(self):
+        return _Pipeline.execute(self)
+
+
+class RedisFalso:
+    """Redis en memoria con lo que usan publish_event, las versiones de los
+    ETag y la caché de respuestas. Como redis-py, devuelve bytes."""
+
+    def __init__(self):
+        self.datos = {}
+
+    def pipeline(self, transaction=False):
+        return _Pipeline(self)
+
+    def get(self, clave):
+        return self.datos.get(clave)
+
+    def mget(self, claves):
+        return [self.datos.get(clave) for clave in claves]
+
+    def set(self, clave, valor, ex=None, nx=False):
+        if nx and clave in self.datos:
+            return None
+        self.datos[clave] = valor.encode() if isinstance(valor, str) else valor
+        return True
+
+    def sadd(self, clave, miembro):
+        self.datos.setdefault(clave, set()).add(miembro)
+
+    def smembers(self, clave):
+        return set(self.datos.get(clave, set()))
+
+    def expire(self, clave, segundos):
+        pass
+
+    def incr(self, clave):
+        self.datos[clave] = str(int(self.datos.get(clave, 0)) + 1).encode()
+
+    def delete(self, *claves):
+        for clave in claves:
+            self.datos.pop(clave, None)
+
+    def publish(self, canal, mensaje):
+        pass
+
+
+class RedisFalsoAsync:
+    """El mismo `RedisFalso` visto como cliente de redis.asyncio."""
+
+    def __init__(self, redis_falso):
+        self.redis = redis_falso
+
+    def pipeline(self, transaction=False):
+        return _PipelineAsync(self.redis)
+
+    def __getattr__(self, nombre):
+        metodo = getattr(self.redis, nombre)
+
+        async def _llamar(*args, **kwargs):
+            return metodo(*args, **kwargs)
+        return _llamar
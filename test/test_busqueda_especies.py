@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
+from app.main import app
+from app.data.models import Especie
+from app.services.busqueda_especies import aplicar_busqueda, plegar, _busqueda_postgres
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def test_plegar_quita_acentos_y_mayusculas():
+    assert plegar("Tortuga Laúd") == "tortuga laud"
+    assert plegar("Ártico PINGÜINO") == "artico pinguino"
+
+
+def test_busqueda_vacia_no_filtra():
+    db = TestSession()
+    query = db.query(Especie)
+    filtrada, rank = aplicar_busqueda(db, query, "   ")
+    assert filtrada is query
+    assert rank is None
+    db.close()
+
+
+def test_busqueda_postgres_usa_tsvector_y_trigramas():
+    query, rank = _busqueda_postgres(Query(Especie), "tortuga laúd")
+    sql = str(query.statement.compile(dialect=postgresql.psycopg.dialect()))
+    assert "especies.busqueda @@ websearch_to_tsquery" in sql
+    assert "sway_unaccent(lower(especies.nombre_comun)) %%" in sql
+    assert rank is not None
+
+
+def test_busqueda_fallback_sqlite_por_nombre():
+    db = TestSession()
+    db.add(Especie(nombre_comun="Manatí del Caribe", nombre_cientifico="Trichechus manatus"))
+    db.commit()
+    db.close()
+
+    resp = client.get("/api/especies/busqueda-avanzada", params={"nombre_cientifico": "trichechus"})
+    assert resp.status_code == 200
+    nombres = [e["nombre_comun"] for e in resp.json()["especies"]]
+    assert "Manatí del Caribe" in nombres
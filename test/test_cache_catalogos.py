@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Habitat
+from app.services.cache_catalogos import CatalogCache, catalog_cache
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def test_habitats_se_sirve_desde_cache_sin_tocar_la_base(contar_sql):
+    catalog_cache.invalidate()
+    primera, sql_primera = contar_sql(lambda: client.get("/api/habitats"))
+    segunda, sql_segunda = contar_sql(lambda: client.get("/api/habitats"))
+
+    assert primera.status_code == 200
+    assert segunda.status_code == 200
+    assert segunda.content == primera.content
+    assert sql_primera
+    assert sql_segunda == []
+
+
+def test_evento_catalogo_updated_invalida_solo_lo_afectado():
+    catalog_cache.invalidate()
+    client.get("/api/habitats")
+    client.get("/api/amenazas")
+
+    db = TestSession()
+    db.add(Habitat(nombre="Pradera de pastos marinos"))
+    db.commit()
+    db.close()
+
+    catalog_cache.handle_event({"type": "catalogo_updated", "payload": {"catalogos": ["habitats"]}})
+
+    assert catalog_cache.get("amenazas") is not None
+    nombres = [h["nombre"] for h in client.get("/api/habitats").json()["habitats"]]
+    assert "Pradera de pastos marinos" in nombres
+
+
+def test_opciones_filtros_depende_de_habitats():
+    catalog_cache.invalidate()
+    client.get("/api/especies/opciones-filtros")
+    assert catalog_cache.get("opciones_filtros") is not None
+
+    catalog_cache.handle_event({"type": "catalogo_updated", "payload": {"catalogos": ["habitats"]}})
+    assert catalog_cache.get("opciones_filtros") is None
+
+
+def test_otros_eventos_no_invalidan():
+    cache = CatalogCache()
+    cache.set("habitats", b"{}", ["habitats"])
+    cache.handle_event({"type": "especie_created", "payload": {"id": 1}})
+    assert cache.get("habitats") == b"{}"
+
+
+def test_entrada_expira_por_ttl():
+    cache = CatalogCache(ttl_seconds=-1)
+    cache.set("habitats", b"{}", ["habitats"])
+    assert cache.get("habitats") is None
+
+
+def test_setup_tienda_invalida_y_publica():
+    catalog_cache.invalidate()
+    client.get("/api/categorias")
+    assert catalog_cache.get("categorias") is not None
+
+    with patch("app.services.cache_catalogos.publish_event") as mock_publish:
+        resp = client.post("/api/setup-tienda")
+    assert resp.status_code == 200
+    assert catalog_cache.get("categorias") is None
+    mock_publish.assert_called_once_with("catalogo_updated", {"catalogos": ["categorias", "materiales"]})
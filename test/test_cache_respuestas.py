@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie
+from app.services import cache_respuestas, realtime_publish
+from conftest import RedisFalso, RedisFalsoAsync, TestSession
+
+client = TestClient(app)
+
+
+def _con_redis_falso():
+    redis_falso = RedisFalso()
+    return redis_falso, (
+        patch.object(cache_respuestas, "_get_async_client", return_value=RedisFalsoAsync(redis_falso)),
+        patch.object(realtime_publish, "_get_client", return_value=redis_falso),
+    )
+
+
+def test_lista_de_especies_se_sirve_de_redis_y_se_purga_por_surrogate_key(contar_sql):
+    db = TestSession()
+    db.add(Especie(nombre_comun="Compartida", nombre_cientifico="Communis cachei"))
+    db.commit()
+    db.close()
+
+    redis_falso, parches = _con_redis_falso()
+    with parches[0], parches[1]:
+        params = {"search": "Compartida", "page": 1}
+        primera = client.get("/api/especies", params=params)
+        assert primera.headers["x-cache"] == "MISS"
+
+        # mismo query string en otro orden -> misma entrada
+        segunda, sentencias = contar_sql(
+            lambda: client.get("/api/especies", params={"page": 1, "search": "Compartida"})
+        )
+        assert segunda.headers["x-cache"] == "HIT"
+        assert segunda.json() == primera.json()
+        assert sentencias == []
+
+        realtime_publish.publish_event("especie_updated", {"id": 1})
+        assert not redis_falso.smembers(cache_respuestas.SURROGATE_PREFIX + "especies")
+        assert client.get("/api/especies", params=params).headers["x-cache"] == "MISS"
+
+
+def test_eventos_separa_entradas_por_alcance_de_autenticacion():
+    redis_falso, parches = _con_redis_falso()
+    with parches[0], parches[1]:
+        assert client.get("/api/eventos").headers["x-cache"] == "MISS"
+        assert client.get("/api/eventos").headers["x-cache"] == "HIT"
+        con_token = client.get("/api/eventos", headers={"Authorization": "Bearer otro"})
+        assert con_token.headers["x-cache"] == "MISS"
+
+        realtime_publish.publish_event("evento_created", {"id": 9})
+        assert client.get("/api/eventos").headers["x-cache"] == "MISS"
+
+
+def test_sin_redis_la_ruta_responde_sin_cache():
+    class _Caido:
+        async def get(self, clave):
+            raise ConnectionError("redis no disponible")
+
+    with patch.object(cache_respuestas, "_get_async_client", return_value=_Caido()):
+        resp = client.get("/api/eventos")
+    assert resp.status_code == 200
+    assert resp.json()["success"] is True
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, Producto, Avistamiento, Usuario
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def test_especies_fields_devuelve_solo_lo_pedido_sin_unir_tarjeta(contar_sql):
+    db = TestSession()
+    db.add_all([Especie(nombre_comun=f"Recortada {i}", nombre_cientifico="Parcialis",
+                        descripcion="x" * 500) for i in range(2)])
+    db.commit()
+    db.close()
+
+    params = {"search": "Recortada", "total": "ninguno"}
+    completo = client.get("/api/especies", params=params).json()["especies"]
+    resp, sentencias = contar_sql(
+        lambda: client.get("/api/especies", params={**params, "fields": "nombre,imagen"})
+    )
+
+    assert resp.status_code == 200
+    recortado = resp.json()["especies"]
+    assert [set(e) for e in recortado] == [{"id", "nombre", "imagen"}] * 2
+    assert [(e["id"], e["nombre"]) for e in recortado] == [(e["id"], e["nombre"]) for e in completo]
+    sql = " ".join(sentencias).lower()
+    assert "tarjetasespecies" not in sql
+    assert "descripcion" not in sql
+
+    con_grupo = client.get("/api/especies", params={**params, "include": "habitats"}).json()["especies"]
+    assert set(con_grupo[0]) == {"id", "habitats", "habitat_ids", "habitat", "ubicacion"}
+    assert con_grupo[0]["habitats"] == completo[0]["habitats"]
+
+
+def test_fields_desconocido_responde_400():
+    resp = client.get("/api/especies", params={"fields": "nombre,contrasena"})
+    assert resp.status_code == 400
+    assert "contrasena" in resp.json()["detail"]
+    assert client.get("/api/productos", params={"include": "proveedor"}).status_code == 400
+
+
+def test_productos_y_avistamientos_con_fields():
+    db = TestSession()
+    producto = Producto(nombre="Termo parcial", precio=25, activo=True, fecha_agregado=datetime(2026, 2, 1))
+    especie = Especie(nombre_comun="Vista parcial", nombre_cientifico="Visus")
+    usuario = Usuario(nombre="Parcial", apellido_paterno="Test", email="campos@demo-sway.com", activo=True)
+    db.add_all([producto, especie, usuario])
+    db.commit()
+    db.add(Avistamiento(id_especie=especie.id, id_usuario=usuario.id, fecha=datetime(2026, 2, 2),
+                        latitud=19.4, longitud=-99.1))
+    db.commit()
+    especie_id = especie.id
+    db.close()
+
+    productos = client.get("/api/productos", params={"busqueda": "Termo parcial", "fields": "name,price",
+                                                     "include": "resenas"}).json()["products"]
+    assert productos == [{"id": productos[0]["id"], "name": "Termo parcial", "price": 25.0,
+                          "average_rating": 0.0, "total_reviews": 0}]
+
+    avistamientos = client.get("/api/avistamientos", params={"especie_id": especie_id,
+                                                            "fields": "latitud,longitud"}).json()["avistamientos"]
+    assert len(avistamientos) == 1
+    assert set(avistamientos[0]) == {"id", "latitud", "longitud"}
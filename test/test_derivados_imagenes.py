@@ -0,0 +1,110 @@
+import io
+import os
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.main import app
+from app.config import UPLOAD_DIR
+from app.data.models import Especie, Avistamiento, Usuario
+from app.security.auth import get_current_colaborador
+from app.services.derivados_imagenes import VARIANTES, rellenar_variantes
+from app.services.subidas import ruta_de_url
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _jpeg_con_exif(ancho=1600, alto=1200):
+    imagen = Image.new("RGB", (ancho, alto), (30, 120, 200))
+    exif = Image.Exif()
+    exif[0x010F] = "Camara de prueba"  # Make
+    buffer = io.BytesIO()
+    imagen.save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def _seed_avistamiento(foto_url=None):
+    db = TestSession()
+    especie = Especie(nombre_comun="Foca derivada", nombre_cientifico="Phoca variantis")
+    usuario = db.query(Usuario).filter(Usuario.email == "derivados@demo-sway.com").first()
+    if not usuario:
+        usuario = Usuario(nombre="Derivados", apellido_paterno="Test", email="derivados@demo-sway.com", activo=True)
+    db.add_all([especie, usuario])
+    db.commit()
+    avistamiento = Avistamiento(id_especie=especie.id, id_usuario=usuario.id, foto_url=foto_url)
+    db.add(avistamiento)
+    db.commit()
+    avistamiento_id = avistamiento.id
+    db.close()
+    return avistamiento_id
+
+
+@pytest.fixture(autouse=True)
+def _colaborador_y_limpieza():
+    app.dependency_overrides[get_current_colaborador] = lambda: {"colaborador_id": 1, "token_type": "colaborador"}
+    yield
+    app.dependency_overrides.pop(get_current_colaborador, None)
+    if os.path.isdir(UPLOAD_DIR):
+        shutil.rmtree(UPLOAD_DIR)
+
+
+def _verificar_variantes(variantes):
+    assert set(variantes) == set(VARIANTES)
+    for variante, lado in VARIANTES.items():
+        with Image.open(ruta_de_url(variantes[variante])) as imagen:
+            assert max(imagen.size) == lado
+            assert not imagen.getexif()
+
+
+def test_subida_genera_variantes_sin_metadatos(monkeypatch):
+    publicados = []
+    monkeypatch.setattr("app.routers.estadisticas.publish_event", lambda t, p: publicados.append((t, p)))
+    monkeypatch.setattr("app.services.derivados_imagenes.publish_event", lambda t, p: publicados.append((t, p)))
+
+    avistamiento_id = _seed_avistamiento()
+    resp = client.post(
+        f"/api/avistamientos/{avistamiento_id}/foto",
+        files={"foto": ("foto.jpg", io.BytesIO(_jpeg_con_exif()), "image/jpeg")},
+    )
+    assert resp.status_code == 200
+    foto_url = resp.json()["foto_url"]
+
+    db = TestSession()
+    variantes = db.get(Avistamiento, avistamiento_id).foto_variantes
+    db.close()
+    _verificar_variantes(variantes)
+    assert publicados[-1] == ("avistamiento_updated",
+                              {"id": avistamiento_id, "foto_url": foto_url, "foto_variantes": variantes})
+
+
+def test_rellenar_variantes_de_fotos_existentes():
+    os.makedirs(os.path.join(UPLOAD_DIR, "avistamientos"), exist_ok=True)
+    with open(os.path.join(UPLOAD_DIR, "avistamientos", "previa.jpg"), "wb") as f:
+        f.write(_jpeg_con_exif(900, 300))
+    con_foto = _seed_avistamiento("/api/uploads/avistamientos/previa.jpg")
+    externa = _seed_avistamiento("https://example.org/foto.jpg")
+
+    db = TestSession()
+    assert rellenar_variantes(db) >= 1
+    _verificar_variantes(db.get(Avistamiento, con_foto).foto_variantes)
+    assert db.get(Avistamiento, externa).foto_variantes is None
+    db.close()
+
+
+def test_ruta_de_url_no_sale_de_uploads():
+    assert ruta_de_url("/api/uploads/../app/main.py") is None
+    assert ruta_de_url("https://example.org/x.jpg") is None
+
+
+def test_imagen_con_demasiados_pixeles_no_se_descomprime(tmp_path, monkeypatch):
+    from app.services import derivados_imagenes
+
+    ruta = tmp_path / "enorme.png"
+    Image.new("L", (400, 300)).save(ruta)
+    monkeypatch.setattr(derivados_imagenes, "MAX_PIXELES_FOTO", 100_000)
+    with pytest.raises(ValueError):
+        derivados_imagenes.generar_variantes(str(ruta))
+    assert os.listdir(tmp_path) == ["enorme.png"]
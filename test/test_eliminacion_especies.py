@@ -0,0 +1,86 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, Avistamiento, Usuario, EspecieHabitat, Habitat
+from app.security.auth import get_current_colaborador
+from app.services import eliminacion_especies
+from app.services.versiones import claves_para_evento
+from conftest import TestSession, engine
+
+client = TestClient(app)
+
+
+def _seed_especie_con_avistamientos(cantidad, marcada=False):
+    db = TestSession()
+    especie = Especie(nombre_comun="Borrable", nombre_cientifico="Deletus maximus",
+                      eliminada_en=datetime.utcnow() if marcada else None)
+    habitat = Habitat(nombre="Hábitat borrable")
+    usuario = Usuario(nombre="Borra", apellido_paterno="Test", email=f"borrado{cantidad}{marcada}@demo-sway.com", activo=True)
+    db.add_all([especie, habitat, usuario])
+    db.commit()
+    db.add(EspecieHabitat(id_especie=especie.id, id_habitat=habitat.id))
+    db.add_all([Avistamiento(id_especie=especie.id, id_usuario=usuario.id, fecha=datetime(2026, 5, 1))
+                for _ in range(cantidad)])
+    db.commit()
+    especie_id = especie.id
+    db.close()
+    return especie_id
+
+
+def _existe(especie_id):
+    db = TestSession()
+    try:
+        return db.get(Especie, especie_id) is not None
+    finally:
+        db.close()
+
+
+def test_delete_oculta_al_instante_y_borra_por_lotes_con_progreso():
+    especie_id = _seed_especie_con_avistamientos(5)
+    app.dependency_overrides[get_current_colaborador] = lambda: {"colaborador_id": 1, "token_type": "colaborador"}
+    try:
+        with patch.object(eliminacion_especies, "TAMANO_LOTE_ELIMINACION", 2), \
+                patch("app.routers.especies.publish_event") as publish_ruta, \
+                patch("app.services.eliminacion_especies.publish_event") as publish_tarea:
+            resp = client.delete(f"/api/especies/{especie_id}")
+    finally:
+        app.dependency_overrides.pop(get_current_colaborador, None)
+
+    assert resp.status_code == 202
+    assert resp.json()["en_proceso"] is True
+    publish_ruta.assert_called_once_with("especie_deleted", {"id": especie_id})
+
+    eventos = [c.args for c in publish_tarea.call_args_list]
+    progreso = [p for tipo, p in eventos if tipo == eliminacion_especies.PROGRESO_EVENT]
+    assert [p["borrados"] for p in progreso] == [2, 4, 5]
+    assert all(p["total"] == 5 for p in progreso)
+    assert eventos[-1] == (eliminacion_especies.COMPLETADA_EVENT, {"id": especie_id, "avistamientos_borrados": 5})
+
+    assert not _existe(especie_id)
+    db = TestSession()
+    assert db.query(Avistamiento).filter(Avistamiento.id_especie == especie_id).count() == 0
+    assert db.query(EspecieHabitat).filter(EspecieHabitat.id_especie == especie_id).count() == 0
+    db.close()
+
+
+def test_especie_marcada_no_se_muestra_y_se_reanuda_al_arrancar():
+    especie_id = _seed_especie_con_avistamientos(3, marcada=True)
+
+    assert client.get(f"/api/especies/{especie_id}").status_code == 404
+    listado = client.get("/api/especies", params={"search": "Borrable", "total": "ninguno"}).json()
+    assert especie_id not in [e["id"] for e in listado["especies"]]
+    avistamientos = client.get("/api/avistamientos", params={"especie_id": especie_id}).json()
+    assert avistamientos["avistamientos"] == []
+
+    with patch("app.services.eliminacion_especies.publish_event"):
+        eliminacion_especies.reanudar_eliminaciones(engine)
+    assert not _existe(especie_id)
+
+
+def test_progreso_no_sube_versiones_pero_el_borrado_si():
+    assert claves_para_evento("especie_eliminacion_progreso", {"id": 7, "borrados": 1000, "total": 5000}) == []
+    assert claves_para_evento("especie_eliminacion_completada", {"id": 7}) == ["especies", "especie:7"]
+    assert claves_para_evento("especie_deleted", {"id": 7}) == ["especies", "especie:7"]
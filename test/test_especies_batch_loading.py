@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import (
+    EstadoConservacion, Especie, Habitat, Amenaza, EspecieHabitat, EspecieAmenaza
+)
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _seed_especies(cantidad):
+    db = TestSession()
+    estado = EstadoConservacion(nombre="Vulnerable")
+    habitat = Habitat(nombre="Arrecife de coral")
+    amenaza = Amenaza(nombre="Blanqueamiento")
+    db.add_all([estado, habitat, amenaza])
+    db.commit()
+    ids = []
+    for i in range(cantidad):
+        especie = Especie(nombre_comun=f"Batch {i:02d}", nombre_cientifico=f"Batchus {i}",
+                           id_estado_conservacion=estado.id)
+        db.add(especie)
+        db.commit()
+        db.add_all([
+            EspecieHabitat(id_especie=especie.id, id_habitat=habitat.id),
+            EspecieAmenaza(id_especie=especie.id, id_amenaza=amenaza.id),
+        ])
+        db.commit()
+        ids.append(especie.id)
+    habitat_id, amenaza_id = habitat.id, amenaza.id
+    db.close()
+    return ids, habitat_id, amenaza_id
+
+
+def test_listado_especies_usa_numero_constante_de_queries(contar_sql):
+    _seed_especies(12)
+
+    pequeña, selects_pequeña = contar_sql(
+        lambda: client.get("/api/especies", params={"search": "Batch", "limit": 3}), prefijos="SELECT"
+    )
+    grande, selects_grande = contar_sql(
+        lambda: client.get("/api/especies", params={"search": "Batch", "limit": 12}), prefijos="SELECT"
+    )
+
+    assert pequeña.status_code == 200
+    assert grande.status_code == 200
+    assert len(grande.json()["especies"]) == 12
+    assert len(selects_pequeña) == len(selects_grande)
+    assert 0 < len(selects_grande) <= 4
+
+
+def test_listado_especies_agrupa_habitats_y_amenazas_por_especie():
+    ids, habitat_id, amenaza_id = _seed_especies(2)
+
+    resp = client.get("/api/especies", params={"search": "Batch", "limit": 100})
+    assert resp.status_code == 200
+    tarjetas = {e["id"]: e for e in resp.json()["especies"]}
+    for especie_id in ids:
+        assert tarjetas[especie_id]["habitat_ids"] == [habitat_id]
+        assert tarjetas[especie_id]["amenaza_ids"] == [amenaza_id]
+        assert tarjetas[especie_id]["habitats"] == ["Arrecife de coral"]
@@ -0,0 +1,108 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, EspecieHabitat, EstadoConservacion, Habitat, TarjetaEspecie
+from app.services.estadisticas_especies import EstadisticasEspecies, calcular_estadisticas, estadisticas_especies
+from app.services.slugs_filtros import RegistroSlugs
+from app.services.tarjetas_especies import refrescar_tarjetas
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _seed():
+    db = TestSession()
+    critico = EstadoConservacion(nombre="En Peligro Crítico")
+    vulnerable = EstadoConservacion(nombre="Vulnerable")
+    habitat = Habitat(nombre="Bosque de kelp agregado")
+    db.add_all([critico, vulnerable, habitat])
+    db.commit()
+    especies = [
+        Especie(nombre_comun="Agregada 1", nombre_cientifico="Aggregatus", id_estado_conservacion=critico.id),
+        Especie(nombre_comun="Agregada 2", nombre_cientifico="Aggregatus", id_estado_conservacion=vulnerable.id),
+        Especie(nombre_comun="Agregada 3", nombre_cientifico="Aggregatus", id_estado_conservacion=vulnerable.id,
+                fecha_agregado=datetime.utcnow() - timedelta(days=400)),
+    ]
+    db.add_all(especies)
+    db.commit()
+    db.add_all([EspecieHabitat(id_especie=e.id, id_habitat=habitat.id) for e in especies[:2]])
+    db.commit()
+    nombre = habitat.nombre
+    db.close()
+    return nombre
+
+
+def test_contadores_en_una_sola_consulta(contar_sql):
+    habitat = _seed()
+    db = TestSession()
+    try:
+        stats, sentencias = contar_sql(lambda: calcular_estadisticas(db, habitat=habitat))
+    finally:
+        db.close()
+
+    assert len(sentencias) == 1
+    assert stats == {
+        "total": 2,
+        "por_estado": {"extincion-critica": 1, "vulnerable": 1},
+        "agregadas_hoy": 2,
+        "agregadas_mes": 2,
+        "habitats_representados": 1,
+    }
+
+
+def test_cache_por_filtros_hasta_el_siguiente_evento_de_especie():
+    estadisticas_especies.invalidate()
+    antes = client.get("/api/especies/estadisticas").json()["estadisticas"]
+
+    db = TestSession()
+    db.add(Especie(nombre_comun="Agregada tardía", nombre_cientifico="Aggregatus"))
+    db.commit()
+    db.close()
+    assert client.get("/api/especies/estadisticas").json()["estadisticas"] == antes
+
+    estadisticas_especies.handle_event({"type": "especie_created", "payload": {"id": 1}})
+    despues = client.get("/api/especies/estadisticas").json()["estadisticas"]
+    assert despues["total_especies"] == antes["total_especies"] + 1
+    assert despues["especies_agregadas_hoy"] == antes["especies_agregadas_hoy"] + 1
+
+
+def test_cache_acotada_por_filtros():
+    cache = EstadisticasEspecies(max_entradas=3)
+    db = TestSession()
+    for i in range(10):
+        cache.obtener(db, estado=f"inventado-{i}")
+    db.close()
+    assert list(cache._entradas) == [(f"inventado-{i}", None) for i in (7, 8, 9)]
+
+
+def test_por_estado_coincide_con_el_filtro_y_las_tarjetas():
+    db = TestSession()
+    critico = EstadoConservacion(nombre="En Peligro Crítico")
+    peligro = EstadoConservacion(nombre="En Peligro")
+    habitat = Habitat(nombre="Pradera de pastos contada")
+    db.add_all([critico, peligro, habitat])
+    db.commit()
+    especies = [
+        Especie(nombre_comun="Contada 1", nombre_cientifico="Numeratus", id_estado_conservacion=critico.id),
+        Especie(nombre_comun="Contada 2", nombre_cientifico="Numeratus", id_estado_conservacion=peligro.id),
+    ]
+    db.add_all(especies)
+    db.commit()
+    db.add_all([EspecieHabitat(id_especie=e.id, id_habitat=habitat.id) for e in especies])
+    ids = [e.id for e in especies]
+    refrescar_tarjetas(db, ids)
+    db.commit()
+    try:
+        por_estado = calcular_estadisticas(db, habitat=habitat.nombre)["por_estado"]
+        tarjetas = db.query(TarjetaEspecie).filter(TarjetaEspecie.id_especie.in_(ids))
+        assert por_estado == Counter(t.estado_conservacion for t in tarjetas) == {"extincion-critica": 1, "peligro": 1}
+
+        registro = RegistroSlugs()
+        for slug, cantidad in por_estado.items():
+            estados = registro.ids(db, "estados_conservacion", slug)
+            assert sum(e.id_estado_conservacion in estados for e in especies) == cantidad
+    finally:
+        db.close()
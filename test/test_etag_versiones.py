@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie
+from app.services import realtime_publish, versiones
+from conftest import RedisFalso, RedisFalsoAsync, TestSession
+
+client = TestClient(app)
+
+
+def _con_redis_falso():
+    redis_falso = RedisFalso()
+    return (
+        patch.object(versiones, "_get_async_client", return_value=RedisFalsoAsync(redis_falso)),
+        patch.object(realtime_publish, "_get_client", return_value=redis_falso),
+    )
+
+
+def _crear_especie():
+    db = TestSession()
+    especie = Especie(nombre_comun="Versionada", nombre_cientifico="Versionus etagii")
+    db.add(especie)
+    db.commit()
+    especie_id = especie.id
+    db.close()
+    return especie_id
+
+
+def test_especie_304_sin_tocar_la_base_hasta_que_cambia_la_version(contar_sql):
+    especie_id = _crear_especie()
+    parches = _con_redis_falso()
+    with parches[0], parches[1]:
+        primera = client.get(f"/api/especies/{especie_id}")
+        assert primera.status_code == 200
+        etag = primera.headers["etag"]
+
+        segunda, sentencias = contar_sql(
+            lambda: client.get(f"/api/especies/{especie_id}", headers={"If-None-Match": etag})
+        )
+        assert segunda.status_code == 304
+        assert segunda.content == b""
+        assert sentencias == []
+
+        realtime_publish.publish_event("especie_updated", {"id": especie_id})
+        tercera = client.get(f"/api/especies/{especie_id}", headers={"If-None-Match": etag})
+        assert tercera.status_code == 200
+        assert tercera.headers["etag"] != etag
+        assert tercera.json()["especie"]["id"] == especie_id
+
+
+def test_etag_distingue_query_string_y_catalogos():
+    parches = _con_redis_falso()
+    with parches[0], parches[1]:
+        etag = client.get("/api/eventos").headers["etag"]
+        assert client.get("/api/eventos", params={"tipo": "Limpieza"}).headers["etag"] != etag
+
+        etag_habitats = client.get("/api/habitats").headers["etag"]
+        assert client.get("/api/habitats", headers={"If-None-Match": etag_habitats}).status_code == 304
+        realtime_publish.publish_event("catalogo_updated", {"catalogos": ["habitats"]})
+        assert client.get("/api/habitats", headers={"If-None-Match": etag_habitats}).status_code == 200
+
+
+def test_sin_redis_responde_normal_sin_etag():
+    async def _caido(claves):
+        raise ConnectionError("redis no disponible")
+
+    with patch.object(versiones, "obtener_versiones", _caido):
+        resp = client.get("/api/eventos", headers={"If-None-Match": '"cualquiera"'})
+    assert resp.status_code == 200
+    assert "etag" not in resp.headers
+
+
+def test_claves_para_evento():
+    assert versiones.claves_para_evento("especie_deleted", {"id": 4}) == ["especies", "especie:4"]
+    assert versiones.claves_para_evento("evento_updated", {"id": 2}) == ["eventos", "evento:2"]
+    assert versiones.claves_para_evento("productos_updated", {"ids": [1, 3]}) == ["productos", "producto:1", "producto:3"]
+    assert versiones.claves_para_evento("catalogo_updated", {"catalogos": ["amenazas"]}) == ["catalogo:amenazas"]
+    assert versiones.claves_para_evento("desconocido", {}) == []
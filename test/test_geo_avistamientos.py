@@ -0,0 +1,85 @@
+import math
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, Avistamiento, Usuario
+from app.services.geo import codificar_geohash, prefijos_bbox, MAX_CELDAS_BBOX
+from conftest import TestSession
+
+client = TestClient(app)
+
+PUNTOS = {
+    "cancun": (21.1619, -86.8515),
+    "cozumel": (20.4230, -86.9223),
+    "veracruz": (19.1738, -96.1342),
+    "fiyi_este": (-17.7134, 179.9),
+    "fiyi_oeste": (-17.7134, -179.9),
+}
+
+
+def _seed(email):
+    db = TestSession()
+    especie = Especie(nombre_comun="Geolocalizada", nombre_cientifico="Geographica")
+    usuario = Usuario(nombre="Geo", apellido_paterno="Test", email=email, activo=True)
+    db.add_all([especie, usuario])
+    db.commit()
+    avistamientos = {
+        nombre: Avistamiento(id_especie=especie.id, id_usuario=usuario.id, fecha=datetime(2026, 6, 1),
+                             latitud=lat, longitud=lon)
+        for nombre, (lat, lon) in PUNTOS.items()
+    }
+    db.add_all(avistamientos.values())
+    db.commit()
+    ids = {nombre: a.id for nombre, a in avistamientos.items()}
+    geohashes = {nombre: a.geohash for nombre, a in avistamientos.items()}
+    especie_id = especie.id
+    db.close()
+    return especie_id, ids, geohashes
+
+
+def _buscar(especie_id, **params):
+    resp = client.get("/api/avistamientos", params={"especie_id": especie_id, **params})
+    assert resp.status_code == 200, resp.text
+    return {a["id"] for a in resp.json()["avistamientos"]}
+
+
+def test_geohash_y_cobertura():
+    assert codificar_geohash(57.64911, 10.40744) == "u4pruydqq"
+    prefijos = prefijos_bbox(20, -88, 22, -86)
+    assert 0 < len(prefijos) <= MAX_CELDAS_BBOX
+    assert any(codificar_geohash(*PUNTOS["cancun"]).startswith(p) for p in prefijos)
+
+
+def test_geohash_se_guarda_al_insertar():
+    _, _, geohashes = _seed("geo-insert@demo-sway.com")
+    assert geohashes["cancun"] == codificar_geohash(*PUNTOS["cancun"])
+
+
+def test_filtro_bbox_incluido_antimeridiano():
+    especie_id, ids, _ = _seed("geo-bbox@demo-sway.com")
+    assert _buscar(especie_id, bbox="-88,20,-86,22") == {ids["cancun"], ids["cozumel"]}
+    assert _buscar(especie_id, bbox="179,-18,-179,-17") == {ids["fiyi_este"], ids["fiyi_oeste"]}
+    assert _buscar(especie_id, bbox="-100,18,-80,22", near="21.1619,-86.8515", radius_km=50) == {ids["cancun"]}
+
+
+def test_filtro_radio_usa_distancia_exacta():
+    especie_id, ids, _ = _seed("geo-radio@demo-sway.com")
+    lat0, lon0 = PUNTOS["cancun"]
+    lat1, lon1 = PUNTOS["cozumel"]
+    a = (math.sin(math.radians(lat1 - lat0) / 2) ** 2
+         + math.cos(math.radians(lat0)) * math.cos(math.radians(lat1)) * math.sin(math.radians(lon1 - lon0) / 2) ** 2)
+    distancia = 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+    near = f"{lat0},{lon0}"
+    assert _buscar(especie_id, near=near, radius_km=distancia + 1) == {ids["cancun"], ids["cozumel"]}
+    assert _buscar(especie_id, near=near, radius_km=distancia - 1) == {ids["cancun"]}
+    assert _buscar(especie_id, near="-17.7134,179.95", radius_km=20) == {ids["fiyi_este"], ids["fiyi_oeste"]}
+
+
+def test_parametros_espaciales_invalidos():
+    assert client.get("/api/avistamientos", params={"bbox": "1,2,3"}).status_code == 400
+    assert client.get("/api/avistamientos", params={"bbox": "0,50,10,40"}).status_code == 400
+    assert client.get("/api/avistamientos", params={"near": "10,10"}).status_code == 400
+    assert client.get("/api/avistamientos", params={"near": "95,10", "radius_km": 5}).status_code == 400
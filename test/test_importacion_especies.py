@@ -0,0 +1,91 @@
+import json
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import EstadoConservacion, Especie, Habitat, Amenaza, EspecieHabitat, TarjetaEspecie
+from app.security.auth import get_current_colaborador
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _seed_catalogos():
+    db = TestSession()
+    db.add_all([
+        EstadoConservacion(nombre="Vulnerable"),
+        Habitat(nombre="Arrecife importado"),
+        Habitat(nombre="Laguna costera"),
+        Amenaza(nombre="Pesca incidental"),
+    ])
+    db.commit()
+    db.close()
+
+
+def _importar(body, content_type, **params):
+    app.dependency_overrides[get_current_colaborador] = lambda: {"colaborador_id": 1, "token_type": "colaborador"}
+    try:
+        with patch("app.routers.especies.publish_event") as mock_publish:
+            resp = client.post("/api/especies/importar", content=body.encode("utf-8"),
+                               headers={"Content-Type": content_type}, params=params)
+    finally:
+        app.dependency_overrides.pop(get_current_colaborador, None)
+    return resp, mock_publish
+
+
+def test_importar_csv_inserta_validas_y_reporta_errores():
+    _seed_catalogos()
+    csv_body = (
+        "nombre_comun,nombre_cientifico,estado_conservacion,habitats,amenazas,poblacion_estimada\n"
+        "Mero importado,Epinephelus importatus,vulnerable,Arrecife importado|Laguna Costera,Pesca incidental,1200\n"
+        "Pargo importado,Lutjanus importatus,Vulnerable,,,\n"
+        "Sin estado,Nullus status,Inexistente,,,\n"
+        "Mero repetido,Epinephelus importatus,Vulnerable,,,\n"
+        "Habitat raro,Rarus habitatus,Vulnerable,Volcán submarino,,\n"
+        "X,Corto,Vulnerable,,,\n"
+    )
+    resp, mock_publish = _importar(csv_body, "text/csv")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["recibidas"] == 6
+    assert body["importadas"] == 2
+    assert body["total_errores"] == 4
+    assert [e["linea"] for e in body["errores"]] == [4, 5, 6, 7]
+    mock_publish.assert_called_once()
+    assert mock_publish.call_args[0][0] == "especies_importadas"
+    assert mock_publish.call_args[0][1]["total"] == 2
+
+    db = TestSession()
+    mero = db.query(Especie).filter(Especie.nombre_cientifico == "Epinephelus importatus").one()
+    assert mero.poblacion_estimada == 1200
+    assert db.query(EspecieHabitat).filter(EspecieHabitat.id_especie == mero.id).count() == 2
+    assert db.get(TarjetaEspecie, mero.id).amenazas == ["Pesca incidental"]
+    db.close()
+
+
+def test_importar_ndjson_estricto_no_importa_nada_si_hay_errores():
+    _seed_catalogos()
+    lineas = [
+        {"nombre_comun": "Raya estricta", "nombre_cientifico": "Raja stricta", "estado_conservacion": "Vulnerable",
+         "habitats": ["Laguna costera"]},
+        {"nombre_comun": "Sin científico", "estado_conservacion": "Vulnerable"},
+    ]
+    ndjson = "\n".join(json.dumps(l) for l in lineas) + "\nno es json\n"
+
+    resp, mock_publish = _importar(ndjson, "application/x-ndjson", estricto="true")
+    assert resp.status_code == 400
+    assert resp.json()["detail"]["total_errores"] == 2
+    mock_publish.assert_not_called()
+    db = TestSession()
+    assert db.query(Especie).filter(Especie.nombre_cientifico == "Raja stricta").count() == 0
+    db.close()
+
+    resp, mock_publish = _importar(json.dumps(lineas[0]) + "\n", "application/x-ndjson", estricto="true")
+    assert resp.status_code == 200
+    assert resp.json()["importadas"] == 1
+
+
+def test_importar_requiere_colaborador():
+    resp = client.post("/api/especies/importar", content=b"nombre_comun\n", headers={"Content-Type": "text/csv"})
+    assert resp.status_code == 401
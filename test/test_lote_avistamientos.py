@@ -0,0 +1,137 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, Avistamiento, Usuario
+from app.services.teselas import tesela_de_punto
+from app.services.versiones import claves_para_evento
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _seed_especie():
+    db = TestSession()
+    especie = Especie(nombre_comun="Delfín por lotes", nombre_cientifico="Delphinus batch")
+    db.add(especie)
+    db.commit()
+    especie_id = especie.id
+    db.close()
+    return especie_id
+
+
+def _item(clave, especie_id, email="lote.campo@demo-sway.com", **extra):
+    return {
+        "clave_idempotencia": clave, "id_especie": especie_id, "fecha_avistamiento": "2026-03-02T07:15:00",
+        "latitud": 18.5, "longitud": -87.5, "nombre_usuario": "Campo Lote", "email_usuario": email, **extra,
+    }
+
+
+def _serie(especie_id):
+    resp = client.get("/api/avistamientos/series", params={"especie_id": especie_id})
+    return [(p["periodo"], p["total"]) for p in resp.json()["serie"]]
+
+
+def test_lote_es_idempotente_y_publica_un_evento(monkeypatch):
+    publicados = []
+    monkeypatch.setattr("app.routers.estadisticas.publish_event", lambda t, p: publicados.append((t, p)))
+    especie_id = _seed_especie()
+    lote = {"avistamientos": [
+        _item("lote-0001-aaaa", especie_id),
+        _item("lote-0002-bbbb", especie_id, email="lote.nuevo@demo-sway.com", latitud=21.2, longitud=-86.8),
+        _item("lote-0001-aaaa", especie_id),
+        _item("lote-0003-cccc", 999999),
+        _item("lote-0004-dddd", especie_id, fecha_avistamiento="2999-01-01T00:00:00"),
+    ]}
+
+    resp = client.post("/api/reportar-avistamiento/lote", json=lote)
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert (body["creados"], body["duplicados"], body["errores"]) == (2, 1, 2)
+    estados = [r["estado"] for r in body["resultados"]]
+    assert estados == ["creado", "creado", "duplicado", "error", "error"]
+    ids = [r["id"] for r in body["resultados"][:3]]
+    assert ids[0] == ids[2] != ids[1]
+
+    assert len(publicados) == 1
+    tipo, payload = publicados[0]
+    assert tipo == "avistamientos_created"
+    assert sorted(a["id"] for a in payload["avistamientos"]) == sorted(ids[:2])
+    assert _serie(especie_id) == [("2026-03-02", 2)]
+
+    # Reenvío completo (p. ej. se perdió la respuesta): nada se duplica.
+    reenvio = client.post("/api/reportar-avistamiento/lote", json=lote).json()
+    assert reenvio["creados"] == 0 and reenvio["duplicados"] == 3
+    assert [r.get("id") for r in reenvio["resultados"][:3]] == ids
+    assert len(publicados) == 1
+    assert _serie(especie_id) == [("2026-03-02", 2)]
+
+    db = TestSession()
+    assert db.query(Avistamiento).filter(Avistamiento.id_especie == especie_id).count() == 2
+    assert db.query(Usuario).filter(Usuario.email == "lote.nuevo@demo-sway.com").count() == 1
+    db.close()
+
+
+def test_evento_del_lote_invalida_las_teselas_de_cada_punto():
+    puntos = [(18.5, -87.5), (21.2, -86.8)]
+    claves = claves_para_evento("avistamientos_created",
+                                {"avistamientos": [{"latitud": lat, "longitud": lon} for lat, lon in puntos]})
+    assert claves[0] == "avistamientos"
+    assert len(claves) == len(set(claves))
+    for lat, lon in puntos:
+        x, y = tesela_de_punto(lat, lon, 12)
+        assert f"tesela:12/{x}/{y}" in claves
+
+
+def test_lote_valida_tamano_y_claves():
+    especie_id = _seed_especie()
+    assert client.post("/api/reportar-avistamiento/lote", json={"avistamientos": []}).status_code == 422
+    assert client.post("/api/reportar-avistamiento/lote",
+                       json={"avistamientos": [_item("corta", especie_id)]}).status_code == 422
+
+
+def test_fechas_con_zona_y_items_invalidos_no_frenan_el_lote():
+    especie_id = _seed_especie()
+    lote = {"avistamientos": [
+        _item("zona-0001-aaaa", especie_id, fecha_avistamiento="2026-01-01T10:00:00Z"),
+        _item("zona-0002-bbbb", especie_id, fecha_avistamiento="2026-01-01T10:00:00-06:00"),
+        _item("zona-0003-cccc", especie_id, fecha_avistamiento="2999-01-01T00:00:00.000Z"),
+        _item("zona-0004-dddd", 999999, fecha_avistamiento="2026-01-01T10:00:00Z"),
+    ]}
+    resp = client.post("/api/reportar-avistamiento/lote", json=lote)
+    assert resp.status_code == 200, resp.text
+    assert [r["estado"] for r in resp.json()["resultados"]] == ["creado", "creado", "error", "error"]
+
+
+def test_reintenta_si_otra_peticion_registra_la_misma_clave(monkeypatch):
+    from sqlalchemy.exc import IntegrityError
+    from app.routers import estadisticas
+
+    especie_id = _seed_especie()
+    original = estadisticas._registrar_lote
+    llamadas = []
+
+    def registrar_con_carrera(db, items):
+        llamadas.append(1)
+        resultado = original(db, items)
+        if len(llamadas) == 1:
+            # Entre la consulta de claves y el commit, otra petición guardó
+            # la primera clave: este commit chocaría con el índice único.
+            db.rollback()
+            usuario = db.query(Usuario).filter(Usuario.email == "lote.campo@demo-sway.com").first()
+            if usuario is None:
+                usuario = Usuario(nombre="Campo", apellido_paterno="Lote", email="lote.campo@demo-sway.com", activo=True)
+            otro = Avistamiento(id_especie=especie_id, usuario=usuario, clave_idempotencia="carrera-0001")
+            db.add(otro)
+            db.commit()
+            llamadas.append(otro.id)
+            raise IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+        return resultado
+
+    monkeypatch.setattr(estadisticas, "_registrar_lote", registrar_con_carrera)
+    lote = {"avistamientos": [_item("carrera-0001", especie_id), _item("carrera-0002", especie_id)]}
+    resp = client.post("/api/reportar-avistamiento/lote", json=lote)
+    assert resp.status_code == 200, resp.text
+    resultados = resp.json()["resultados"]
+    assert [r["estado"] for r in resultados] == ["duplicado", "creado"]
+    assert resultados[0]["id"] == llamadas[1]
+    assert len(llamadas) == 3
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import EstadoConservacion, Especie, Producto, Avistamiento, Usuario
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _recorrer(url, params, clave):
+    vistos = []
+    cursor = None
+    for _ in range(20):
+        query = dict(params)
+        if cursor:
+            query["cursor"] = cursor
+        resp = client.get(url, params=query)
+        assert resp.status_code == 200
+        body = resp.json()
+        vistos.extend(item["id"] for item in body[clave])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    return vistos
+
+
+def test_especies_cursor_recorre_todas_sin_repetir():
+    db = TestSession()
+    estado = EstadoConservacion(nombre="Vulnerable")
+    db.add(estado)
+    db.commit()
+    especies = [
+        Especie(nombre_comun=f"Cursorina {i % 3}", nombre_cientifico=f"Cursorus {i}",
+                id_estado_conservacion=estado.id, poblacion_estimada=i * 10)
+        for i in range(7)
+    ]
+    db.add_all(especies)
+    db.commit()
+    ids = {e.id for e in especies}
+    db.close()
+
+    for sort in ("nombre", "size", "added", "conservation"):
+        vistos = _recorrer("/api/especies", {"search": "Cursorina", "limit": 3, "sort": sort, "total": "ninguno"}, "especies")
+        assert len(vistos) == len(set(vistos))
+        assert set(vistos) == ids
+
+
+def test_especies_total_ninguno_omite_conteo():
+    resp = client.get("/api/especies", params={"limit": 2, "total": "ninguno"})
+    assert resp.status_code == 200
+    assert resp.json()["total"] is None
+    assert resp.json()["total_pages"] is None
+
+
+def test_especies_cursor_invalido_o_de_otro_orden_400():
+    resp = client.get("/api/especies", params={"cursor": "no-es-un-cursor"})
+    assert resp.status_code == 400
+
+    db = TestSession()
+    db.add_all([Especie(nombre_comun=f"Ordenada {i}", nombre_cientifico="Ordo") for i in range(3)])
+    db.commit()
+    db.close()
+    cursor = client.get("/api/especies", params={"search": "Ordenada", "limit": 1}).json()["next_cursor"]
+    resp = client.get("/api/especies", params={"search": "Ordenada", "limit": 1, "sort": "added", "cursor": cursor})
+    assert resp.status_code == 400
+
+
+def test_productos_cursor_recorre_todos():
+    db = TestSession()
+    productos = [
+        Producto(nombre=f"Paginable {i}", precio=10 + (i % 2), activo=True,
+                 fecha_agregado=datetime(2026, 1, 1 + (i % 2)))
+        for i in range(5)
+    ]
+    db.add_all(productos)
+    db.commit()
+    ids = {p.id for p in productos}
+    db.close()
+
+    for ordenar in ("fecha_agregado", "precio_asc", "precio_desc", "nombre", "popularidad"):
+        vistos = _recorrer("/api/productos", {"busqueda": "Paginable", "limite": 2, "ordenar": ordenar}, "products")
+        assert len(vistos) == len(set(vistos))
+        assert set(vistos) == ids
+
+
+def test_avistamientos_cursor_pagina_por_fecha():
+    db = TestSession()
+    especie = Especie(nombre_comun="Paginada", nombre_cientifico="Paginata")
+    usuario = Usuario(nombre="Pag", apellido_paterno="Test", email="paginacion@demo-sway.com", activo=True)
+    db.add_all([especie, usuario])
+    db.commit()
+    avistamientos = [
+        Avistamiento(id_especie=especie.id, id_usuario=usuario.id, fecha=datetime(2026, 3, 1 + (i % 2)))
+        for i in range(5)
+    ]
+    db.add_all(avistamientos)
+    db.commit()
+    ids = {a.id for a in avistamientos}
+    especie_id = especie.id
+    db.close()
+
+    vistos = _recorrer("/api/avistamientos", {"especie_id": especie_id, "limit": 2}, "avistamientos")
+    assert len(vistos) == len(set(vistos))
+    assert set(vistos) == ids
+
+    completo = client.get("/api/avistamientos", params={"especie_id": especie_id}).json()
+    assert len(completo["avistamientos"]) == 5
+    assert completo["next_cursor"] is None
+
+
+def test_cursor_con_nulos_en_la_columna_de_orden():
+    db = TestSession()
+    # Nombres y precios NULL ordenan primero; con limit 2 el corte cae en un NULL.
+    especies = [Especie(nombre_comun=None, nombre_cientifico=f"Nullus {i}") for i in range(3)]
+    especies.append(Especie(nombre_comun="Nulina", nombre_cientifico="Nullus con nombre"))
+    productos = [Producto(nombre=None, precio=None, descripcion="Nulificable", activo=True) for _ in range(3)]
+    productos.append(Producto(nombre="Nulificable", precio=5, activo=True))
+    especie = Especie(nombre_comun="Sin fecha", nombre_cientifico="Datum absens")
+    usuario = Usuario(nombre="Nulo", apellido_paterno="Test", email="paginacion.nulos@demo-sway.com", activo=True)
+    db.add_all([*especies, *productos, especie, usuario])
+    db.commit()
+    avistamientos = [Avistamiento(id_especie=especie.id, id_usuario=usuario.id, fecha=f)
+                     for f in (None, None, None, datetime(2026, 3, 1))]
+    db.add_all(avistamientos)
+    db.commit()
+    ids_especies = {e.id for e in especies}
+    ids_productos = {p.id for p in productos}
+    ids_avistamientos = {a.id for a in avistamientos}
+    especie_id = especie.id
+    db.close()
+
+    vistos = _recorrer("/api/especies", {"search": "Nullus", "limit": 2, "sort": "nombre", "total": "ninguno"}, "especies")
+    assert sorted(vistos) == sorted(ids_especies)
+    for ordenar in ("precio_asc", "precio_desc", "nombre"):
+        vistos = _recorrer("/api/productos", {"busqueda": "Nulificable", "limite": 2, "ordenar": ordenar}, "products")
+        assert sorted(vistos) == sorted(ids_productos)
+    vistos = _recorrer("/api/avistamientos", {"especie_id": especie_id, "limit": 2}, "avistamientos")
+    assert sorted(vistos) == sorted(ids_avistamientos)
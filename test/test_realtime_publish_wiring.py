@@ -75,7 +75,9 @@ def test_eliminar_avistamiento_publishes_avistamiento_deleted():
         with patch("app.routers.estadisticas.publish_event") as mock_publish:
             resp = client.delete(f"/api/avistamientos/{avistamiento_id}")
         assert resp.status_code == 200
-        mock_publish.assert_called_once_with("avistamiento_deleted", {"id": avistamiento_id})
+        mock_publish.assert_called_once_with("avistamiento_deleted", {
+            "id": avistamiento_id, "latitud": 10.5, "longitud": -20.5
+        })
     finally:
         app.dependency_overrides.pop(get_current_colaborador, None)
 
@@ -87,7 +89,7 @@ def test_delete_especie_publishes_especie_deleted():
     try:
         with patch("app.routers.especies.publish_event") as mock_publish:
             resp = client.delete(f"/api/especies/{especie_id}")
-        assert resp.status_code == 200
+        assert resp.status_code == 202
         mock_publish.assert_called_once_with("especie_deleted", {"id": especie_id})
     finally:
         app.dependency_overrides.pop(get_current_colaborador, None)
@@ -136,7 +138,9 @@ def test_update_especie_publishes_especie_updated():
                 "id_estado_conservacion": estado_id,
             })
         assert resp.status_code == 200
-        mock_publish.assert_called_once_with("especie_updated", {"id": especie_id, "nombre_comun": "Delfin Actualizado"})
+        mock_publish.assert_called_once_with("especie_updated", {
+            "id": especie_id, "nombre_comun": "Delfin Actualizado", "nombre_cientifico": "Delphinus delphis"
+        })
     finally:
         app.dependency_overrides.pop(get_current_colaborador, None)
 
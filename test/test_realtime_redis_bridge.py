@@ -0,0 +1,17 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from app.realtime import redis_bridge
+
+
+def test_un_handler_que_falla_no_frena_el_broadcast():
+    evento = {"type": "especie_updated", "payload": {"id": 1}}
+    broadcast = AsyncMock()
+    with patch.object(redis_bridge.manager, "broadcast", broadcast), \
+            patch.object(redis_bridge.catalog_cache, "handle_event", side_effect=RuntimeError("roto")), \
+            patch.object(redis_bridge.indice_sugerencias, "handle_event", side_effect=RuntimeError("sin base")), \
+            patch.object(redis_bridge.indice_sugerencias, "invalidar") as invalidar:
+        asyncio.run(redis_bridge._aplicar_evento(evento))
+
+    broadcast.assert_awaited_once_with(evento)
+    invalidar.assert_called_once()
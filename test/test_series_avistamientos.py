@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, AvistamientoDiario
+from app.security.auth import get_current_colaborador
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _seed_especie():
+    db = TestSession()
+    especie = Especie(nombre_comun="Serie temporal", nombre_cientifico="Chronos")
+    db.add(especie)
+    db.commit()
+    especie_id = especie.id
+    db.close()
+    return especie_id
+
+
+def _reportar(especie_id, fecha):
+    resp = client.post("/api/reportar-avistamiento", json={
+        "id_especie": especie_id, "fecha_avistamiento": fecha, "latitud": 20.0, "longitud": -100.0,
+        "nombre_usuario": "Serie Test", "email_usuario": "series@demo-sway.com",
+    })
+    assert resp.status_code == 200, resp.text
+    return resp.json()["id"]
+
+
+def _serie(especie_id, **params):
+    resp = client.get("/api/avistamientos/series", params={"especie_id": especie_id, **params})
+    assert resp.status_code == 200, resp.text
+    return [(p["periodo"], p["total"]) for p in resp.json()["serie"]]
+
+
+def test_rollup_se_mantiene_al_reportar_y_borrar():
+    especie_id = _seed_especie()
+    # Miércoles 7 y jueves 8 de enero (misma semana), domingo 1 de febrero.
+    ids = [_reportar(especie_id, f) for f in
+           ("2026-01-07T08:00:00", "2026-01-07T18:30:00", "2026-01-08T09:00:00", "2026-02-01T10:00:00")]
+
+    assert _serie(especie_id) == [("2026-01-07", 2), ("2026-01-08", 1), ("2026-02-01", 1)]
+    assert _serie(especie_id, granularity="week") == [("2026-01-05", 3), ("2026-01-26", 1)]
+    assert _serie(especie_id, granularity="month") == [("2026-01-01", 3), ("2026-02-01", 1)]
+    assert _serie(especie_id, desde="2026-01-08", hasta="2026-01-31") == [("2026-01-08", 1)]
+
+    app.dependency_overrides[get_current_colaborador] = lambda: {"colaborador_id": 1, "token_type": "colaborador"}
+    try:
+        assert client.delete(f"/api/avistamientos/{ids[0]}").status_code == 200
+        assert client.delete(f"/api/avistamientos/{ids[2]}").status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_current_colaborador, None)
+
+    assert _serie(especie_id) == [("2026-01-07", 1), ("2026-02-01", 1)]
+    db = TestSession()
+    assert db.query(AvistamientoDiario).filter(AvistamientoDiario.id_especie == especie_id).count() == 3
+    db.close()
+
+
+def test_parametros_invalidos():
+    assert client.get("/api/avistamientos/series", params={"granularity": "year"}).status_code == 400
+    assert client.get("/api/avistamientos/series", params={"desde": "07/01/2026"}).status_code == 400
@@ -0,0 +1,76 @@
+import hashlib
+import io
+import os
+import shutil
+import stat
+
+import anyio
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.config import AVISTAMIENTOS_UPLOAD_DIR, UPLOAD_DIR
+from app.services.subidas import guardar_subida
+
+client = TestClient(app)
+
+CONTENIDO = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 8
+DIGEST = hashlib.sha256(CONTENIDO).hexdigest()
+URL = f"/api/uploads/avistamientos/{DIGEST}.jpg"
+
+
+@pytest.fixture(autouse=True)
+def _archivo():
+    os.makedirs(AVISTAMIENTOS_UPLOAD_DIR, exist_ok=True)
+    with open(os.path.join(AVISTAMIENTOS_UPLOAD_DIR, f"{DIGEST}.jpg"), "wb") as f:
+        f.write(CONTENIDO)
+    yield
+    shutil.rmtree(UPLOAD_DIR)
+
+
+def test_etag_fuerte_y_cache_inmutable():
+    resp = client.get(URL)
+    assert resp.status_code == 200
+    assert resp.content == CONTENIDO
+    assert resp.headers["etag"] == f'"{DIGEST}"'
+    assert "immutable" in resp.headers["cache-control"]
+    assert resp.headers["content-type"] == "image/jpeg"
+
+    no_modificado = client.get(URL, headers={"If-None-Match": f'"{DIGEST}"'})
+    assert no_modificado.status_code == 304
+    assert no_modificado.content == b""
+
+
+def test_range():
+    resp = client.get(URL, headers={"Range": "bytes=4-11"})
+    assert resp.status_code == 206
+    assert resp.content == CONTENIDO[4:12]
+    assert resp.headers["content-range"] == f"bytes 4-11/{len(CONTENIDO)}"
+
+
+def test_rutas_inexistentes_o_fuera_del_directorio():
+    assert client.get("/api/uploads/avistamientos/no-existe.jpg").status_code == 404
+    assert client.get("/api/uploads/avistamientos").status_code == 404
+    assert client.get("/api/uploads/..%2F..%2Fapp%2Fmain.py").status_code == 404
+
+
+def test_x_accel_redirect(monkeypatch):
+    monkeypatch.setattr("app.routers.uploads.UPLOADS_X_ACCEL_PREFIX", "/_uploads/")
+    resp = client.get(URL)
+    assert resp.status_code == 200
+    assert resp.content == b""
+    assert resp.headers["x-accel-redirect"] == f"/_uploads/avistamientos/{DIGEST}.jpg"
+    assert resp.headers["etag"] == f'"{DIGEST}"'
+
+
+def test_x_accel_apunta_a_un_archivo_que_nginx_puede_leer(monkeypatch):
+    # nginx corre con otro usuario que la API: la foto tiene que ser legible para "otros".
+    monkeypatch.setattr("app.routers.uploads.UPLOADS_X_ACCEL_PREFIX", "/_uploads/")
+    subida = UploadFile(io.BytesIO(b"\xff\xd8\xff\xe0nginx-la-lee"))
+    nombre = anyio.run(guardar_subida, subida, AVISTAMIENTOS_UPLOAD_DIR, [b"\xff\xd8\xff"], 1024, ".jpg")
+
+    resp = client.get(f"/api/uploads/avistamientos/{nombre}")
+    assert resp.headers["x-accel-redirect"] == f"/_uploads/avistamientos/{nombre}"
+    modo = os.stat(os.path.join(AVISTAMIENTOS_UPLOAD_DIR, nombre)).st_mode
+    assert modo & stat.S_IROTH
@@ -0,0 +1,100 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.single_flight import coalescer
+
+client = TestClient(app)
+
+
+def test_llamadas_concurrentes_comparten_una_sola_ejecucion():
+    ejecuciones = []
+
+    async def fabrica():
+        ejecuciones.append(1)
+        await asyncio.sleep(0.05)
+        return {"total": 42}
+
+    async def _rafaga():
+        return await asyncio.gather(*[coalescer("estadisticas?", fabrica) for _ in range(20)])
+
+    resultados = asyncio.run(_rafaga())
+    assert len(ejecuciones) == 1
+    assert all(r == {"total": 42} for r in resultados)
+
+
+def test_claves_distintas_y_llamadas_posteriores_se_calculan_aparte():
+    ejecuciones = []
+
+    async def fabrica():
+        ejecuciones.append(1)
+        await asyncio.sleep(0.01)
+        return len(ejecuciones)
+
+    async def _rafaga():
+        await asyncio.gather(coalescer("a", fabrica), coalescer("b", fabrica))
+        return await coalescer("a", fabrica)
+
+    assert asyncio.run(_rafaga()) == 3
+
+
+def test_el_error_llega_a_todos_los_que_esperaban():
+    async def fabrica():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("falló la consulta")
+
+    async def _rafaga():
+        return await asyncio.gather(*[coalescer("falla", fabrica) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(_rafaga()))
+
+
+def test_rutas_de_estadisticas_siguen_respondiendo():
+    for url in ("/api/estadisticas", "/api/especies/estadisticas", "/api/impacto-sostenible"):
+        resp = client.get(url)
+        assert resp.status_code == 200
+        assert resp.json()["success"] is True
+
+
+def test_peticiones_http_concurrentes_sobreviven_a_la_desconexion_del_primero(monkeypatch):
+    import httpx
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.data.database import get_async_db
+
+    de_peticion, usadas = [], []
+    override = app.dependency_overrides[get_async_db]
+    run_sync = AsyncSession.run_sync
+
+    async def sesion_registrada():
+        async for db in override():
+            de_peticion.append(db)
+            yield db
+
+    async def run_sync_lento(self, fn, *args, **kwargs):
+        # run_sync corre en el event loop: la espera tiene que ser async
+        # para que las demás peticiones lleguen mientras tanto.
+        usadas.append(self)
+        await asyncio.sleep(0.2)
+        return await run_sync(self, fn, *args, **kwargs)
+
+    monkeypatch.setitem(app.dependency_overrides, get_async_db, sesion_registrada)
+    monkeypatch.setattr(AsyncSession, "run_sync", run_sync_lento)
+
+    async def _rafaga():
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as http:
+            primera = asyncio.ensure_future(http.get("/api/estadisticas"))
+            await asyncio.sleep(0.05)
+            resto = [asyncio.ensure_future(http.get("/api/estadisticas")) for _ in range(4)]
+            await asyncio.sleep(0.05)
+            primera.cancel()  # el primer cliente se va y su sesión se cierra
+            return await asyncio.gather(*resto)
+
+    respuestas = asyncio.run(_rafaga())
+    assert [r.status_code for r in respuestas] == [200] * 4
+    assert all(r.json()["success"] is True for r in respuestas)
+    assert len(usadas) == 1
+    # El cálculo compartido no usa la sesión de ninguna petición.
+    assert len(de_peticion) == 5 and usadas[0] not in de_peticion
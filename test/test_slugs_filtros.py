@@ -0,0 +1,88 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, EspecieHabitat, EstadoConservacion, Habitat
+from app.services.slugs_filtros import RegistroSlugs, registro_slugs
+from app.services.tarjetas_especies import mapear_estado_conservacion
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _seed(prefijo):
+    db = TestSession()
+    critico = EstadoConservacion(nombre="En Peligro Crítico")
+    arrecife = Habitat(nombre=f"Arrecife de Coral {prefijo}")
+    pelagico = Habitat(nombre=f"Aguas Pelágicas {prefijo}")
+    db.add_all([critico, arrecife, pelagico])
+    db.commit()
+    coralina = Especie(nombre_comun=f"{prefijo} coralina", nombre_cientifico="Slugus", id_estado_conservacion=critico.id)
+    abierta = Especie(nombre_comun=f"{prefijo} abierta", nombre_cientifico="Slugus")
+    db.add_all([coralina, abierta])
+    db.commit()
+    db.add_all([
+        EspecieHabitat(id_especie=coralina.id, id_habitat=arrecife.id),
+        EspecieHabitat(id_especie=coralina.id, id_habitat=pelagico.id),
+        EspecieHabitat(id_especie=abierta.id, id_habitat=pelagico.id),
+    ])
+    db.commit()
+    ids = critico.id, arrecife.id, pelagico.id, coralina.id, abierta.id
+    db.close()
+    return ids
+
+
+def _ids(**params):
+    resp = client.get("/api/especies", params={"search": "Listada", **params})
+    assert resp.status_code == 200
+    return {e["id"] for e in resp.json()["especies"]}, resp.json()["total"]
+
+
+def test_registro_resuelve_slugs_sin_acentos():
+    critico_id, arrecife_id, pelagico_id, _, _ = _seed("Registrada")
+    registro = RegistroSlugs()
+    db = TestSession()
+    try:
+        assert arrecife_id in registro.ids(db, "habitats", "arrecife")
+        assert pelagico_id in registro.ids(db, "habitats", "aguas-abiertas")
+        assert pelagico_id not in registro.ids(db, "habitats", "arrecife")
+        assert critico_id in registro.ids(db, "estados_conservacion", "extincion-critica")
+        assert critico_id not in registro.ids(db, "estados_conservacion", "peligro")
+        assert registro.ids(db, "habitats", "desierto") is None
+    finally:
+        db.close()
+
+
+def test_filtros_por_slug_en_el_listado():
+    registro_slugs.invalidate()
+    _, _, _, coralina_id, abierta_id = _seed("Listada")
+
+    assert _ids(habitat="arrecife")[0] == {coralina_id}
+    # La especie con dos hábitats que coinciden no sale repetida ni cuenta doble.
+    ids, total = _ids(habitat="aguas-abiertas")
+    assert coralina_id in ids and abierta_id in ids
+    assert total == len(ids)
+    assert _ids(conservation="extincion-critica")[0] == {coralina_id}
+    assert coralina_id not in _ids(conservation="peligro")[0]
+    assert {coralina_id, abierta_id} <= _ids(habitat="desierto")[0]
+
+
+def test_catalogo_updated_descarta_el_mapa():
+    registro = RegistroSlugs()
+    db = TestSession()
+    try:
+        antes = registro.ids(db, "habitats", "manglar")
+        db.add(Habitat(nombre="Manglar Slug Nuevo"))
+        db.commit()
+        assert registro.ids(db, "habitats", "manglar") == antes
+
+        registro.handle_event({"type": "catalogo_updated", "payload": {"catalogos": ["habitats"]}})
+        assert len(registro.ids(db, "habitats", "manglar")) == len(antes) + 1
+    finally:
+        db.close()
+
+
+def test_tarjeta_usa_el_mismo_slug_que_el_filtro():
+    assert mapear_estado_conservacion("En Peligro Crítico") == "extincion-critica"
+    assert mapear_estado_conservacion("En Peligro") == "peligro"
+    assert mapear_estado_conservacion("Casi Amenazada") == "casi-amenazada"
+    assert mapear_estado_conservacion(None) == "preocupacion-menor"
@@ -0,0 +1,73 @@
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, Avistamiento, Usuario
+from app.security.auth import get_current_colaborador
+from app.services import streaming
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _seed(email, cantidad=5):
+    db = TestSession()
+    especie = Especie(nombre_comun="Transmitida", nombre_cientifico="Fluxus")
+    usuario = Usuario(nombre="Stream", apellido_paterno="Test", email=email, activo=True)
+    db.add_all([especie, usuario])
+    db.commit()
+    db.add_all([
+        Avistamiento(id_especie=especie.id, id_usuario=usuario.id, fecha=datetime(2026, 4, 1 + i),
+                     latitud=20 + i, longitud=-100, notas="ñandú" if i == 0 else None)
+        for i in range(cantidad)
+    ])
+    db.commit()
+    especie_id = especie.id
+    db.close()
+    return especie_id
+
+
+def test_avistamientos_stream_json_y_ndjson_igual_al_listado():
+    especie_id = _seed("stream@demo-sway.com")
+    completo = client.get("/api/avistamientos", params={"especie_id": especie_id}).json()["avistamientos"]
+
+    resp = client.get("/api/avistamientos", params={"especie_id": especie_id, "stream": "json"})
+    assert resp.headers["content-type"].startswith("application/json")
+    assert resp.json() == {"success": True, "avistamientos": completo}
+
+    resp = client.get("/api/avistamientos", params={"especie_id": especie_id, "stream": "ndjson",
+                                                    "fields": "fecha,notas"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lineas = [json.loads(linea) for linea in resp.text.splitlines()]
+    assert lineas == [{k: a[k] for k in ("id", "fecha", "notas")} for a in completo]
+
+
+def test_cuerpo_se_escribe_por_trozos():
+    with patch.object(streaming, "TAMANO_LOTE_STREAM", 2):
+        trozos = list(streaming._cuerpo_sync(iter(range(5)), lambda i: {"n": i}, "items", "json"))
+    assert len(trozos) == 4
+    assert json.loads("".join(trozos)) == {"success": True, "items": [{"n": i} for i in range(5)]}
+
+
+def test_stream_vacio_y_modo_invalido():
+    resp = client.get("/api/avistamientos", params={"especie_id": 987654, "stream": "json"})
+    assert resp.json() == {"success": True, "avistamientos": []}
+    assert client.get("/api/avistamientos", params={"stream": "csv"}).status_code == 400
+
+
+def test_colaborador_avistamientos_stream():
+    _seed("colab-stream@demo-sway.com", cantidad=3)
+    app.dependency_overrides[get_current_colaborador] = lambda: {
+        "colaborador_id": 1, "token_type": "colaborador", "email": "colab-stream@demo-sway.com"
+    }
+    try:
+        completo = client.get("/api/colaboradores/avistamientos").json()
+        resp = client.get("/api/colaboradores/avistamientos", params={"stream": "ndjson"})
+    finally:
+        app.dependency_overrides.pop(get_current_colaborador, None)
+
+    assert len(completo["avistamientos"]) == 3
+    assert [json.loads(linea) for linea in resp.text.splitlines()] == completo["avistamientos"]
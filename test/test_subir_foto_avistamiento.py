@@ -103,3 +103,57 @@ def test_upload_publishes_avistamiento_updated_event(monkeypatch):
     event_type, payload = published[0]
     assert event_type == "avistamiento_updated"
     assert payload == {"id": avistamiento_id, "foto_url": foto_url}
+
+
+def test_upload_rejects_bad_magic_without_leaving_files():
+    from app.config import AVISTAMIENTOS_UPLOAD_DIR
+    avistamiento_id = _seed_avistamiento()
+    resp = client.post(
+        f"/api/avistamientos/{avistamiento_id}/foto",
+        files={"foto": ("photo.jpg", io.BytesIO(b"GIF89a-no-es-jpeg"), "image/jpeg")},
+    )
+    assert resp.status_code == 400
+    assert os.listdir(AVISTAMIENTOS_UPLOAD_DIR) == []
+
+
+def test_guardar_subida_corta_al_pasar_el_limite(tmp_path):
+    import anyio
+    from fastapi import HTTPException, UploadFile
+    from app.services.subidas import TAMANO_TROZO, guardar_subida
+
+    # Tres trozos con un límite de dos: falla sin haber leído todo el archivo.
+    archivo = UploadFile(io.BytesIO(b"\xff\xd8\xff" + b"x" * (3 * TAMANO_TROZO)))
+    with pytest.raises(HTTPException) as error:
+        anyio.run(guardar_subida, archivo, str(tmp_path), [b"\xff\xd8\xff"], 2 * TAMANO_TROZO, ".jpg")
+    assert error.value.status_code == 413
+    assert archivo.file.tell() < 3 * TAMANO_TROZO + 3
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_dedupes_identical_content():
+    import hashlib
+    from app.config import AVISTAMIENTOS_UPLOAD_DIR
+    contenido = b"\xff\xd8\xff\xe0misma-foto-reenviada"
+    urls = []
+    for _ in range(2):
+        resp = client.post(
+            f"/api/avistamientos/{_seed_avistamiento()}/foto",
+            files={"foto": ("photo.jpg", io.BytesIO(contenido), "image/jpeg")},
+        )
+        assert resp.status_code == 200
+        urls.append(resp.json()["foto_url"])
+
+    nombre = f"{hashlib.sha256(contenido).hexdigest()}.jpg"
+    assert urls == [f"/api/uploads/avistamientos/{nombre}"] * 2
+    assert os.listdir(AVISTAMIENTOS_UPLOAD_DIR) == [nombre]
+
+
+def test_guardar_subida_deja_la_foto_legible_para_otros(tmp_path):
+    import anyio
+    import stat
+    from fastapi import UploadFile
+    from app.services.subidas import guardar_subida
+
+    archivo = UploadFile(io.BytesIO(b"\xff\xd8\xff\xe0permisos"))
+    nombre = anyio.run(guardar_subida, archivo, str(tmp_path), [b"\xff\xd8\xff"], 1024, ".jpg")
+    assert stat.S_IMODE(os.stat(tmp_path / nombre).st_mode) == 0o644
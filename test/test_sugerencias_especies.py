@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie
+from app.services.sugerencias_especies import IndiceSugerencias, indice_sugerencias
+from conftest import TestSession, engine
+
+client = TestClient(app)
+
+
+def _seed(*nombres):
+    db = TestSession()
+    especies = [Especie(nombre_comun=comun, nombre_cientifico=cientifico) for comun, cientifico in nombres]
+    db.add_all(especies)
+    db.commit()
+    ids = [e.id for e in especies]
+    db.close()
+    return ids
+
+
+def test_busca_por_prefijo_sin_acentos_y_por_palabra():
+    laud, lora = _seed(("Tortuga Laúd", "Dermochelys coriacea"), ("Tortuga Lora", "Lepidochelys kempii"))
+    indice = IndiceSugerencias()
+    indice.cargar_desde(engine)
+
+    assert {s["id"] for s in indice.buscar("tortuga l")} >= {laud, lora}
+    assert [s["id"] for s in indice.buscar("LAUD")] == [laud]
+    assert [s["id"] for s in indice.buscar("dermoch")] == [laud]
+    assert [s["id"] for s in indice.buscar("kemp")] == [lora]
+    assert indice.buscar("   ") == []
+
+
+def test_eventos_parchean_el_indice_sin_recargar():
+    (especie_id,) = _seed(("Pez Sierra", "Pristis pectinata"))
+    indice = IndiceSugerencias()
+    indice.cargar_desde(engine)
+    assert [s["id"] for s in indice.buscar("pez sier")] == [especie_id]
+
+    indice.handle_event({"type": "especie_updated", "payload": {
+        "id": especie_id, "nombre_comun": "Pez Peine", "nombre_cientifico": "Pristis pectinata"}})
+    assert indice.buscar("pez sier") == []
+    assert indice.buscar("peine")[0]["nombre_comun"] == "Pez Peine"
+
+    indice.handle_event({"type": "especie_created", "payload": {
+        "id": 99999, "nombre_comun": "Pez Guitarra", "nombre_cientifico": "Rhinobatos"}})
+    assert [s["id"] for s in indice.buscar("guitar")] == [99999]
+
+    nuevos = _seed(("Raya Importada", "Mobula uno"), ("Raya Importada Dos", "Mobula dos"))
+    indice.handle_event({"type": "especies_importadas",
+                         "payload": {"total": 2, "primer_id": nuevos[0], "ultimo_id": nuevos[-1]}}, engine)
+    assert {s["id"] for s in indice.buscar("raya importada")} == set(nuevos)
+
+    indice.handle_event({"type": "especie_deleted", "payload": {"id": especie_id}})
+    assert indice.buscar("peine") == []
+
+
+def test_ruta_sugerencias():
+    (especie_id,) = _seed(("Manatí Sugerido", "Trichechus sugeridus"))
+    indice_sugerencias.invalidar()
+
+    resp = client.get("/api/especies/sugerencias", params={"q": "manati sug"})
+    assert resp.status_code == 200
+    assert resp.json()["sugerencias"] == [
+        {"id": especie_id, "nombre_comun": "Manatí Sugerido", "nombre_cientifico": "Trichechus sugeridus"}
+    ]
+    assert client.get("/api/especies/sugerencias", params={"q": "x", "limite": 50}).status_code == 422
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import EstadoConservacion, Especie, Habitat, Amenaza, EspecieHabitat, TarjetaEspecie
+from app.security.auth import get_current_colaborador
+from app.services.tarjetas_especies import reconstruir_tarjetas
+from conftest import TestSession
+
+client = TestClient(app)
+
+
+def _seed_catalogos():
+    db = TestSession()
+    estado = EstadoConservacion(nombre="En Peligro")
+    habitat = Habitat(nombre="Pradera marina")
+    otro_habitat = Habitat(nombre="Manglar tarjeta")
+    amenaza = Amenaza(nombre="Redes fantasma")
+    db.add_all([estado, habitat, otro_habitat, amenaza])
+    db.commit()
+    ids = estado.id, habitat.id, otro_habitat.id, amenaza.id
+    db.close()
+    return ids
+
+
+def _tarjeta(especie_id):
+    db = TestSession()
+    tarjeta = db.get(TarjetaEspecie, especie_id)
+    db.close()
+    return tarjeta
+
+
+def test_tarjeta_se_refresca_al_crear_editar_y_borrar():
+    estado_id, habitat_id, otro_habitat_id, amenaza_id = _seed_catalogos()
+    datos = {
+        "nombre_comun": "Dugongo tarjeta", "nombre_cientifico": "Dugong dugon",
+        "id_estado_conservacion": estado_id, "habitats": [habitat_id], "amenazas": [amenaza_id],
+    }
+    app.dependency_overrides[get_current_colaborador] = lambda: {"colaborador_id": 1, "token_type": "colaborador"}
+    try:
+        with patch("app.routers.especies.publish_event"):
+            especie_id = client.post("/api/especies", json=datos).json()["especie_id"]
+            tarjeta = _tarjeta(especie_id)
+            assert tarjeta.estado_conservacion == "peligro"
+            assert tarjeta.habitats == ["Pradera marina"]
+            assert tarjeta.amenaza_ids == [amenaza_id]
+
+            datos.update(habitats=[otro_habitat_id], amenazas=[])
+            assert client.put(f"/api/especies/{especie_id}", json=datos).status_code == 200
+            tarjeta = _tarjeta(especie_id)
+            assert tarjeta.habitat_ids == [otro_habitat_id]
+            assert tarjeta.amenazas == []
+
+            assert client.delete(f"/api/especies/{especie_id}").status_code == 202
+            assert _tarjeta(especie_id) is None
+    finally:
+        app.dependency_overrides.pop(get_current_colaborador, None)
+
+
+def test_listado_con_tarjetas_sale_en_una_consulta(contar_sql):
+    estado_id, habitat_id, _, _ = _seed_catalogos()
+    db = TestSession()
+    especies = [Especie(nombre_comun=f"Tarjetera {i}", nombre_cientifico="Cardus",
+                        id_estado_conservacion=estado_id) for i in range(3)]
+    db.add_all(especies)
+    db.commit()
+    db.add_all([EspecieHabitat(id_especie=e.id, id_habitat=habitat_id) for e in especies])
+    db.commit()
+    db.close()
+
+    sin_tarjeta = client.get("/api/especies", params={"search": "Tarjetera", "total": "ninguno"}).json()
+
+    db = TestSession()
+    reconstruir_tarjetas(db)
+    db.close()
+
+    resp, sentencias = contar_sql(
+        lambda: client.get("/api/especies", params={"search": "Tarjetera", "total": "ninguno"})
+    )
+    assert len(sentencias) == 1
+    assert resp.json()["especies"] == sin_tarjeta["especies"]
+    assert all(e["habitats"] == ["Pradera marina"] for e in resp.json()["especies"])
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import Especie, Avistamiento, Usuario
+from app.services.teselas import ZOOM_MAXIMO, limites_tesela, tesela_de_punto
+from app.services.versiones import claves_para_evento
+from conftest import TestSession
+
+client = TestClient(app)
+
+# Dos avistamientos juntos en la bahía de La Paz y uno lejos, en Mazatlán.
+LA_PAZ = [(24.1600, -110.3100), (24.1610, -110.3120)]
+MAZATLAN = (23.2494, -106.4111)
+
+
+def _seed():
+    db = TestSession()
+    ballena = Especie(nombre_comun="Ballena teselada", nombre_cientifico="Tessella")
+    lobo = Especie(nombre_comun="Lobo teselado", nombre_cientifico="Tessella lupus")
+    usuario = Usuario(nombre="Tesela", apellido_paterno="Test", email="teselas@demo-sway.com", activo=True)
+    db.add_all([ballena, lobo, usuario])
+    db.commit()
+    puntos = [(ballena.id, *LA_PAZ[0]), (lobo.id, *LA_PAZ[1]), (ballena.id, *MAZATLAN)]
+    db.add_all([Avistamiento(id_especie=e, id_usuario=usuario.id, fecha=datetime(2026, 7, 1), latitud=lat, longitud=lon)
+                for e, lat, lon in puntos])
+    db.commit()
+    ids = ballena.id, lobo.id
+    db.close()
+    return ids
+
+
+def test_tesela_de_punto_cae_dentro_de_sus_limites():
+    for z in (0, 5, 12, ZOOM_MAXIMO):
+        x, y = tesela_de_punto(*MAZATLAN, z)
+        oeste, sur, este, norte = limites_tesela(z, x, y)
+        assert oeste <= MAZATLAN[1] < este and sur <= MAZATLAN[0] < norte
+
+
+def test_grupos_por_celda_con_desglose_por_especie():
+    ballena_id, lobo_id = _seed()
+    x, y = tesela_de_punto(*LA_PAZ[0], 4)
+    assert tesela_de_punto(*MAZATLAN, 4) == (x, y)
+
+    resp = client.get(f"/api/avistamientos/tiles/4/{x}/{y}")
+    assert resp.status_code == 200
+    grupos = [g for g in resp.json()["grupos"]
+              if set(g["especies"]) <= {str(ballena_id), str(lobo_id)}]
+    assert sorted(g["total"] for g in grupos) == [1, 2]
+    bahia = next(g for g in grupos if g["total"] == 2)
+    assert bahia["especies"] == {str(ballena_id): 1, str(lobo_id): 1}
+    assert abs(bahia["latitud"] - 24.1605) < 1e-6
+
+    vacia = client.get("/api/avistamientos/tiles/6/0/0").json()
+    assert vacia["grupos"] == []
+
+
+def test_tesela_invalida():
+    assert client.get("/api/avistamientos/tiles/3/8/0").status_code == 404
+    assert client.get(f"/api/avistamientos/tiles/{ZOOM_MAXIMO + 1}/0/0").status_code == 400
+
+
+def test_eventos_invalidan_solo_las_teselas_del_punto():
+    claves = claves_para_evento("avistamiento_created", {"id": 1, "latitud": MAZATLAN[0], "longitud": MAZATLAN[1]})
+    teselas = [c for c in claves if c.startswith("tesela:")]
+    assert len(teselas) == ZOOM_MAXIMO + 1
+    x, y = tesela_de_punto(*MAZATLAN, 10)
+    assert f"tesela:10/{x}/{y}" in teselas
+    assert claves_para_evento("avistamiento_updated", {"id": 1, "foto_url": "/x.jpg"}) == ["avistamientos"]
+    assert claves_para_evento("especie_eliminacion_progreso", {"id": 1}) == []
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.data.models import EstadoConservacion, Especie, Habitat, Amenaza, EspecieHabitat, EspecieAmenaza
+from app.security.auth import get_current_colaborador
+from conftest import TestSession
+
+client = TestClient(app)
+
+ESCRITURAS = ("INSERT", "UPDATE", "DELETE")
+
+
+def _seed():
+    db = TestSession()
+    estado = EstadoConservacion(nombre="Vulnerable")
+    habitats = [Habitat(nombre=f"Hábitat diff {i}") for i in range(3)]
+    amenaza = Amenaza(nombre="Amenaza diff")
+    db.add_all([estado, amenaza, *habitats])
+    db.commit()
+    especie = Especie(nombre_comun="Diferencial", nombre_cientifico="Differentia minima",
+                      id_estado_conservacion=estado.id)
+    db.add(especie)
+    db.commit()
+    db.add_all([EspecieHabitat(id_especie=especie.id, id_habitat=h.id) for h in habitats[:2]])
+    db.add(EspecieAmenaza(id_especie=especie.id, id_amenaza=amenaza.id))
+    db.commit()
+    datos = {
+        "nombre_comun": "Diferencial", "nombre_cientifico": "Differentia minima",
+        "id_estado_conservacion": estado.id,
+        "habitats": [habitats[1].id, habitats[0].id], "amenazas": [amenaza.id],
+    }
+    ids = especie.id, [h.id for h in habitats]
+    db.close()
+    return ids, datos
+
+
+def _put(especie_id, datos):
+    app.dependency_overrides[get_current_colaborador] = lambda: {"colaborador_id": 1, "token_type": "colaborador"}
+    try:
+        with patch("app.routers.especies.publish_event") as mock_publish:
+            resp = client.put(f"/api/especies/{especie_id}", json=datos)
+    finally:
+        app.dependency_overrides.pop(get_current_colaborador, None)
+    return resp, mock_publish
+
+
+def test_payload_igual_no_escribe_ni_publica(contar_sql):
+    (especie_id, _), datos = _seed()
+    (resp, mock_publish), escrituras = contar_sql(lambda: _put(especie_id, datos), ESCRITURAS)
+    assert resp.status_code == 200
+    assert resp.json()["sin_cambios"] is True
+    assert escrituras == []
+    mock_publish.assert_not_called()
+
+
+def test_solo_aplica_la_diferencia_de_vinculos(contar_sql):
+    (especie_id, habitat_ids), datos = _seed()
+    datos["habitats"] = [habitat_ids[1], habitat_ids[2]]
+    (resp, mock_publish), escrituras = contar_sql(lambda: _put(especie_id, datos), ESCRITURAS)
+    assert resp.status_code == 200
+    mock_publish.assert_called_once()
+
+    vinculos = [s for s in escrituras if "especieshabitats" in s or "especiesamenazas" in s]
+    assert len(vinculos) == 2
+    assert not any("especiesamenazas" in s for s in vinculos)
+
+    db = TestSession()
+    actuales = {h for (h,) in db.query(EspecieHabitat.id_habitat).filter(EspecieHabitat.id_especie == especie_id)}
+    db.close()
+    assert actuales == {habitat_ids[1], habitat_ids[2]}